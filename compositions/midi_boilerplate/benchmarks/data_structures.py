@@ -0,0 +1,250 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+    Scaling benchmark of the data structures (Note, NoteList, EventList) on reproducible synthetic data.
+    Each benchmark is timed --repeat times at each size, on fresh data (the setup is not timed), and the best and median
+    times are reported. The results can be saved as JSON and compared with a saved baseline: a benchmark is a
+    regression if its best time is more than --threshold slower than in the baseline (the exit code is then 1).
+    Usage:
+        python -m compositions.midi_boilerplate.benchmarks.data_structures --output baseline.json
+        python -m compositions.midi_boilerplate.benchmarks.data_structures --baseline baseline.json
+"""
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import mido
+from tabulate import tabulate
+
+from compositions.midi_boilerplate.benchmarks.note_layout import random_note_values
+from compositions.midi_boilerplate.src.data_structures import note_list as note_list_module
+from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.utils.midi_file_to_note_list import midi_file_to_note_list
+
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+# Number of get_simultaneous_notes queries per run.
+NUMBER_OF_QUERIES = 1000
+# Average number of notes per get_salami slice.
+NOTES_PER_SLICE = 10
+TICKS_PER_BEAT = 480
+
+# A benchmark takes the size, the random values of the notes and a working directory, prepares its data and returns
+# the function to time.
+Benchmark = Callable[[int, list[tuple], str], Callable[[], object]]
+
+
+def _note_list(values: list[tuple]) -> NoteList:
+    return NoteList(Note(*v) for v in values)
+
+
+def bench_construction(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    return lambda: _note_list(values)
+
+
+def bench_transform(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    note_list = _note_list(values)
+    return lambda: note_list.transform(interval=2, speed_factor=1.5, velocity_factor=0.8)
+
+
+def bench_transpose(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    note_list = _note_list(values)
+    return lambda: note_list.transform(interval=2)
+
+
+def bench_get_salami(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    note_list = _note_list(values)
+    slice_size = note_list.duration() * NOTES_PER_SLICE / size
+    return lambda: note_list.get_salami(slice_size)
+
+
+def bench_get_simultaneous_notes(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    note_list = _note_list(values)
+    rng = random.Random(size)
+    times = [rng.uniform(0, note_list.get_end_time()) for _ in range(NUMBER_OF_QUERIES)]
+    return lambda: [note_list.get_simultaneous_notes(t) for t in times]
+
+
+def bench_filter_erroneous_notes(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    note_list = _note_list(values)
+
+    def run():
+        # The filter only runs in safe mode.
+        safe_mode = note_list_module.SAFE_MODE
+        note_list_module.SAFE_MODE = True
+        try:
+            note_list.filter_erroneous_notes()
+        finally:
+            note_list_module.SAFE_MODE = safe_mode
+
+    return run
+
+
+def bench_json_round_trip(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    note_list = _note_list(values)
+    return lambda: NoteList.from_json(note_list.to_json())
+
+
+def bench_event_list(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    # One sustain pedal message per note, alternately pressed and released.
+    messages = [{'type': 'control_change', 'control': 64, 'value': 127 * (i % 2 == 0), 'channel': 0, 'time': i / 4}
+                for i in range(size)]
+
+    def run():
+        event_list = EventList()
+        for message in messages:
+            event_list.add_midi_message(message)
+        event_list.stop_events(size / 4)
+        event_list.filter_close_events()
+        return event_list
+
+    return run
+
+
+def bench_midi_file_to_note_list(size: int, values: list[tuple], directory: str) -> Callable[[], object]:
+    path = os.path.join(directory, f'synthetic_{size}.mid')
+    if not os.path.exists(path):
+        write_synthetic_midi_file(path, values)
+    return lambda: midi_file_to_note_list(path)
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    'NoteList construction': bench_construction,
+    'NoteList.transform': bench_transform,
+    'NoteList.transform (transpose only)': bench_transpose,
+    'NoteList.get_salami': bench_get_salami,
+    f'NoteList.get_simultaneous_notes (x{NUMBER_OF_QUERIES})': bench_get_simultaneous_notes,
+    'NoteList.filter_erroneous_notes (SAFE_MODE)': bench_filter_erroneous_notes,
+    'NoteList JSON round-trip': bench_json_round_trip,
+    'EventList pedal messages': bench_event_list,
+    'midi_file_to_note_list': bench_midi_file_to_note_list,
+}
+
+
+def write_synthetic_midi_file(path: str, values: list[tuple]) -> None:
+    """
+    Writes notes to a single-track MIDI file (at the default tempo of 120 bpm, times in quarter notes of 0.5 s).
+    A note starting while another note of the same pitch is sounding is skipped: midi_file_to_note_list tracks the
+    notes by pitch, and would otherwise print a warning for each of them in the timed region.
+    :param path: The path of the file.
+    :param values: The (pitch, time, duration, velocity, channel) values of the notes, times and durations in beats.
+    :return: None
+    """
+    events = []
+    sounding_until = {}  # Pitch -> end tick of the last note written.
+    for pitch, onset, duration, velocity, channel in sorted(values, key=lambda v: v[1]):
+        start = round(onset * TICKS_PER_BEAT)
+        if start < sounding_until.get(pitch, 0):
+            continue
+        end = start + round(duration * TICKS_PER_BEAT)
+        sounding_until[pitch] = end
+        events.append((start, 1, mido.Message('note_on', note=pitch, velocity=velocity, channel=channel)))
+        events.append((end, 0, mido.Message('note_off', note=pitch, velocity=0, channel=channel)))
+    events.sort(key=lambda event: (event[0], event[1]))
+    track = mido.MidiTrack()
+    previous = 0
+    for tick, _, message in events:
+        track.append(message.copy(time=tick - previous))
+        previous = tick
+    midi_file = mido.MidiFile(ticks_per_beat=TICKS_PER_BEAT)
+    midi_file.tracks.append(track)
+    midi_file.save(path)
+
+
+def run_benchmarks(sizes: list[int], names: list[str], repeat: int, seed: int) -> list[dict]:
+    """
+    Runs the benchmarks.
+    :param sizes: The numbers of notes.
+    :param names: The names of the benchmarks to run (see BENCHMARKS).
+    :param repeat: The number of timed runs of each benchmark at each size.
+    :param seed: The random seed of the synthetic data.
+    :return: One result dictionary per benchmark and size.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            values = random_note_values(size, seed)
+            for name in names:
+                times = []
+                for _ in range(repeat):
+                    run = BENCHMARKS[name](size, values, directory)
+                    start = time.perf_counter()
+                    run()
+                    times.append(time.perf_counter() - start)
+                best = min(times)
+                results.append({'benchmark': name, 'size': size, 'best (s)': best,
+                                'median (s)': statistics.median(times), 'best (us/note)': best / size * 1e6})
+                print(f'{name} [{size}]: {best:.4f} s', file=sys.stderr)
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> tuple[list[dict], int]:
+    """
+    Compares results with a baseline, benchmark by benchmark and size by size.
+    :param results: The results of run_benchmarks.
+    :param baseline: The results of a previous run.
+    :param threshold: The relative slowdown above which a benchmark is a regression (e.g. 0.2 for 20%).
+    :return: The comparison rows, and the number of regressions.
+    """
+    reference = {(r['benchmark'], r['size']): r['best (s)'] for r in baseline}
+    rows = []
+    regressions = 0
+    for r in results:
+        previous = reference.get((r['benchmark'], r['size']))
+        if previous is None:
+            continue
+        ratio = r['best (s)'] / previous if previous > 0 else float('inf')
+        regression = ratio > 1 + threshold
+        regressions += regression
+        rows.append({'benchmark': r['benchmark'], 'size': r['size'], 'baseline (s)': previous,
+                     'best (s)': r['best (s)'], 'ratio': ratio, 'status': 'REGRESSION' if regression else 'ok'})
+    return rows, regressions
+
+
+def main(sizes: list[int], names: list[str], repeat: int, seed: int, output: str = None, baseline: str = None,
+         threshold: float = 0.2) -> int:
+    results = run_benchmarks(sizes, names, repeat, seed)
+    print(tabulate(results, headers='keys', floatfmt='.4f'))
+
+    if output is not None:
+        report = {'python': platform.python_version(), 'platform': platform.platform(), 'seed': seed,
+                  'repeat': repeat, 'results': results}
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=1)
+
+    if baseline is None:
+        return 0
+    with open(baseline) as f:
+        rows, regressions = compare(results, json.load(f)['results'], threshold)
+    print(f'\nComparison with {baseline} (threshold {threshold:.0%}):')
+    print(tabulate(rows, headers='keys', floatfmt='.4f'))
+    return 1 if regressions > 0 else 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmarks the data structures at increasing sizes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='The numbers of notes.')
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS),
+                        metavar='NAME', help=f'The benchmarks to run, among: {", ".join(BENCHMARKS)}.')
+    parser.add_argument('--repeat', type=int, default=3, help='The number of timed runs per benchmark and size.')
+    parser.add_argument('--seed', type=int, default=0, help='The random seed of the synthetic data.')
+    parser.add_argument('--output', type=str, help='Saves the results to this JSON file.')
+    parser.add_argument('--baseline', type=str, help='Compares the results with this JSON file (a previous --output).')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='The relative slowdown counted as a regression (default 0.2).')
+    args = parser.parse_args()
+
+    sys.exit(main(args.sizes, args.benchmarks, args.repeat, args.seed, args.output, args.baseline, args.threshold))
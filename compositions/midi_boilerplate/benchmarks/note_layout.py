@@ -0,0 +1,104 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+    Memory and throughput comparison of the slotted Note against the previous dict-based layout.
+    Usage: python -m compositions.midi_boilerplate.benchmarks.note_layout --size 100000
+"""
+import random
+import time
+import tracemalloc
+
+from tabulate import tabulate
+
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+
+
+class LegacyNote(Note):
+    """
+    The previous layout of Note: a per-instance __dict__ (a subclass without __slots__ gets one back), a custom dict
+    allocated for every note, and hashing/equality going through the description dict.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.custom  # Eager allocation of the custom data, as before.
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Note):
+            return False
+        if self.description == other.description:
+            return True
+        elif self.pitch == other.pitch and self.duration == other.duration and \
+                self.velocity == other.velocity and self.channel == other.channel:
+            return abs(self.time - other.time) < 0.0001
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+def random_note_values(size: int, seed: int = 0) -> list[tuple]:
+    """
+    Returns reproducible random (pitch, time, duration, velocity, channel) values, with about 10% of duplicates.
+    :param size: The number of values.
+    :param seed: The random seed.
+    :return: A list of tuples.
+    """
+    rng = random.Random(seed)
+    values = [(rng.randint(21, 108), rng.randint(0, 4 * size) / 4, rng.randint(1, 8) / 4, rng.randint(1, 127),
+               rng.randint(0, 15)) for _ in range(size - size // 10)]
+    return values + rng.sample(values, size // 10)
+
+
+def measure(note_class: type, values: list[tuple]) -> dict:
+    """
+    Measures the memory and the throughput of a note class.
+    :param note_class: Note or LegacyNote.
+    :param values: The values of the notes.
+    :return: A dictionary of measures.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    notes = [note_class(*v) for v in values]
+    construction = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    unique = set(notes)
+    hashing = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for a, b in zip(notes, reversed(notes)):
+        _ = a == b
+    equality = time.perf_counter() - start
+
+    note_list = NoteList(notes)
+    start = time.perf_counter()
+    _ = note_list - NoteList(notes[::2])
+    subtraction = time.perf_counter() - start
+
+    return {'class': note_class.__name__, 'bytes/note': memory / len(values), 'construction (s)': construction,
+            'set() (s)': hashing, '== (s)': equality, 'NoteList - NoteList (s)': subtraction,
+            'unique notes': len(unique)}
+
+
+def main(size: int) -> None:
+    values = random_note_values(size)
+    results = [measure(LegacyNote, values), measure(Note, values)]
+    print(f'{size} notes')
+    print(tabulate(results, headers='keys', floatfmt='.4f'))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compares the slotted Note with the previous dict-based layout.')
+    parser.add_argument('--size', type=int, default=100000, help='The number of notes.')
+    args = parser.parse_args()
+
+    main(args.size)
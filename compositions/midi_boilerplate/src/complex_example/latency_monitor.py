@@ -0,0 +1,190 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import itertools
+import json
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Callable
+
+import numpy as np
+
+# The stages of a phrase, in pipeline order. All the times are perf_counter times.
+FIRST_INPUT = 'first_input'  # First note of the phrase received.
+LAST_INPUT = 'last_input'  # Last message of the phrase received.
+PHRASE_COMPLETE = 'phrase_complete'  # End of the phrase detected, prepare_to_output called.
+PREPARED = 'prepared'  # prepare_to_output returned.
+TRANSFORMED = 'transformed'  # The user transform returned.
+SCHEDULED = 'scheduled'  # The output messages are built and scheduled.
+FIRST_SENT = 'first_sent'  # First output message sent.
+PLAYED = 'played'  # Last output message sent (or playback cancelled).
+STAGES = (FIRST_INPUT, LAST_INPUT, PHRASE_COMPLETE, PREPARED, TRANSFORMED, SCHEDULED, FIRST_SENT, PLAYED)
+
+# Bounds of the histogram bins, in milliseconds.
+HISTOGRAM_BINS_MS = (0, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float('inf'))
+PERCENTILES = (50, 90, 99)
+
+
+class PhraseTrace:
+    """
+    The timestamps of the stages of a phrase, and the scheduled and actual send times of its messages.
+    """
+
+    def __init__(self, monitor: 'LatencyMonitor', phrase_id: int):
+        """
+        :param monitor: The monitor recording the trace when it is finished.
+        :param phrase_id: The number of the phrase.
+        """
+        self.monitor = monitor
+        self.phrase_id = phrase_id
+        self.marks = {}
+        self.send_times = []  # (scheduled, actual)
+
+    def mark(self, stage: str, timestamp: float = None) -> None:
+        """
+        Records the time of a stage (now by default). A stage already recorded is not overwritten.
+        :param stage: The stage (see STAGES).
+        :param timestamp: The perf_counter time of the stage.
+        :return: None
+        """
+        if stage not in self.marks:
+            self.marks[stage] = perf_counter() if timestamp is None else timestamp
+
+    def record_send(self, scheduled: float, actual: float) -> None:
+        """
+        Records the scheduled and actual send times of a message.
+        """
+        self.send_times.append((scheduled, actual))
+        self.mark(FIRST_SENT, actual)
+
+    def finish(self) -> None:
+        """
+        Marks the end of the playback and gives the trace to its monitor.
+        """
+        self.monitor.finish_phrase(self)
+
+    def stage_latencies(self) -> dict[str, float]:
+        """
+        Returns the time spent between consecutive recorded stages, and the response time (from the last input to the
+        first output message), in seconds.
+        """
+        stages = [stage for stage in STAGES if stage in self.marks]
+        latencies = {f'{a}->{b}': self.marks[b] - self.marks[a] for a, b in itertools.pairwise(stages)}
+        if LAST_INPUT in self.marks and FIRST_SENT in self.marks:
+            latencies['response'] = self.marks[FIRST_SENT] - self.marks[LAST_INPUT]
+        return latencies
+
+    def to_dict(self) -> dict:
+        """
+        Returns the trace as a dictionary (times relative to the first stage recorded, in seconds).
+        """
+        origin = min(self.marks.values(), default=0.)
+        jitter = [actual - scheduled for scheduled, actual in self.send_times]
+        return {'phrase': self.phrase_id, 'marks': {stage: time - origin for stage, time in self.marks.items()},
+                'latencies': self.stage_latencies(), 'messages': len(self.send_times),
+                'max_send_error': max(jitter, default=0.)}
+
+
+class LatencyMonitor:
+    """
+    Opt-in instrumentation of the live pipeline: give it to the controllers (monitor argument) to trace each phrase
+    from the input callback to the last output message.
+    The latencies of the stages, the send errors of the messages (actual minus scheduled send time) and the durations
+    of the input callbacks are kept for the last history phrases, and summarized as percentiles and histograms.
+    Each finished phrase is appended to a JSON lines file and/or given to a callback.
+    """
+
+    def __init__(self, path: str = None, callback: Callable[[PhraseTrace], None] = None, history: int = 1000):
+        """
+        :param path: If given, the JSON lines file each finished trace is appended to.
+        :param callback: If given, called with each finished trace (from the output scheduler thread).
+        :param history: The number of phrases (and of messages and input callbacks, times 100) kept for the summary.
+        """
+        self.path = path
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._phrase_ids = itertools.count()
+        self._traces = deque(maxlen=history)
+        self._send_errors = deque(maxlen=history * 100)
+        self._input_durations = deque(maxlen=history * 100)
+
+    def start_phrase(self) -> PhraseTrace:
+        """
+        Returns a new trace for a phrase.
+        """
+        return PhraseTrace(self, next(self._phrase_ids))
+
+    def record_input(self, start: float, end: float) -> None:
+        """
+        Records the duration of an input callback.
+        :param start: The perf_counter time at the start of the callback.
+        :param end: The perf_counter time at the end of the callback.
+        :return: None
+        """
+        self._input_durations.append(end - start)
+
+    def finish_phrase(self, trace: PhraseTrace) -> None:
+        """
+        Records a finished trace: keeps it for the summary, writes it to the file and gives it to the callback.
+        :param trace: The trace of the phrase.
+        :return: None
+        """
+        trace.mark(PLAYED)
+        with self._lock:
+            self._traces.append(trace)
+            self._send_errors.extend(actual - scheduled for scheduled, actual in trace.send_times)
+            if self.path is not None:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(trace.to_dict()) + '\n')
+        if self.callback is not None:
+            self.callback(trace)
+
+    def summary(self) -> dict:
+        """
+        Summarizes the latencies of the stages, the send errors (jitter) and the input callback durations of the
+        recorded phrases, as percentiles (p50, p90, p99, max) and histograms, in milliseconds.
+        :return: The summary as a dictionary.
+        """
+        with self._lock:
+            latencies = {}
+            for trace in self._traces:
+                for name, latency in trace.stage_latencies().items():
+                    latencies.setdefault(name, []).append(latency)
+            send_errors = list(self._send_errors)
+            input_durations = list(self._input_durations)
+            phrases = len(self._traces)
+        return {'phrases': phrases,
+                'stages': {name: _distribution(values) for name, values in latencies.items()},
+                'send_error': _distribution(send_errors),
+                'input_callback': _distribution(input_durations)}
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the summary to a JSON file.
+        :param path: The path of the file.
+        :return: None
+        """
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=1)
+
+
+def _distribution(values: list[float]) -> dict:
+    """
+    Returns the count, percentiles, maximum and histogram of durations in seconds, converted to milliseconds.
+    Negative durations (a message sent early) are counted in the first bin of the histogram.
+    """
+    if not values:
+        return {'count': 0}
+    values = np.array(values) * 1000
+    counts, _ = np.histogram(np.clip(values, 0, None), bins=HISTOGRAM_BINS_MS)
+    distribution = {'count': len(values)}
+    distribution.update({f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+    distribution['max'] = float(values.max())
+    distribution['histogram'] = {f'<{upper}': int(count) for upper, count in zip(HISTOGRAM_BINS_MS[1:], counts)}
+    return distribution
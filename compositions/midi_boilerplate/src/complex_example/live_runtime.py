@@ -0,0 +1,139 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import asyncio
+from time import perf_counter
+from typing import Callable
+
+from compositions.midi_boilerplate.src.complex_example.latency_monitor import PhraseTrace, TRANSFORMED
+from compositions.midi_boilerplate.src.complex_example.midi_input_controller import MidiInputController
+from compositions.midi_boilerplate.src.complex_example.midi_output_controller import MidiOutputController
+from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+
+# Silence (no note sounding and no message) after which a phrase is complete, in seconds.
+DEFAULT_SILENCE_GAP = 0.5
+# Interval at which the messages of a buffered input controller are drained, in seconds.
+DEFAULT_DRAIN_INTERVAL = 0.005
+
+Transform = Callable[[NoteList, EventList], tuple[NoteList, EventList]]
+
+
+class LiveRuntime:
+    """
+    An asyncio live loop: a phrase is complete when no note has been sounding and no message has been received for
+    silence_gap seconds (note_on_off_balance of the input controller). The phrase is then transformed in an executor,
+    so that the event loop keeps detecting the next phrase, and scheduled on the output controller, which plays it
+    without blocking.
+    The input controller signals each message from its callback thread (direct mode); in buffered mode its messages
+    are drained every drain_interval seconds.
+    """
+
+    def __init__(self, input_controller: MidiInputController, output_controller: MidiOutputController,
+                 transform: Transform, silence_gap: float = DEFAULT_SILENCE_GAP,
+                 drain_interval: float = DEFAULT_DRAIN_INTERVAL):
+        """
+        :param input_controller: The input controller, with its ports set.
+        :param output_controller: The output controller, with its port set.
+        :param transform: The function transforming a phrase: (note_list, event_list) -> (note_list, event_list).
+        :param silence_gap: The silence after which a phrase is complete, in seconds.
+        :param drain_interval: The drain interval of a buffered input controller, in seconds.
+        """
+        self.input_controller = input_controller
+        self.output_controller = output_controller
+        self.transform = transform
+        self.silence_gap = silence_gap
+        self.drain_interval = drain_interval
+        self._loop = None
+        self._silence_timer = None
+        self._stopped = None
+        self._phrase_lock = None
+        self._tasks = set()
+
+    async def run(self) -> None:
+        """
+        Runs the live loop until stop() is called or the task is cancelled.
+        :return: None
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._phrase_lock = asyncio.Lock()
+        buffered = self.input_controller.ring_buffer is not None
+        if not buffered:
+            self.input_controller.on_activity = self._notify_activity
+        try:
+            if buffered:
+                while not self._stopped.is_set():
+                    if self.input_controller.drain() > 0:
+                        self._on_activity()
+                    await asyncio.sleep(self.drain_interval)
+            else:
+                await self._stopped.wait()
+        finally:
+            self.input_controller.on_activity = None
+            if self._silence_timer is not None:
+                self._silence_timer.cancel()
+            for task in list(self._tasks):
+                task.cancel()
+
+    def stop(self) -> None:
+        """
+        Stops the live loop (thread-safe).
+        :return: None
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def _notify_activity(self) -> None:
+        """
+        Called from the MIDI callback thread after each message.
+        """
+        self._loop.call_soon_threadsafe(self._on_activity)
+
+    def _on_activity(self) -> None:
+        """
+        Restarts the silence detection after a message.
+        """
+        if self._silence_timer is not None:
+            self._silence_timer.cancel()
+            self._silence_timer = None
+        if self.input_controller.note_on_off_balance == 0 and self.input_controller.has_events():
+            # The silence started with the last message, which may have been handled a bit later.
+            elapsed = perf_counter() - self.input_controller.ultimate_time
+            self._silence_timer = self._loop.call_later(max(self.silence_gap - elapsed, 0), self._on_silence)
+
+    def _on_silence(self) -> None:
+        """
+        Takes the complete phrase from the input controller and processes it in a task.
+        The lock of the controller keeps the callback thread from handling a message between the check, the
+        preparation of the phrase and the reset (a note_on handled in between would be lost by the reset).
+        """
+        self._silence_timer = None
+        with self.input_controller.lock:
+            if self.input_controller.note_on_off_balance != 0 or not self.input_controller.has_events():
+                return
+            note_list, event_list = self.input_controller.prepare_to_output()
+            self.input_controller.reset()
+            trace = self.input_controller.trace if self.input_controller.monitor is not None else None
+        task = self._loop.create_task(self._process_phrase(note_list, event_list, trace))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process_phrase(self, note_list: NoteList, event_list: EventList, trace: PhraseTrace = None) -> None:
+        """
+        Transforms a phrase in an executor and schedules its output. The phrases are sent in the order they ended.
+        """
+        async with self._phrase_lock:
+            try:
+                note_list, event_list = await self._loop.run_in_executor(None, self.transform, note_list, event_list)
+            except Exception as e:
+                print(f"Error while transforming the phrase: {e}")
+                return
+            if trace is not None:
+                trace.mark(TRANSFORMED)
+            self.output_controller.send(note_list, event_list, trace)
@@ -1,12 +1,19 @@
-import time
+import asyncio
 
 import mido
 
+from compositions.midi_boilerplate.src.complex_example.live_runtime import LiveRuntime
 from compositions.midi_boilerplate.src.complex_example.midi_input_controller import MidiInputController
 from compositions.midi_boilerplate.src.complex_example.midi_output_controller import MidiOutputController
+from compositions.midi_boilerplate.src.complex_example.streaming import StreamingRuntime, note_stage
 from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.data_structures.note import Note
 from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
 
+# If True, each note is transformed and played as soon as it is released (transform_note), instead of each phrase once
+# it is over (transform_note_list).
+STREAMING = False
+
 
 def transform_note_list(nl: NoteList, el: EventList) -> tuple[NoteList, EventList]:
     """
@@ -27,6 +34,17 @@ def transform_note_list(nl: NoteList, el: EventList) -> tuple[NoteList, EventLis
     return NoteList(new_nl), el
 
 
+def transform_note(note: Note) -> Note:
+    """
+    Transforms a single note, in streaming mode. TODO: Implement your transformation logic.
+    :param note: The note, as soon as it is released.
+    :return: The transformed note (or several notes, or None to drop it).
+    """
+    # For now, we just transpose the note an octave up.
+    note.transpose(12)
+    return note
+
+
 if __name__ == "__main__":
     input_controller = MidiInputController()
     output_controller = MidiOutputController()
@@ -43,19 +61,18 @@ if __name__ == "__main__":
     else:
         print("No MIDI output ports available.")
 
-    last_time = time.time()
-
     try:
-        while True:
-            current_time = time.time()
-            if current_time - last_time > 1.0:  # Check every second
-                last_time = current_time
-                if input_controller.has_events():
-                    note_list, event_list = input_controller.prepare_to_output()
-                    transformed_note_list, transformed_event_list = transform_note_list(note_list, event_list)
-                    output_controller.send(transformed_note_list, transformed_event_list)
-                    input_controller.reset()
-            time.sleep(0.2)  # Sleep to avoid busy waiting
+        if STREAMING:
+            streaming_runtime = StreamingRuntime(input_controller, output_controller, [note_stage(transform_note)])
+            streaming_runtime.start()
+            try:
+                input('Streaming, press Enter to stop.\n')
+            finally:
+                streaming_runtime.stop()
+        else:
+            # A phrase is transformed and played as soon as the player has been silent for silence_gap seconds.
+            runtime = LiveRuntime(input_controller, output_controller, transform_note_list, silence_gap=0.5)
+            asyncio.run(runtime.run())
     except KeyboardInterrupt:
         print("Exiting...")
     finally:
@@ -7,29 +7,62 @@
 
 """
 import copy
-import time
+import threading
+from time import perf_counter
 
 import mido
 
+from compositions.midi_boilerplate.src.complex_example.latency_monitor import LatencyMonitor, FIRST_INPUT, \
+    LAST_INPUT, PHRASE_COMPLETE, PREPARED
+from compositions.midi_boilerplate.src.complex_example.midi_ring_buffer import MidiRingBuffer, DEFAULT_CAPACITY
+from compositions.midi_boilerplate.src.data_structures.control_change_event import ControlChangeEvent
 from compositions.midi_boilerplate.src.data_structures.event_list import EventList
 from compositions.midi_boilerplate.src.data_structures.note import Note
 from compositions.midi_boilerplate.src.data_structures.note_list import NoteList, MAX_MIDI_PITCH
+from compositions.midi_boilerplate.src.data_structures.sorted_note_list import SortedNoteList
+
+NOTE_STATUSES = {'note_off': 0x80, 'note_on': 0x90}
 
 
 class MidiInputController:
     """
     A class handling all the Midi events coming from the input devices.
+    In buffered mode, the MIDI callback only pushes the raw messages into a ring buffer, and the notes and events are
+    assembled by drain(), which has_events() and prepare_to_output() call first.
     """
 
-    def __init__(self):
+    def __init__(self, buffered: bool = False, buffer_capacity: int = DEFAULT_CAPACITY,
+                 monitor: LatencyMonitor = None, backend=mido):
+        """
+        :param buffered: If True, the messages are buffered by the callback and handled by drain().
+        :param buffer_capacity: The capacity of the ring buffer in messages (buffered mode only).
+        :param monitor: If given, the callbacks are timed and each phrase is traced from its input (see trace).
+        :param backend: The module or object opening the ports (open_input), mido by default (see virtual_ports.py).
+        """
+        self.backend = backend
         self.ports = None
         self.port_names = []
         self.event_list = EventList()
-        self.note_list = NoteList()
+        self.note_list = SortedNoteList()
         self.note_state = [{}] * MAX_MIDI_PITCH
-        self.ultimate_time = time.time()
+        self.ultimate_time = perf_counter()
         self.first_input_time = None
         self.note_on_off_balance = 0
+        self.ring_buffer = MidiRingBuffer(buffer_capacity) if buffered else None
+        self.reported_drops = 0
+        # Called without argument after each message handled by the callback (direct mode only), e.g. to detect the
+        # end of a phrase (see live_runtime.py).
+        self.on_activity = None
+        # Called with each note when its note_off is handled, and with each sustain pedal message when it is handled
+        # (as a ControlChangeEvent of duration 0), e.g. to stream them (see streaming.py).
+        self.on_complete = None
+        # Held while the callback handles a message (direct mode), to check or reset the state of the controller
+        # consistently from another thread.
+        self.lock = threading.Lock()
+        self.monitor = monitor
+        # The trace of the last phrase returned by prepare_to_output (if there is a monitor), to continue it until the
+        # output (see MidiOutputController.send).
+        self.trace = None
 
     def handle_message_with_error(self, message: mido.Message) -> None:
         """
@@ -38,10 +71,16 @@ class MidiInputController:
         :return: None
         :raises Exception: If the message is not handled properly.
         """
-        try:
-            self.handle_message(message)
-        except Exception as e:
-            print(f"Error while handling message: {e}")
+        start = perf_counter() if self.monitor is not None else 0.
+        with self.lock:
+            try:
+                self.handle_message(message)
+            except Exception as e:
+                print(f"Error while handling message: {e}")
+        if self.monitor is not None:
+            self.monitor.record_input(start, perf_counter())
+        if self.on_activity is not None:
+            self.on_activity()
 
     def handle_message(self, message: mido.Message) -> None:
         """
@@ -50,11 +89,19 @@ class MidiInputController:
         :return: None
         """
         message = message.dict()
-        if not self.first_input_time:
-            self.first_input_time = time.time()
         # Message timing information.
-        self.ultimate_time = time.time()
+        self.ultimate_time = perf_counter()
+        if not self.first_input_time:
+            self.first_input_time = self.ultimate_time
         message["time"] = self.ultimate_time - self.first_input_time
+        self.handle_message_dict(message)
+
+    def handle_message_dict(self, message: dict) -> None:
+        """
+        Handles a message, as a dictionary with its time relative to the first input.
+        :param message: The message to handle.
+        :return: None
+        """
         # Handle the message depending on its type.
         if message['type'] == 'note_on' and message['velocity'] > 0:
             self.handle_note_on(message)
@@ -68,7 +115,10 @@ class MidiInputController:
                 message['velocity'] = self.note_state[message['note']]['velocity']
                 self.handle_note_off(message)
         elif message['type'] in ['control_change', 'program_change', 'aftertouch', 'pitchwheel', 'polytouch']:
-            _ = self.event_list.add_midi_message(message)
+            self.event_list.add_midi_message(message)
+            if self.on_complete is not None and message['type'] == 'control_change' and message['control'] == 64:
+                # Pedal down and pedal up are passed on separately: waiting for the release would play the pedal late.
+                self.on_complete(ControlChangeEvent(message['time'], 0, message['channel'], 64, message['value']))
         else:
             print(f'\tUnrecognized message type: {message["type"]} for message {message}.')
 
@@ -102,13 +152,68 @@ class MidiInputController:
                 self.note_list.append(new_note)
                 self.note_state[message['note']] = {}
                 self.note_on_off_balance -= 1  # MIDI silence bookkeeping.
+                if self.on_complete is not None:
+                    self.on_complete(new_note)
+
+    def push_message(self, message: mido.Message) -> None:
+        """
+        The MIDI callback of the buffered mode: pushes the raw message into the ring buffer, without decoding it.
+        :param message: The mido message received.
+        :return: None
+        """
+        timestamp = perf_counter()
+        kind = message.type
+        # Attribute reads are faster than message.bytes() for the frequent messages.
+        if kind == 'note_on' or kind == 'note_off':
+            self.ring_buffer.push(timestamp, NOTE_STATUSES[kind] | message.channel, message.note, message.velocity)
+        elif kind == 'control_change':
+            self.ring_buffer.push(timestamp, 0xB0 | message.channel, message.control, message.value)
+        elif kind == 'pitchwheel':
+            value = message.pitch + 8192
+            self.ring_buffer.push(timestamp, 0xE0 | message.channel, value & 0x7F, value >> 7)
+        elif kind == 'aftertouch':
+            self.ring_buffer.push(timestamp, 0xD0 | message.channel, message.value, 0)
+        else:
+            data = message.bytes()
+            if len(data) <= 3:
+                data += (0, 0)
+                self.ring_buffer.push(timestamp, data[0], data[1], data[2])
+            else:
+                # A longer message (sysex) does not fit in the buffer: it is dropped, as the direct mode ignores it.
+                self.ring_buffer.dropped += 1
+        if self.monitor is not None:
+            self.monitor.record_input(timestamp, perf_counter())
+
+    def drain(self) -> int:
+        """
+        Handles the messages buffered since the last call, in batch (buffered mode only).
+        :return: The number of messages handled.
+        """
+        if self.ring_buffer is None:
+            return 0
+        messages = self.ring_buffer.pop_all()
+        for timestamp, status, data1, data2 in messages:
+            if not self.first_input_time:
+                self.first_input_time = timestamp
+            self.ultimate_time = timestamp
+            message = raw_message_to_dict(status, data1, data2)
+            message['time'] = timestamp - self.first_input_time
+            try:
+                self.handle_message_dict(message)
+            except Exception as e:
+                print(f"Error while handling message: {e}")
+        if self.ring_buffer.dropped != self.reported_drops:
+            print(f'\t{self.ring_buffer.dropped - self.reported_drops} messages dropped (input buffer full, or sysex '
+                  f'messages, which are not buffered).')
+            self.reported_drops = self.ring_buffer.dropped
+        return len(messages)
 
     def reset(self) -> None:
         """
         Resets the members of the input handler.
         :return: None
         """
-        self.note_list = NoteList()
+        self.note_list = SortedNoteList()
         self.event_list = EventList()
         self.note_state = [{}] * MAX_MIDI_PITCH
 
@@ -117,15 +222,25 @@ class MidiInputController:
         Sets the input times of the note_list and sorts it.
         :return: None
         """
+        if self.monitor is not None:
+            self.trace = self.monitor.start_phrase()
+            self.trace.mark(PHRASE_COMPLETE)
+        self.drain()
         if self.note_on_off_balance != 0:
             for i in range(MAX_MIDI_PITCH):
                 if self.note_state[i] != {}:
                     self.handle_note_off({'type': 'note_off', 'note': i, 'velocity': 0,
                                           'time': self.ultimate_time - self.first_input_time})
 
-        self.note_list.sort(key=lambda n: n.time, reverse=False)
+        self.note_list.sort()
+        if self.trace is not None and self.monitor is not None and not self.note_list.is_empty():
+            self.trace.mark(FIRST_INPUT, self.first_input_time + self.note_list.get_start_time())
+            self.trace.mark(LAST_INPUT, self.ultimate_time)
         self.note_list.set_beginning_to_zero()
-        return self.note_list.deep_copy(), copy.deepcopy(self.event_list)
+        note_list, event_list = self.note_list.to_note_list(), copy.deepcopy(self.event_list)
+        if self.monitor is not None:
+            self.trace.mark(PREPARED)
+        return note_list, event_list
 
     def set_ports(self, port_names: list[str]) -> None:
         """
@@ -142,7 +257,8 @@ class MidiInputController:
         self.port_names = port_names
         for i in range(len(self.port_names)):
             if self.port_names[i] is not None:
-                self.ports.append(mido.open_input(self.port_names[i], callback=self.handle_message_with_error))
+                callback = self.push_message if self.ring_buffer is not None else self.handle_message_with_error
+                self.ports.append(self.backend.open_input(self.port_names[i], callback=callback))
         print(f'Accepting MIDI messages...\nInput ports:{self.ports}')
 
     def close(self) -> None:
@@ -161,4 +277,36 @@ class MidiInputController:
         Returns True if the event list is not empty.
         :return: True if the event list is not empty.
         """
+        self.drain()
         return not self.note_list.is_empty() or not self.event_list.is_empty()
+
+
+def raw_message_to_dict(status: int, data1: int, data2: int) -> dict:
+    """
+    Decodes a raw MIDI message into the dictionary of mido.Message.dict() (without time).
+    :param status: The status byte.
+    :param data1: The first data byte.
+    :param data2: The second data byte.
+    :return: The message as a dictionary.
+    """
+    kind = status & 0xF0
+    channel = status & 0x0F
+    if kind == 0x90:
+        return {'type': 'note_on', 'channel': channel, 'note': data1, 'velocity': data2}
+    if kind == 0x80:
+        return {'type': 'note_off', 'channel': channel, 'note': data1, 'velocity': data2}
+    if kind == 0xB0:
+        return {'type': 'control_change', 'channel': channel, 'control': data1, 'value': data2}
+    if kind == 0xE0:
+        return {'type': 'pitchwheel', 'channel': channel, 'pitch': ((data2 << 7) | data1) - 8192}
+    if kind == 0xD0:
+        return {'type': 'aftertouch', 'channel': channel, 'value': data1}
+    if kind == 0xA0:
+        return {'type': 'polytouch', 'channel': channel, 'note': data1, 'value': data2}
+    if kind == 0xC0:
+        return {'type': 'program_change', 'channel': channel, 'program': data1}
+    # System messages: decoded by mido, with the data bytes they actually have.
+    length = {0xF1: 2, 0xF2: 3, 0xF3: 2}.get(status, 1)
+    message = mido.Message.from_bytes([status, data1, data2][:length]).dict()
+    del message['time']
+    return message
@@ -10,11 +10,16 @@ import threading
 import time
 
 import mido
+import numpy as np
 from mido.messages import Message
 from tabulate import tabulate
 
 from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.complex_example.latency_monitor import LatencyMonitor, PhraseTrace, \
+    SCHEDULED
+from compositions.midi_boilerplate.src.complex_example.playback_scheduler import PlaybackScheduler, PlaybackHandle
 from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.utils.midi_message_array import create_message_array_for_output
 from compositions.midi_boilerplate.src.utils.utilities import create_message_list_with_absolute_times, \
     prepare_message_list_for_output
 
@@ -46,12 +51,41 @@ def prepare_to_output(note_list: NoteList, event_list: EventList) -> list[Messag
     return list(map(lambda m: mido.Message(**m), message_list))
 
 
+def prepare_message_array_to_output(note_list: NoteList, event_list: EventList) -> np.ndarray:
+    """
+    Same as prepare_to_output, but returns the messages as a packed array (see midi_message_array.py), without
+    printing them.
+    :param note_list: A list of Note objects.
+    :param event_list: A list of MidiEvent objects.
+    :return: An array of (time, status, data1, data2) records, with times relative to the previous message.
+    """
+    note_list.filter_erroneous_notes()
+
+    if note_list.is_empty():
+        print('No notes to play.')
+    else:
+        # Find the last note and stop all events after it.
+        event_list.stop_events(note_list.get_end_time())
+
+    event_list.filter_close_events()
+
+    return create_message_array_for_output(note_list, event_list)
+
+
 class MidiOutputController:
-    def __init__(self):
+    def __init__(self, monitor: LatencyMonitor = None, backend=mido):
+        """
+        :param monitor: If given, the playback of each phrase is traced (see latency_monitor.py).
+        :param backend: The module or object opening the ports (get_output_names, open_output), mido by default (see
+            virtual_ports.py).
+        """
+        self.backend = backend
+        self.monitor = monitor
         self.output_port_name = None
         self.output_port = None
         self.output_port_lock = threading.Lock()
         self.first_output_time = None
+        self.scheduler = PlaybackScheduler(self.send_message)
 
     def set_port(self, output_port_name: str) -> bool:
         """
@@ -67,9 +101,9 @@ class MidiOutputController:
                 self.output_port.close()
 
             # noinspection PyUnresolvedReferences
-            if output_port_name is not None and output_port_name in mido.get_output_names():
+            if output_port_name is not None and output_port_name in self.backend.get_output_names():
                 # noinspection PyUnresolvedReferences
-                self.output_port = mido.open_output(output_port_name)
+                self.output_port = self.backend.open_output(output_port_name)
             else:
                 print(f'Output port {output_port_name} not found.')
                 self.output_port = None
@@ -82,39 +116,65 @@ class MidiOutputController:
         """
         Closes the output port abruptly.
         """
+        self.scheduler.stop()
         if self.output_port is not None:
             self.output_port.panic()
             self.output_port.reset()
             # Put Pedals back up.
             self.output_port.send(mido.Message('control_change', control=64, value=0, time=0))
 
-    def send(self, note_list: NoteList, event_list: EventList) -> None:
+    def send(self, note_list: NoteList, event_list: EventList, trace: PhraseTrace = None,
+             start: float = None) -> PlaybackHandle | None:
         """
-        Send the midi output.
+        Send the midi output. Returns immediately, the messages are played by the scheduler thread, after the
+        messages already sent.
         :param note_list: A list of Note objects.
         :param event_list: A list of MidiEvent objects.
+        :param trace: The trace of the phrase, if it is traced since its input (by default, a new trace is started if
+            the controller has a monitor).
+        :param start: The perf_counter time at which the phrase starts (by default, now or after the messages already
+            sent), e.g. to align several output controllers.
+        :return: The handle of the playback (to wait for it, await it or cancel it), None if the port is not set.
         """
         if self.output_port is None:
             print('Output port is not set.')
-            return
+            return None
         if self.first_output_time is None:
             self.first_output_time = time.time()
 
-        message_list = prepare_to_output(note_list, event_list)
+        if trace is None and self.monitor is not None:
+            trace = self.monitor.start_phrase()
+
+        message_array = prepare_message_array_to_output(note_list, event_list)
         # mido message playback.
-        print(f'Sending {len(message_list)} messages to output device.')
-        for message in message_list:
-            time.sleep(message.time)
-            try:
-                self.output_port.send(message)
-            except:
-                print("MIDO Error: ")
-                print(message)
-                print(self.output_port)
+        print(f'Sending {len(message_array)} messages to output device.')
+        if trace is None:
+            return self.scheduler.schedule(message_array, start)
+        trace.mark(SCHEDULED)
+        handle = self.scheduler.schedule(message_array, start, trace)
+        handle.add_done_callback(lambda _: trace.finish())
+        return handle
+
+    def send_message(self, message: mido.Message) -> None:
+        """
+        Sends a single message to the output port right away.
+        :param message: The mido message to send.
+        :return: None
+        """
+        output_port = self.output_port
+        if output_port is None:
+            return
+        try:
+            output_port.send(message)
+        except:
+            print("MIDO Error: ")
+            print(message)
+            print(output_port)
 
     def close(self) -> None:
         """
-        Resets the output port.
+        Stops the playback and resets the output port.
         """
+        self.scheduler.stop()
         if self.output_port is not None:
             self.output_port.reset()
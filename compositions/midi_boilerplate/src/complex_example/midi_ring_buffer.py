@@ -0,0 +1,72 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+
+DEFAULT_CAPACITY = 4096
+
+
+class MidiRingBuffer:
+    """
+    A preallocated ring buffer of raw MIDI messages (timestamp, status, data1, data2), for one producer thread (the
+    MIDI callback) and one consumer thread.
+    push only writes 4 slots and a counter, without allocation. When the buffer is full, the new messages are dropped
+    and counted, the producer never waits.
+    The producer publishes a message by incrementing the write counter after filling its slots, so the consumer never
+    reads a partially written message.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        :param capacity: The maximum number of messages waiting to be read, rounded up to a power of 2.
+        """
+        self.capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._mask = self.capacity - 1
+        self._timestamps = [0.] * self.capacity
+        self._statuses = [0] * self.capacity
+        self._data1 = [0] * self.capacity
+        self._data2 = [0] * self.capacity
+        self._written = 0  # Number of messages written since the creation (only modified by the producer).
+        self._read = 0  # Number of messages read since the creation (only modified by the consumer).
+        self.dropped = 0  # Number of messages dropped (only modified by the producer, e.g. when the buffer is full).
+
+    def __len__(self) -> int:
+        return self._written - self._read
+
+    def push(self, timestamp: float, status: int, data1: int, data2: int) -> bool:
+        """
+        Writes a message. Called by the producer only.
+        :param timestamp: The time of the message.
+        :param status: The status byte.
+        :param data1: The first data byte (0 if none).
+        :param data2: The second data byte (0 if none).
+        :return: False if the buffer is full and the message was dropped.
+        """
+        written = self._written
+        if written - self._read >= self.capacity:
+            self.dropped += 1
+            return False
+        i = written & self._mask
+        self._timestamps[i] = timestamp
+        self._statuses[i] = status
+        self._data1[i] = data1
+        self._data2[i] = data2
+        self._written = written + 1
+        return True
+
+    def pop_all(self) -> list[tuple[float, int, int, int]]:
+        """
+        Reads all the messages written so far. Called by the consumer only.
+        :return: The (timestamp, status, data1, data2) messages, in the order they were written.
+        """
+        written = self._written
+        read = self._read
+        mask = self._mask
+        messages = [(self._timestamps[i & mask], self._statuses[i & mask], self._data1[i & mask],
+                     self._data2[i & mask]) for i in range(read, written)]
+        self._read = written
+        return messages
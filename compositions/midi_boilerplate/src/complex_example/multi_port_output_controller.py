@@ -0,0 +1,144 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+from time import perf_counter
+from typing import Callable
+
+import mido
+
+from compositions.midi_boilerplate.src.complex_example.midi_output_controller import MidiOutputController
+from compositions.midi_boilerplate.src.complex_example.playback_scheduler import PlaybackHandle
+from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+
+# Delay between the call to send and the start of the phrase, so that all the ports can be scheduled before the first
+# message is due, in seconds.
+DEFAULT_START_DELAY = 0.005
+
+
+class OutputRoute:
+    """
+    The notes and events sent to an output port: the notes on the given channels (all by default) for which the
+    predicate is true (all by default). Predicates only apply to notes: the events are routed by channel.
+    """
+
+    def __init__(self, channels: set[int] = None, predicate: Callable[[Note], bool] = None):
+        """
+        :param channels: The MIDI channels routed to the port (all if None).
+        :param predicate: A function returning True for the notes routed to the port (all if None).
+        """
+        self.channels = set(channels) if channels is not None else None
+        self.predicate = predicate
+
+    def accepts_channel(self, channel: int) -> bool:
+        return self.channels is None or channel in self.channels
+
+    def accepts(self, note: Note) -> bool:
+        return self.accepts_channel(note.channel) and (self.predicate is None or self.predicate(note))
+
+
+class MultiPortOutputController:
+    """
+    Plays each phrase on several output ports at once. Each port has its own MidiOutputController, thus its own
+    scheduler thread and queue: a slow port only delays its own messages.
+    The notes and events of a phrase are routed to the ports by OutputRoute rules (a note can be sent to several
+    ports), and all the ports start the phrase at the same perf_counter time, so that they stay aligned.
+    """
+
+    def __init__(self, backend=mido, start_delay: float = DEFAULT_START_DELAY):
+        """
+        :param backend: The module or object opening the ports, mido by default (see virtual_ports.py).
+        :param start_delay: The delay between send and the start of the phrase on all the ports, in seconds.
+        """
+        self.backend = backend
+        self.start_delay = start_delay
+        self.controllers: dict[str, MidiOutputController] = {}
+        self.routes: dict[str, OutputRoute] = {}
+
+    def add_port(self, port_name: str, channels: set[int] = None, predicate: Callable[[Note], bool] = None) -> bool:
+        """
+        Opens an output port and sets its route (replaces the route if the port is already open).
+        :param port_name: The name of the output port.
+        :param channels: The MIDI channels routed to the port (all if None).
+        :param predicate: A function returning True for the notes routed to the port (all if None).
+        :return: True if the port is open, False otherwise.
+        """
+        if port_name not in self.controllers:
+            controller = MidiOutputController(backend=self.backend)
+            controller.set_port(port_name)
+            if controller.output_port is None:
+                return False
+            self.controllers[port_name] = controller
+        self.routes[port_name] = OutputRoute(channels, predicate)
+        return True
+
+    def remove_port(self, port_name: str) -> None:
+        """
+        Stops the playback on an output port and closes it.
+        :param port_name: The name of the output port.
+        :return: None
+        """
+        controller = self.controllers.pop(port_name, None)
+        self.routes.pop(port_name, None)
+        if controller is not None:
+            controller.close()
+            controller.output_port.close()
+
+    def route(self, note_list: NoteList, event_list: EventList) -> dict[str, tuple[NoteList, EventList]]:
+        """
+        Splits a phrase between the output ports according to their routes.
+        :param note_list: A list of Note objects.
+        :param event_list: A list of MidiEvent objects.
+        :return: The notes and events of each port, by port name.
+        """
+        routed = {}
+        for port_name, route in self.routes.items():
+            events = EventList()
+            events.extend(event for event in event_list if route.accepts_channel(event.channel))
+            routed[port_name] = (NoteList([note for note in note_list if route.accepts(note)]), events)
+        return routed
+
+    def send(self, note_list: NoteList, event_list: EventList) -> dict[str, PlaybackHandle]:
+        """
+        Sends a phrase to all the output ports. Returns immediately, the messages are played by the scheduler thread of
+        each port. The phrase starts at the same time on all the ports: after start_delay, or once the phrases already
+        sent are over on all the ports.
+        :param note_list: A list of Note objects.
+        :param event_list: A list of MidiEvent objects.
+        :return: The handles of the playback, by port name (the ports without any message are left out).
+        """
+        # The phrase-wide processing is done once, before the phrase is split.
+        note_list.filter_erroneous_notes()
+        if not note_list.is_empty():
+            event_list.stop_events(note_list.get_end_time())
+
+        start = max([perf_counter() + self.start_delay] +
+                    [controller.scheduler.tail for controller in self.controllers.values()])
+        handles = {}
+        for port_name, (notes, events) in self.route(note_list, event_list).items():
+            if notes.is_empty() and events.is_empty():
+                continue
+            handle = self.controllers[port_name].send(notes, events, start=start)
+            if handle is not None:
+                handles[port_name] = handle
+        return handles
+
+    def close_abruptly(self) -> None:
+        """
+        Stops the playback and silences all the output ports.
+        """
+        for controller in self.controllers.values():
+            controller.close_abruptly()
+
+    def close(self) -> None:
+        """
+        Stops the playback and resets all the output ports.
+        """
+        for controller in self.controllers.values():
+            controller.close()
@@ -0,0 +1,307 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from time import perf_counter
+from typing import Callable
+
+import mido
+import numpy as np
+
+from compositions.midi_boilerplate.src.complex_example.latency_monitor import PhraseTrace
+
+NOTE_STATUS_MASK = 0xF0
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+# Time before a deadline at which the scheduler stops sleeping and busy-waits (sleeps usually overshoot by less).
+DEFAULT_SPIN_TIME = 0.002
+
+
+class PlaybackHandle:
+    """
+    The handle of a phrase scheduled for playback, returned by PlaybackScheduler.schedule.
+    It can be waited for (wait), awaited in a coroutine (await handle) or cancelled (cancel).
+    The result is True if all the messages were sent, False if the playback was cancelled.
+    """
+
+    def __init__(self, scheduler: 'PlaybackScheduler', number_of_messages: int, start: float, end: float):
+        """
+        :param scheduler: The scheduler playing the phrase.
+        :param number_of_messages: The number of messages of the phrase.
+        :param start: The deadline of the first message (perf_counter time).
+        :param end: The deadline of the last message (perf_counter time).
+        """
+        self._scheduler = scheduler
+        self._future = Future()
+        self.number_of_messages = number_of_messages
+        self.start = start
+        self.end = end
+        self.cancelled = False
+        self._phrase = None
+
+    def done(self) -> bool:
+        """
+        Returns whether the playback is over (all messages sent, or cancelled).
+        """
+        return self._future.done()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Blocks until the playback is over.
+        :param timeout: The maximum time to wait in seconds (default is no limit).
+        :return: True if all the messages were sent, False if the playback was cancelled.
+        :raises TimeoutError: If the playback is not over after timeout.
+        """
+        return self._future.result(timeout)
+
+    def cancel(self) -> None:
+        """
+        Cancels the playback: the messages not sent yet are dropped, and the notes still sounding are stopped.
+        :return: None
+        """
+        self._scheduler.cancel(self)
+
+    def add_done_callback(self, callback: Callable[['PlaybackHandle'], None]) -> None:
+        """
+        Calls callback(handle) when the playback is over (from the scheduler thread).
+        """
+        self._future.add_done_callback(lambda _: callback(self))
+
+    def __await__(self):
+        return asyncio.wrap_future(self._future).__await__()
+
+    def _resolve(self, completed: bool) -> None:
+        if not self._future.done():
+            self._future.set_result(completed)
+
+
+class _Phrase:
+    """
+    The playback state of a scheduled phrase.
+    """
+    __slots__ = ('records', 'deadlines', 'position', 'handle', 'order', 'entry', 'sounding', 'trace')
+
+    def __init__(self, records: list[tuple], deadlines: list[float], handle: PlaybackHandle, order: int,
+                 trace: PhraseTrace = None):
+        self.records = records
+        self.deadlines = deadlines
+        self.position = 0
+        self.handle = handle
+        self.order = order  # Sequence number of the phrase, the first scheduled phrase plays first at equal deadlines.
+        self.entry = -1  # Sequence number of the valid heap entry of the phrase.
+        self.sounding = set()  # (channel, pitch) of the notes on.
+        self.trace = trace
+
+
+class PlaybackScheduler:
+    """
+    Plays MIDI messages at absolute deadlines from a dedicated thread.
+    The deadlines are computed once on the perf_counter clock (monotonic, high resolution) when a phrase is scheduled,
+    so a late message does not delay the next ones: the timing errors do not accumulate. The thread sleeps until
+    spin_time before a deadline, then busy-waits until the deadline.
+    Several phrases can be scheduled at once, their messages are interleaved by deadline.
+    """
+
+    def __init__(self, send: Callable[[mido.Message], None], spin_time: float = DEFAULT_SPIN_TIME):
+        """
+        :param send: The function sending a message (e.g. the send method of a mido output port).
+        :param spin_time: The busy-wait time before each deadline in seconds.
+        """
+        self.send = send
+        self.spin_time = spin_time
+        self._heap = []  # (deadline, phrase order, entry, phrase)
+        self._playing = set()  # The phrases not over yet.
+        self._entries = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._tail = 0.  # Deadline of the last message scheduled, among the phrases not cancelled.
+
+    def schedule(self, messages: np.ndarray, start: float = None, trace: PhraseTrace = None) -> PlaybackHandle:
+        """
+        Schedules a phrase for playback and returns immediately.
+        :param messages: An array of (time, status, data1, data2) records with times relative to the previous message
+            (see midi_message_array.create_message_array_for_output).
+        :param start: The perf_counter time of the phrase start. By default, the phrase starts now, or when the phrases
+            already scheduled end, as if they were played one after another.
+        :param trace: If given, the scheduled and actual send times of the messages are recorded in the trace.
+        :return: The handle of the playback.
+        """
+        deadlines = np.cumsum(messages['time'])
+        with self._condition:
+            if start is None:
+                start = max(perf_counter(), self._tail)
+            deadlines = (deadlines + start).tolist()
+            end = deadlines[-1] if deadlines else start
+            handle = PlaybackHandle(self, len(deadlines), start, end)
+            if not deadlines:
+                handle._resolve(True)
+                return handle
+            self._tail = max(self._tail, end)
+            phrase = _Phrase([(status, data1, data2) for _, status, data1, data2 in messages.tolist()], deadlines,
+                             handle, next(self._entries), trace)
+            handle._phrase = phrase
+            self._playing.add(phrase)
+            self._push(phrase, deadlines[0])
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name='PlaybackScheduler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return handle
+
+    def cancel(self, handle: PlaybackHandle) -> None:
+        """
+        Cancels the playback of a phrase (see PlaybackHandle.cancel).
+        :param handle: The handle of the phrase.
+        :return: None
+        """
+        with self._condition:
+            if handle.done() or handle.cancelled:
+                return
+            handle.cancelled = True
+            # The next phrases start after the phrases still playing only.
+            self._tail = max((phrase.deadlines[-1] for phrase in self._playing if not phrase.handle.cancelled),
+                             default=0.)
+            # The phrase is moved to the top of the heap, so that its sounding notes are stopped right away.
+            self._push(handle._phrase, float('-inf'))
+            self._condition.notify()
+
+    def cancel_all(self) -> None:
+        """
+        Cancels all the scheduled phrases.
+        :return: None
+        """
+        with self._condition:
+            handles = [phrase.handle for phrase in self._playing]
+        for handle in handles:
+            handle.cancel()
+
+    def stop(self) -> None:
+        """
+        Cancels all the scheduled phrases and stops the thread, once the sounding notes are stopped.
+        :return: None
+        """
+        self.cancel_all()
+        with self._condition:
+            thread = self._thread
+            self._stopped = True
+            self._condition.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._condition:
+            self._thread = None
+
+    @property
+    def tail(self) -> float:
+        """
+        The deadline of the last message scheduled, among the phrases not cancelled (perf_counter time).
+        """
+        with self._condition:
+            return self._tail
+
+    def is_playing(self) -> bool:
+        """
+        Returns whether messages are waiting to be sent.
+        """
+        with self._condition:
+            return len(self._playing) > 0
+
+    def _push(self, phrase: _Phrase, deadline: float) -> None:
+        phrase.entry = next(self._entries)
+        # At equal deadlines, the messages are sent in the order of their phrases (e.g. the note_off ending a phrase
+        # before the note_on starting the next one on the same pitch).
+        heapq.heappush(self._heap, (deadline, phrase.order, phrase.entry, phrase))
+
+    def _next_due(self) -> _Phrase | None:
+        """
+        Sleeps until the next message is due (minus the spin time) and pops its phrase. Called with the lock held.
+        :return: The phrase of the next message (or of a cancelled phrase), or None if the scheduler is stopped.
+        """
+        while True:
+            if self._heap:
+                deadline, _, entry, phrase = self._heap[0]
+                if entry != phrase.entry:  # Outdated entry of a cancelled phrase.
+                    heapq.heappop(self._heap)
+                    continue
+                if self._stopped:
+                    phrase.handle.cancelled = True
+                elif not phrase.handle.cancelled:
+                    remaining = deadline - perf_counter()
+                    if remaining > self.spin_time:
+                        self._condition.wait(remaining - self.spin_time)
+                        continue
+                heapq.heappop(self._heap)
+                phrase.entry = -1
+                return phrase
+            if self._stopped:
+                return None
+            self._condition.wait()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                phrase = self._next_due()
+            if phrase is None:
+                return
+            if not phrase.handle.cancelled:
+                deadline = phrase.deadlines[phrase.position]
+                while perf_counter() < deadline:
+                    pass
+            with self._condition:
+                cancelled = phrase.handle.cancelled
+                if not cancelled:
+                    record = phrase.records[phrase.position]
+                    deadline = phrase.deadlines[phrase.position]
+                    phrase.position += 1
+                    if phrase.position < len(phrase.records):
+                        self._push(phrase, phrase.deadlines[phrase.position])
+                    else:
+                        self._playing.discard(phrase)
+                else:
+                    self._playing.discard(phrase)
+            if cancelled:
+                self._stop_sounding_notes(phrase)
+                phrase.handle._resolve(False)
+                continue
+            self._send_record(phrase, record, deadline)
+            if phrase.position == len(phrase.records):
+                phrase.handle._resolve(True)
+
+    def _send_record(self, phrase: _Phrase, record: tuple, deadline: float) -> None:
+        """
+        Sends a message record at its deadline, keeping track of the notes sounding.
+        """
+        status, data1, data2 = record
+        kind = status & NOTE_STATUS_MASK
+        if kind == NOTE_ON and data2 > 0:
+            phrase.sounding.add((status & 0x0F, data1))
+        elif kind == NOTE_OFF or kind == NOTE_ON:
+            phrase.sounding.discard((status & 0x0F, data1))
+        if phrase.trace is not None:
+            phrase.trace.record_send(deadline, perf_counter())
+        try:
+            self.send(mido.Message.from_bytes(record))
+        except Exception as e:
+            print(f"MIDO Error: {e}")
+            print(record)
+
+    def _stop_sounding_notes(self, phrase: _Phrase) -> None:
+        """
+        Sends a note_off for each note of a cancelled phrase that is still sounding.
+        """
+        for channel, pitch in phrase.sounding:
+            try:
+                self.send(mido.Message('note_off', channel=channel, note=pitch, velocity=0))
+            except Exception as e:
+                print(f"MIDO Error: {e}")
+        phrase.sounding.clear()
@@ -0,0 +1,238 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+    Streaming mode of the live pipeline: the notes are transformed and played one by one, as soon as the input
+    controller completes them (at their note_off), instead of once the whole phrase is over.
+
+    A stage is a generator function taking the iterator of the previous stage and yielding its own items, e.g.
+
+        def octave_doubling(items):
+            for item in items:
+                yield item
+                if isinstance(item, Note):
+                    yield Note(item.pitch + 12, item.time, item.duration, item.velocity, item.channel)
+
+    The items are the completed notes (Note), the sustain pedal messages as soon as they are received (a
+    ControlChangeEvent of duration 0 for the pedal-down, and another one of value 0 for the pedal-up), and FLUSH, which
+    is sent when no input came for flush_timeout seconds: a stage holding notes back (to know what comes next) must
+    then yield them, and pass FLUSH on. note_stage and lookahead_stage build such stages from plain functions.
+    The time of an item is relative to the first input, as in the input controller: it is played at its time plus the
+    delay of the runtime, or right away if that time is over.
+"""
+import copy
+import queue
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+
+from compositions.midi_boilerplate.src.complex_example.midi_input_controller import MidiInputController
+from compositions.midi_boilerplate.src.complex_example.midi_output_controller import MidiOutputController
+from compositions.midi_boilerplate.src.data_structures.control_change_event import ControlChangeEvent
+from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.data_structures.midi_event import MidiEvent
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.data_structures.pedal_event import SustainPedalEvent
+from compositions.midi_boilerplate.src.utils.midi_message_array import create_message_array_for_output, \
+    CONTROL_CHANGE, MESSAGE_DTYPE
+
+
+class _Flush:
+    def __repr__(self) -> str:
+        return 'FLUSH'
+
+
+# Sent through the stages when the input is silent: the notes held back must be yielded.
+FLUSH = _Flush()
+# Silence after which FLUSH is sent, in seconds.
+DEFAULT_FLUSH_TIMEOUT = 0.3
+# Interval at which the messages of a buffered input controller are drained, in seconds.
+DEFAULT_DRAIN_INTERVAL = 0.005
+
+StreamItem = Note | MidiEvent | _Flush
+Stage = Callable[[Iterator[StreamItem]], Iterator[StreamItem]]
+_STOP = object()
+
+
+def _outputs(result: Note | Iterable[Note] | None) -> Iterable[Note]:
+    if result is None:
+        return ()
+    if isinstance(result, Note):
+        return (result,)
+    return result
+
+
+def note_stage(f: Callable[[Note], Note | Iterable[Note] | None]) -> Stage:
+    """
+    Creates a stage applying a function to each note. The events and FLUSH are passed on.
+    :param f: A function taking a note and returning a note, several notes or None (the note is dropped).
+    :return: The stage.
+    """
+
+    def stage(items: Iterator[StreamItem]) -> Iterator[StreamItem]:
+        for item in items:
+            if isinstance(item, Note):
+                yield from _outputs(f(item))
+            else:
+                yield item
+
+    return stage
+
+
+def lookahead_stage(f: Callable[[Note, list[Note]], Note | Iterable[Note] | None], size: int) -> Stage:
+    """
+    Creates a stage applying a function to each note with the notes that follow it: a note is held back until size
+    notes followed it, or until FLUSH (the next notes are then fewer). The events are passed on without delay.
+    :param f: A function taking a note and the list of its next notes (at most size) and returning a note, several
+        notes or None (the note is dropped).
+    :param size: The maximum number of next notes given to f, i.e. the maximum number of notes held back.
+    :return: The stage.
+    """
+
+    def stage(items: Iterator[StreamItem]) -> Iterator[StreamItem]:
+        window = deque()
+        for item in items:
+            if isinstance(item, Note):
+                window.append(item)
+                if len(window) > size:
+                    note = window.popleft()
+                    yield from _outputs(f(note, list(window)))
+                continue
+            if item is FLUSH:
+                while window:
+                    note = window.popleft()
+                    yield from _outputs(f(note, list(window)))
+            yield item
+        while window:
+            note = window.popleft()
+            yield from _outputs(f(note, list(window)))
+
+    return stage
+
+
+class StreamingRuntime:
+    """
+    Runs the stages on the notes and events completed by the input controller, in a dedicated thread, and schedules
+    each item they yield on the scheduler of the output controller as soon as it is yielded.
+    """
+
+    def __init__(self, input_controller: MidiInputController, output_controller: MidiOutputController,
+                 stages: list[Stage], delay: float = 0., flush_timeout: float = DEFAULT_FLUSH_TIMEOUT,
+                 drain_interval: float = DEFAULT_DRAIN_INTERVAL):
+        """
+        :param input_controller: The input controller, with its ports set.
+        :param output_controller: The output controller, with its port set.
+        :param stages: The stages, applied in order.
+        :param delay: The delay between the input and the output of an item, in seconds (the items whose output time
+            is over are played right away).
+        :param flush_timeout: The silence after which FLUSH is sent through the stages, in seconds.
+        :param drain_interval: The drain interval of a buffered input controller, in seconds.
+        """
+        self.input_controller = input_controller
+        self.output_controller = output_controller
+        self.stages = stages
+        self.delay = delay
+        self.flush_timeout = flush_timeout
+        self.drain_interval = drain_interval
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Starts streaming from the input controller (returns immediately).
+        :return: None
+        """
+        if self._thread is not None:
+            return
+        if self.output_controller.output_port is None:
+            print('Output port is not set.')
+        self.input_controller.on_complete = self._queue.put
+        self._thread = threading.Thread(target=self._run, name='StreamingRuntime', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops streaming, once the items held back by the stages are scheduled.
+        :return: None
+        """
+        if self._thread is None:
+            return
+        self.input_controller.on_complete = None
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _source(self) -> Iterator[StreamItem]:
+        """
+        Yields the items completed by the input controller, and FLUSH after each silence of flush_timeout seconds.
+        """
+        buffered = self.input_controller.ring_buffer is not None
+        last_item = None  # perf_counter time of the last item since the last FLUSH.
+        while True:
+            if buffered:
+                # The input is handled in this thread, which calls on_complete.
+                self.input_controller.drain()
+                timeout = self.drain_interval
+            else:
+                timeout = self.flush_timeout if last_item is None else last_item + self.flush_timeout - perf_counter()
+            try:
+                item = self._queue.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                if last_item is not None and perf_counter() - last_item >= self.flush_timeout:
+                    last_item = None
+                    self._on_silence()
+                    yield FLUSH
+                continue
+            if item is _STOP:
+                return
+            last_item = perf_counter()
+            # The stages get their own copy: the input controller keeps the notes of the phrase.
+            yield copy.copy(item)
+
+    def _on_silence(self) -> None:
+        """
+        Clears the notes and events kept by the input controller when no note is sounding, as they are already
+        streamed. The lock of the controller keeps the callback from handling a note_on between the check and the
+        reset (in buffered mode, the messages are handled by this thread anyway).
+        """
+        with self.input_controller.lock:
+            if self.input_controller.note_on_off_balance == 0:
+                self.input_controller.reset()
+
+    def _run(self) -> None:
+        items = self._source()
+        for stage in self.stages:
+            items = stage(items)
+        try:
+            for item in items:
+                if item is not FLUSH:
+                    self._schedule(item)
+        except Exception as e:
+            print(f"Error in the streaming stages: {e}")
+
+    def _schedule(self, item: Note | MidiEvent) -> None:
+        """
+        Schedules an item at its input time plus the delay, or now if that time is over.
+        """
+        if self.output_controller.output_port is None:
+            return
+        if isinstance(item, Note):
+            messages = create_message_array_for_output(NoteList([item]), EventList())
+        elif isinstance(item, ControlChangeEvent) and not isinstance(item, SustainPedalEvent):
+            # A single control change message, e.g. a streamed pedal-down or pedal-up.
+            messages = np.zeros(1, dtype=MESSAGE_DTYPE)
+            messages[0] = (item.time, CONTROL_CHANGE | item.channel, item.control, item.value)
+        else:
+            event_list = EventList()
+            event_list.append(item)
+            messages = create_message_array_for_output(NoteList(), event_list)
+        # The first message keeps its absolute time, which the start time is added to.
+        start = max(self.input_controller.first_input_time + self.delay, perf_counter() - item.time)
+        self.output_controller.scheduler.schedule(messages, start)
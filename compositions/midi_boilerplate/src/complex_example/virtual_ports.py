@@ -0,0 +1,258 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+    In-process virtual MIDI ports, to run the controllers without MIDI hardware or rtmidi (e.g. for throughput and
+    latency tests). A VirtualMidiBackend has the port functions of mido used by the controllers, and is given to them
+    instead of mido:
+
+        backend = VirtualMidiBackend(input_names=['keyboard'], output_names=['synth'])
+        input_controller = MidiInputController(backend=backend)
+        input_controller.set_ports(['keyboard'])
+        output_controller = MidiOutputController(backend=backend)
+        output_controller.set_port('synth')
+        backend.inject('keyboard', note_stream(100, rate=50)).join()
+        backend.output('synth').captured  # [(perf_counter time, message), ...]
+"""
+import threading
+from time import perf_counter, sleep
+from typing import Callable, Iterable
+
+import mido
+
+# Time before a deadline at which the injection thread stops sleeping and busy-waits.
+SPIN_TIME = 0.002
+
+
+class VirtualInputPort:
+    """
+    A virtual input port: the messages injected by the backend are given to its callback, or queued if it has none.
+    """
+
+    def __init__(self, name: str, callback: Callable[[mido.Message], None] = None):
+        """
+        :param name: The name of the port.
+        :param callback: The function called with each message received (from the injection thread).
+        """
+        self.name = name
+        self.callback = callback
+        self.closed = False
+        self.pending = []
+
+    def receive_message(self, message: mido.Message) -> None:
+        """
+        Delivers a message to the port, as the MIDI driver would. The messages are ignored once the port is closed.
+        :param message: The mido message received.
+        :return: None
+        """
+        if self.closed:
+            return
+        if self.callback is not None:
+            self.callback(message)
+        else:
+            self.pending.append(message)
+
+    def iter_pending(self) -> Iterable[mido.Message]:
+        """
+        Iterates over the messages queued since the last call (port without callback).
+        """
+        pending, self.pending = self.pending, []
+        yield from pending
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __repr__(self) -> str:
+        state = 'closed' if self.closed else 'open'
+        return f"<{state} input '{self.name}' (virtual)>"
+
+
+class VirtualOutputPort:
+    """
+    A virtual output port: the messages sent are captured with their perf_counter send time.
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: The name of the port.
+        """
+        self.name = name
+        self.closed = False
+        self.captured = []  # (perf_counter time, message)
+        self._lock = threading.Lock()
+
+    def send(self, message: mido.Message) -> None:
+        """
+        Captures a message.
+        :param message: The mido message sent.
+        :return: None
+        :raises ValueError: If the port is closed.
+        """
+        timestamp = perf_counter()
+        if self.closed:
+            raise ValueError('send() called on closed port')
+        with self._lock:
+            self.captured.append((timestamp, message))
+
+    def panic(self) -> None:
+        """
+        Sends all_sound_off on every channel, as mido ports do.
+        """
+        for channel in range(16):
+            self.send(mido.Message('control_change', channel=channel, control=120, value=0))
+
+    def reset(self) -> None:
+        """
+        Sends all_notes_off and reset_all_controllers on every channel, as mido ports do.
+        """
+        for channel in range(16):
+            self.send(mido.Message('control_change', channel=channel, control=123, value=0))
+            self.send(mido.Message('control_change', channel=channel, control=121, value=0))
+
+    def take(self) -> list[tuple[float, mido.Message]]:
+        """
+        Returns the messages captured since the last call, and forgets them.
+        :return: The (perf_counter time, message) pairs, in the order they were sent.
+        """
+        with self._lock:
+            captured, self.captured = self.captured, []
+        return captured
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __repr__(self) -> str:
+        state = 'closed' if self.closed else 'open'
+        return f"<{state} output '{self.name}' (virtual)>"
+
+
+class VirtualMidiBackend:
+    """
+    A set of named virtual ports, with the port functions of mido used by the controllers (get_input_names,
+    get_output_names, open_input, open_output).
+    An input port receives the message streams injected with inject, at their own timing, from a separate thread as
+    with a real MIDI driver. An output port captures the messages sent with their time.
+    """
+
+    def __init__(self, input_names: list[str] = None, output_names: list[str] = None):
+        """
+        :param input_names: The names of the input ports available.
+        :param output_names: The names of the output ports available.
+        """
+        self.input_names = list(input_names or [])
+        self.output_names = list(output_names or [])
+        self.inputs = {}  # Name -> last VirtualInputPort opened.
+        self.outputs = {}  # Name -> last VirtualOutputPort opened.
+
+    def get_input_names(self) -> list[str]:
+        return list(self.input_names)
+
+    def get_output_names(self) -> list[str]:
+        return list(self.output_names)
+
+    def open_input(self, name: str, callback: Callable[[mido.Message], None] = None) -> VirtualInputPort:
+        """
+        Opens an input port.
+        :param name: The name of the port.
+        :param callback: The function called with each message received.
+        :return: The port.
+        :raises OSError: If there is no input port with this name.
+        """
+        if name not in self.input_names:
+            raise OSError(f'unknown port {name!r}')
+        port = VirtualInputPort(name, callback)
+        self.inputs[name] = port
+        return port
+
+    def open_output(self, name: str) -> VirtualOutputPort:
+        """
+        Opens an output port.
+        :param name: The name of the port.
+        :return: The port.
+        :raises OSError: If there is no output port with this name.
+        """
+        if name not in self.output_names:
+            raise OSError(f'unknown port {name!r}')
+        port = VirtualOutputPort(name)
+        self.outputs[name] = port
+        return port
+
+    def output(self, name: str) -> VirtualOutputPort:
+        """
+        Returns the last output port opened with this name.
+        :raises KeyError: If no output port was opened with this name.
+        """
+        return self.outputs[name]
+
+    def receive(self, name: str, message: mido.Message) -> None:
+        """
+        Delivers a message to an input port right away, from the calling thread.
+        :param name: The name of the input port.
+        :param message: The mido message.
+        :return: None
+        :raises KeyError: If no input port was opened with this name.
+        """
+        self.inputs[name].receive_message(message)
+
+    def inject(self, name: str, messages: Iterable[mido.Message], start: float = None) -> threading.Thread:
+        """
+        Delivers a stream of messages to an input port from a new thread, each message at its time. The time of each
+        message is relative to the previous one, as in a mido track (see note_stream). The deadlines are absolute, so
+        the timing errors do not accumulate.
+        :param name: The name of the input port.
+        :param messages: The messages to deliver.
+        :param start: The perf_counter time of the stream start (now by default).
+        :return: The injection thread, already started (join it to wait for the end of the stream).
+        """
+        if start is None:
+            start = perf_counter()
+        thread = threading.Thread(target=self._inject, args=(name, list(messages), start),
+                                  name=f'VirtualMidiInput-{name}', daemon=True)
+        thread.start()
+        return thread
+
+    def _inject(self, name: str, messages: list[mido.Message], start: float) -> None:
+        deadline = start
+        for message in messages:
+            deadline += message.time
+            remaining = deadline - perf_counter()
+            if remaining > SPIN_TIME:
+                sleep(remaining - SPIN_TIME)
+            while perf_counter() < deadline:
+                pass
+            self.receive(name, message.copy(time=0))
+
+
+def note_stream(number_of_notes: int, rate: float, duration: float = None, pitches: Iterable[int] = range(60, 72),
+                velocity: int = 64, channel: int = 0) -> list[mido.Message]:
+    """
+    Creates a stream of notes at a given rate, to inject into a virtual input port.
+    :param number_of_notes: The number of notes.
+    :param rate: The number of notes per second.
+    :param duration: The duration of each note in seconds (by default, half the time between two notes, so that the
+        notes do not overlap).
+    :param pitches: The pitches of the notes, repeated cyclically.
+    :param velocity: The velocity of the notes.
+    :param channel: The MIDI channel of the notes.
+    :return: The note_on and note_off messages, with times relative to the previous message.
+    """
+    period = 1 / rate
+    duration = period / 2 if duration is None else duration
+    pitches = list(pitches)
+    # Absolute times first, then sorted and delta-encoded, so that overlapping notes are supported.
+    events = []
+    for i in range(number_of_notes):
+        pitch = pitches[i % len(pitches)]
+        events.append((i * period, 1, mido.Message('note_on', channel=channel, note=pitch, velocity=velocity)))
+        events.append((i * period + duration, 0, mido.Message('note_off', channel=channel, note=pitch, velocity=0)))
+    # At equal times, the note_off comes first.
+    events.sort(key=lambda event: (event[0], event[1]))
+    stream = []
+    previous = 0.
+    for time, _, message in events:
+        stream.append(message.copy(time=time - previous))
+        previous = time
+    return stream
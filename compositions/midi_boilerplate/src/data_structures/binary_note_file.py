@@ -0,0 +1,96 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+
+    Binary note file format (little-endian):
+    - a header of HEADER_SIZE bytes: magic, version, record size, number of notes, offset and length of the custom table
+    - the packed note records (RECORD_DTYPE), starting at HEADER_SIZE so that they can be memory-mapped
+    - an optional custom data side table: a UTF-8 JSON object {note index: custom data}
+"""
+import json
+import struct
+
+import numpy as np
+
+from compositions.midi_boilerplate.src.data_structures.note_array import NoteArray
+
+MAGIC = b'MIDITNL\x00'
+VERSION = 1
+HEADER_FORMAT = '<8sHHQQQ'  # magic, version, record size, note count, custom table offset, custom table length
+HEADER_SIZE = 64  # struct.calcsize(HEADER_FORMAT) padded, the records stay 8-byte aligned.
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('duration', '<f8'), ('pitch', 'u1'), ('velocity', 'u1'),
+                         ('channel', 'u1'), ('reserved', 'V5')])
+
+
+def is_binary_note_file(path: str) -> bool:
+    """
+    Checks if a file is a binary note file.
+    :param path: The path to the file.
+    :return: True if the file starts with the binary note file magic.
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def save_note_array(note_array: NoteArray, path: str) -> None:
+    """
+    Saves a note array to a binary note file.
+    :param note_array: The note array to save.
+    :param path: The path of the file.
+    :return: None
+    """
+    records = np.zeros(len(note_array), dtype=RECORD_DTYPE)
+    records['time'] = note_array.times
+    records['duration'] = note_array.durations
+    records['pitch'] = note_array.pitches
+    records['velocity'] = note_array.velocities
+    records['channel'] = note_array.channels
+    custom_table = json.dumps(note_array.custom).encode('utf-8') if note_array.custom else b''
+    custom_offset = HEADER_SIZE + records.nbytes if custom_table else 0
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_DTYPE.itemsize, len(records), custom_offset,
+                         len(custom_table))
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\x00'))
+        f.write(records.tobytes())
+        f.write(custom_table)
+
+
+def load_note_array(path: str, mmap: bool = True) -> NoteArray:
+    """
+    Loads a note array from a binary note file.
+    :param path: The path of the file.
+    :param mmap: If True, the columns of the note array are views on the memory-mapped file: opening is O(1) and the
+        notes are only read from the disk when accessed. The mapping is copy-on-write, modifying the note array does
+        not modify the file.
+    :return: The loaded NoteArray.
+    :raises ValueError: If the file is not a binary note file or has an unsupported version.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a binary note file.")
+        magic, version, record_size, count, custom_offset, custom_length = struct.unpack_from(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary note file.")
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Unsupported binary note file version {version} (record size {record_size}).")
+        custom = {}
+        if custom_length > 0:
+            f.seek(custom_offset)
+            custom = {int(i): c for i, c in json.loads(f.read(custom_length).decode('utf-8')).items()}
+        if count == 0:
+            return NoteArray(custom=custom)
+        if mmap:
+            records = np.memmap(path, dtype=RECORD_DTYPE, mode='c', offset=HEADER_SIZE, shape=(count,))
+        else:
+            f.seek(HEADER_SIZE)
+            records = np.fromfile(f, dtype=RECORD_DTYPE, count=count)
+    return NoteArray(records['pitch'], records['time'], records['duration'], records['velocity'],
+                     records['channel'], custom)
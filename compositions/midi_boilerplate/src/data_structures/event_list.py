@@ -6,6 +6,8 @@
     joris.monnet@epfl.ch
 
 """
+import mido
+
 from compositions.midi_boilerplate.src.data_structures.midi_event import MidiEvent
 from compositions.midi_boilerplate.src.data_structures.pedal_event import SustainPedalEvent
 from compositions.midi_boilerplate.src.data_structures.type_aliases import TimeType
@@ -116,17 +118,20 @@ class EventList(list[MidiEvent]):
         self.extend(other_events)
         self.extend(result)
 
-    def add_midi_message(self, message: dict) -> MidiEvent | None:
+    def add_midi_message(self, message: dict | mido.Message) -> MidiEvent | None:
         """
         Adds a midi message to the event list as A custom object (MidiEvent).
         IMPORTANT: This method is not complete. It only adds pedal events at this moment, but it can be extended to add
         other types of events.
-        :param message: The message to add. (Can be a dictionary or a mido.Message)
+        :param message: The message to add. (Can be a dictionary or a mido.Message, converted with its dict method)
+            Its time must be the absolute time of the message, as for the note messages.
         :return: MidiEvent
         """
-        if message.message.is_control_change():
+        if isinstance(message, mido.Message):
+            message = message.dict()
+        if message['type'] == 'control_change':
             # Args = control, value, channel
-            if message.message.controller_value() == 64:
+            if message['control'] == 64:
                 # Wait for the next message to determine the duration if the pedal is pressed
                 if self.last_pedal_message is None:  # FIXME
                     if message['value'] != 0:
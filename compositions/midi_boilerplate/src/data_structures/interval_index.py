@@ -0,0 +1,138 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.type_aliases import TimeType
+
+
+class _Node:
+    """
+    A node of the centered interval tree.
+    self.center: The center of the node.
+    self.by_onset: The (onset, position) of the notes containing the center, sorted by onset.
+    self.by_offset: The (offset, position) of the notes containing the center, sorted by decreasing offset.
+    self.left: The node of the notes ending before the center.
+    self.right: The node of the notes starting after the center.
+    """
+    __slots__ = ('center', 'by_onset', 'by_offset', 'left', 'right')
+
+    def __init__(self, center: TimeType, by_onset: list, by_offset: list, left: '_Node', right: '_Node'):
+        self.center = center
+        self.by_onset = by_onset
+        self.by_offset = by_offset
+        self.left = left
+        self.right = right
+
+
+class IntervalIndex:
+    """
+    A static index over the [onset, offset] intervals of a sequence of notes.
+    It combines the onsets sorted in a list (for range queries with bisect) and a centered interval tree
+    (for stabbing queries). Both answer in O(log n + k), k being the number of notes returned.
+    The queries return the positions of the notes in the indexed sequence, in increasing order (sorting the positions
+    adds O(k log k)).
+    The index does not follow the changes of the sequence, it must be rebuilt when the notes change.
+    """
+
+    def __init__(self, notes: Sequence[Note], generation: int = 0):
+        """
+        Builds the index. Complexity: O(n log n)
+        :param notes: The notes to index.
+        :param generation: The version of the note list of the notes, to check that the index is up to date.
+        """
+        self.generation = generation
+        # Notes with a negative duration never sound, they are indexed as zero-length intervals.
+        intervals = sorted(((n.time, max(n.time, n.offset), i) for i, n in enumerate(notes)), key=lambda x: x[0])
+        self._onsets = [x[0] for x in intervals]
+        self._positions = [x[2] for x in intervals]
+        self._root = self._build(intervals)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _build(self, intervals: list[tuple]) -> _Node | None:
+        """
+        Recursively builds the centered interval tree. The center of a node is the median onset, so the depth of the
+        tree is O(log n).
+        :param intervals: The (onset, offset, position) of the notes, sorted by onset.
+        :return: The root node.
+        """
+        if not intervals:
+            return None
+        center = intervals[len(intervals) // 2][0]
+        left, middle, right = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                middle.append(interval)
+        by_offset = sorted(((x[1], x[2]) for x in middle), key=lambda x: x[0], reverse=True)
+        return _Node(center, [(x[0], x[2]) for x in middle], by_offset, self._build(left), self._build(right))
+
+    def stab(self, time: TimeType, include_offset: bool = False) -> list[int]:
+        """
+        Returns the positions of the notes sounding at a given time (onset <= time < offset).
+        :param time: The time to check.
+        :param include_offset: If True, the notes ending exactly at time are included (onset <= time <= offset).
+        :return: The sorted positions of the notes.
+        """
+        result = []
+        node = self._root
+        while node is not None:
+            if time < node.center:
+                # All the notes of the node end after time.
+                for onset, position in node.by_onset:
+                    if onset > time:
+                        break
+                    result.append(position)
+                node = node.left
+            else:
+                # All the notes of the node start before time.
+                for offset, position in node.by_offset:
+                    if offset < time or (offset == time and not include_offset):
+                        break
+                    result.append(position)
+                node = node.right if time > node.center else None
+        result.sort()
+        return result
+
+    def onset_range(self, start: TimeType, end: TimeType) -> list[int]:
+        """
+        Returns the positions of the notes starting inside [start, end].
+        :param start: The start of the range.
+        :param end: The end of the range.
+        :return: The sorted positions of the notes.
+        """
+        return sorted(self._positions[bisect_left(self._onsets, start):bisect_right(self._onsets, end)])
+
+    def before(self, time: TimeType) -> list[int]:
+        """
+        Returns the positions of the notes starting strictly before time.
+        """
+        return sorted(self._positions[:bisect_left(self._onsets, time)])
+
+    def after(self, time: TimeType) -> list[int]:
+        """
+        Returns the positions of the notes starting strictly after time.
+        """
+        return sorted(self._positions[bisect_right(self._onsets, time):])
+
+    def slice(self, start: TimeType, end: TimeType) -> list[int]:
+        """
+        Returns the positions of the notes in the slice [start, end], with the boundaries of NoteList.create_slice:
+        the notes starting inside the slice and the notes held at its start.
+        """
+        return sorted(set(self.onset_range(start, end)).union(self.stab(start, include_offset=True)))
@@ -0,0 +1,187 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+"""
+from typing import Callable, Iterator
+
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.data_structures.type_aliases import TimeType
+
+# Kinds of steps. The time predicates can be answered by the interval index of the source.
+FILTER = 'filter'
+MAP = 'map'
+TRANSPOSE = 'transpose'
+SHIFT = 'shift'
+BEFORE = 'before'
+AFTER = 'after'
+SLICE = 'slice'
+SIMULTANEOUS = 'simultaneous'
+TIME_PREDICATES = (BEFORE, AFTER, SLICE, SIMULTANEOUS)
+# Steps that do not modify the notes (a time predicate can be moved before them). The other steps modify the notes of
+# the source in place, so moving a predicate before them would change which source notes are modified.
+PURE_STEPS = (FILTER,) + TIME_PREDICATES
+
+
+class LazyNoteList:
+    """
+    A lazy chain of operations on a NoteList, e.g. nl.lazy().filter(f).transpose(3).shift(1.0).collect()
+    Nothing is computed until the chain is iterated or collected, then all the steps are applied to each note in a
+    single pass, without intermediate NoteList.
+    As with the NoteList methods, transpose, shift and map modify the notes of the source in place.
+    A time predicate (before_time, after_time, create_slice, get_simultaneous_notes) that is only preceded by filters
+    and time predicates is answered by the interval index of the source, if it has one.
+    """
+
+    def __init__(self, source: NoteList, steps: tuple = ()):
+        """
+        :param source: The note list to read the notes from.
+        :param steps: The (kind, argument) steps to apply, in order.
+        """
+        self._source = source
+        self._steps = steps
+
+    def _then(self, kind: str, argument) -> 'LazyNoteList':
+        """
+        Returns a new LazyNoteList with an additional step.
+        """
+        return LazyNoteList(self._source, self._steps + ((kind, argument),))
+
+    def filter(self, f: Callable[[Note], bool]) -> 'LazyNoteList':
+        """
+        Keeps the notes for which f returns True.
+        :raises TypeError: If the function is not callable.
+        """
+        if not callable(f):
+            raise TypeError("The function must be callable.")
+        return self._then(FILTER, f)
+
+    def map(self, f: Callable) -> 'LazyNoteList':
+        """
+        Applies f to the notes. If f returns a Note, it replaces the note in the result.
+        :raises TypeError: If the function is not callable.
+        """
+        if not callable(f):
+            raise TypeError("The function must be callable.")
+        return self._then(MAP, f)
+
+    def transpose(self, interval: int) -> 'LazyNoteList':
+        """
+        Transposes the notes by a given interval.
+        """
+        if interval == 0:
+            return self
+        return self._then(TRANSPOSE, interval)
+
+    def shift(self, shift: float) -> 'LazyNoteList':
+        """
+        Shifts the time of the notes (see Note.shift_time).
+        Unlike NoteList.shift_time, the erroneous notes are not filtered out in SAFE_MODE.
+        """
+        return self._then(SHIFT, shift)
+
+    def shift_time(self, shift: float) -> 'LazyNoteList':
+        """
+        Alias of shift, named as NoteList.shift_time.
+        """
+        return self.shift(shift)
+
+    def before_time(self, timestamp: TimeType) -> 'LazyNoteList':
+        """
+        Keeps the notes starting before the timestamp.
+        """
+        return self._then(BEFORE, timestamp)
+
+    def after_time(self, timestamp: TimeType) -> 'LazyNoteList':
+        """
+        Keeps the notes starting after the timestamp.
+        """
+        return self._then(AFTER, timestamp)
+
+    def create_slice(self, start: TimeType, end: TimeType) -> 'LazyNoteList':
+        """
+        Keeps the notes of the slice [start, end], with the boundaries of NoteList.create_slice.
+        """
+        return self._then(SLICE, (start, end))
+
+    def get_simultaneous_notes(self, time: TimeType) -> 'LazyNoteList':
+        """
+        Keeps the notes playing at the given time.
+        """
+        return self._then(SIMULTANEOUS, time)
+
+    def _plan(self) -> tuple[list[Note], list[tuple]]:
+        """
+        Pushes down the first time predicate to the interval index of the source, if possible.
+        :return: The notes to go through and the steps to apply to each of them.
+        """
+        steps = list(self._steps)
+        if self._source.has_interval_index():
+            for i, (kind, argument) in enumerate(steps):
+                if kind not in PURE_STEPS:
+                    break
+                if kind in TIME_PREDICATES:
+                    del steps[i]
+                    return _query_source(self._source, kind, argument), steps
+        return self._source, steps
+
+    def __iter__(self) -> Iterator[Note]:
+        notes, steps = self._plan()
+        steps = [(FILTER, _time_predicate(kind, argument)) if kind in TIME_PREDICATES else (kind, argument)
+                 for kind, argument in steps]
+        for note in notes:
+            for kind, argument in steps:
+                if kind == FILTER:
+                    if not argument(note):
+                        break
+                elif kind == TRANSPOSE:
+                    note.transpose(argument)
+                elif kind == SHIFT:
+                    note.shift_time(argument)
+                else:
+                    result = argument(note)
+                    if isinstance(result, Note):
+                        note = result
+            else:
+                yield note
+
+    def collect(self) -> NoteList:
+        """
+        Runs the chain.
+        :return: A new NoteList containing the resulting notes, in the order of the source.
+        """
+        return NoteList(list(self))
+
+
+def _query_source(source: NoteList, kind: str, argument) -> NoteList:
+    """
+    Answers a time predicate with the NoteList method using the interval index.
+    """
+    if kind == BEFORE:
+        return source.before_time(argument)
+    if kind == AFTER:
+        return source.after_time(argument)
+    if kind == SLICE:
+        return source.create_slice(*argument)
+    return source.get_simultaneous_notes(argument)
+
+
+def _time_predicate(kind: str, argument) -> Callable[[Note], bool]:
+    """
+    Returns the function checking a time predicate on a single note.
+    """
+    if kind == BEFORE:
+        return lambda n: n.time < argument
+    if kind == AFTER:
+        return lambda n: n.time > argument
+    if kind == SLICE:
+        start, end = argument
+        return lambda n: start <= n.time <= end or n.time <= start <= n.offset
+    return lambda n: n.time <= argument < n.offset
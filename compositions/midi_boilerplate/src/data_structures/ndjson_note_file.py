@@ -0,0 +1,100 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+
+    Line-delimited JSON (NDJSON) note files: a header line, then one note per line (Note.to_json).
+    The header tells if the notes are sorted by onset, in which case time-windowed reads stop at the end of the window.
+"""
+import json
+from typing import Iterable, Iterator
+
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.data_structures.type_aliases import TimeType
+
+NDJSON_FORMAT = 'midit-notes-ndjson'
+NDJSON_VERSION = 1
+
+
+def save_as_ndjson(notes: Iterable[Note], path: str, sort: bool = False) -> None:
+    """
+    Saves notes to an NDJSON note file. The notes are written one by one, an iterator of notes is never materialized
+    unless it has to be sorted.
+    :param notes: The notes to save (a NoteList or any iterable of notes).
+    :param path: The path of the file.
+    :param sort: If True, the notes are sorted by onset before being written.
+    :return: None
+    """
+    if sort:
+        notes = sorted(notes, key=lambda n: n.time)
+        is_sorted = True
+    elif isinstance(notes, list):
+        is_sorted = all(notes[i].time <= notes[i + 1].time for i in range(len(notes) - 1))
+    else:
+        is_sorted = False
+    with open(path, 'w') as f:
+        f.write(json.dumps({'format': NDJSON_FORMAT, 'version': NDJSON_VERSION, 'sorted': is_sorted}) + '\n')
+        for note in notes:
+            f.write(note.to_json() + '\n')
+
+
+def iter_ndjson(path: str, start: TimeType = None, end: TimeType = None) -> Iterator[Note]:
+    """
+    Reads the notes of an NDJSON note file one by one, in constant memory.
+    Files without header (one note per line) are also read, they are considered as unsorted.
+    :param path: The path of the file.
+    :param start: If given, only the notes starting at or after start are read.
+    :param end: If given, only the notes starting before end are read. If the file is sorted, the reading stops at the
+        first note starting at or after end.
+    :return: An iterator of notes.
+    :raises ValueError: If the file has an unsupported version.
+    """
+    with open(path, 'r') as f:
+        is_sorted = False
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if data.get('format') == NDJSON_FORMAT:
+                if data['version'] != NDJSON_VERSION:
+                    raise ValueError(f"Unsupported NDJSON note file version {data['version']}.")
+                is_sorted = data['sorted']
+                continue
+            time = float(data['time'])
+            if end is not None and time >= end:
+                if is_sorted:
+                    return
+                continue
+            if start is not None and time < start:
+                continue
+            yield Note.from_json(data)
+
+
+def iter_ndjson_chunks(path: str, chunk_size: int, start: TimeType = None,
+                       end: TimeType = None) -> Iterator[NoteList]:
+    """
+    Reads the notes of an NDJSON note file by chunks, keeping at most one chunk in memory.
+    :param path: The path of the file.
+    :param chunk_size: The maximum number of notes of a chunk.
+    :param start: See iter_ndjson.
+    :param end: See iter_ndjson.
+    :return: An iterator of NoteList of at most chunk_size notes.
+    :raises ValueError: If the chunk size is not positive.
+    """
+    if chunk_size <= 0:
+        raise ValueError("The chunk size must be positive.")
+    chunk = NoteList()
+    for note in iter_ndjson(path, start, end):
+        chunk.append(note)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = NoteList()
+    if chunk:
+        yield chunk
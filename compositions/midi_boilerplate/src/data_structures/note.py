@@ -10,12 +10,17 @@
     Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
 """
 import json
+import weakref
 from numbers import Number
 
 from compositions.midi_boilerplate.src.data_structures.type_aliases import TimeType
 
 
 class Note:
+    # No per-instance __dict__: a Note only holds its 5 attributes, its custom data (allocated on first use) and its
+    # owners.
+    __slots__ = ('_pitch', '_time', '_duration', '_velocity', '_channel', '_custom', '_owners')
+
     def __init__(self, pitch: int = None, time: TimeType = None, duration: TimeType = None, velocity: int = None,
                  channel: int = 0, midi_onset_msg: dict = None, midi_offset_msg: dict = None, custom: dict = None):
         """
@@ -28,7 +33,7 @@ class Note:
         :param channel: the channel of the note
         :param midi_onset_msg: the MIDI onset message as a dict
         :param midi_offset_msg: the MIDI offset message as a dict
-        :param custom: a dictionary of custom data
+        :param custom: a dictionary of custom data (allocated on first access if None)
         """
         if midi_onset_msg is not None and midi_offset_msg is not None and isinstance(midi_onset_msg, dict) and \
                 isinstance(midi_offset_msg, dict):
@@ -53,7 +58,53 @@ class Note:
         else:
             raise ValueError("Note must be initialized with either MIDI messages or pitch, time, duration, velocity "
                              "and channel.")
-        self._custom = custom if custom is not None else {}
+        self._custom = custom
+        # Weak reference (or list of weak references) to the note lists following the changes of the note, whose
+        # _version is incremented each time the pitch or the timing of the note changes (see NoteList._follow_notes).
+        self._owners = None
+
+    def __getstate__(self) -> dict:
+        # The owners are not copied nor pickled: a copy of a note does not belong to the lists of the note.
+        return {slot: getattr(self, slot) for slot in Note.__slots__ if slot != '_owners'}
+
+    def __setstate__(self, state: dict) -> None:
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self._owners = None
+
+    def _add_owner(self, owner: weakref.ref) -> None:
+        """
+        Makes the note report its changes to a note list. The owners that were deleted are forgotten.
+        :param owner: A weak reference to the note list.
+        :return: None
+        """
+        owners = self._owners
+        if owners is None or owners is owner:
+            self._owners = owner
+        elif type(owners) is list:
+            if not any(o is owner for o in owners):
+                owners[:] = [o for o in owners if o() is not None]
+                owners.append(owner)
+        elif owners() is None:
+            self._owners = owner
+        else:
+            self._owners = [owners, owner]
+
+    def _report_change(self) -> None:
+        """
+        Increments the version of the note lists owning the note.
+        :return: None
+        """
+        owners = self._owners
+        if type(owners) is list:
+            for owner in owners:
+                note_list = owner()
+                if note_list is not None:
+                    note_list._version += 1
+        else:
+            note_list = owners()
+            if note_list is not None:
+                note_list._version += 1
 
     @property
     def onset_message(self) -> dict:
@@ -113,8 +164,16 @@ class Note:
 
     @property
     def custom(self) -> dict:
+        if self._custom is None:
+            self._custom = {}
         return self._custom
 
+    def has_custom(self) -> bool:
+        """
+        Returns whether the note has custom data, without allocating it.
+        """
+        return bool(self._custom)
+
     @property
     def pc(self) -> int:
         return self.get_pitch_class()
@@ -125,6 +184,8 @@ class Note:
             value = int(value)
         if 0 <= value <= 127:
             self._pitch = value
+            if self._owners is not None:
+                self._report_change()
 
     @time.setter
     def time(self, value):
@@ -137,6 +198,8 @@ class Note:
             else:
                 value = 0
         self._time = value
+        if self._owners is not None:
+            self._report_change()
 
     @duration.setter
     def duration(self, value):
@@ -146,6 +209,8 @@ class Note:
             self._duration = value
         else:
             self._duration = 0.1  # 1ms duration as a fallback for non-positive parameter values.
+        if self._owners is not None:
+            self._report_change()
 
     @property
     def offset(self) -> TimeType:
@@ -192,17 +257,17 @@ class Note:
     def __eq__(self, other) -> bool:
         if not isinstance(other, Note):
             return False
-        if self.description == other.description:
-            return True
-        elif self.pitch == other.pitch and self.duration == other.duration and \
-                self.velocity == other.velocity and self.channel == other.channel:
-            return abs(self.time - other.time) < 0.0001
+        if self._pitch != other._pitch or self._duration != other._duration or \
+                self._velocity != other._velocity or self._channel != other._channel:
+            return False
+        return self._time == other._time or abs(self._time - other._time) < 0.0001
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return hash((self._pitch, self._time, self._duration, self._velocity, self._channel))
 
     def __copy__(self) -> 'Note':
-        return Note(self.pitch, self.time, self.duration, self.velocity, self.channel)
+        return Note(self._pitch, self._time, self._duration, self._velocity, self._channel,
+                    custom=dict(self._custom) if self._custom else None)
 
     def get_pitch_class(self) -> int:
         """
@@ -269,7 +334,7 @@ class Note:
         Return Note as a dictionary
         :return: the Note as a dictionary
         """
-        if self.custom is not None and self.custom != {}:
+        if self._custom:
             return {'pitch': self.pitch, 'time': self.time,
                     'duration': self.duration, 'velocity': self.velocity,
                     'channel': self.channel, 'custom': self.custom}
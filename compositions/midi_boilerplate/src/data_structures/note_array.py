@@ -0,0 +1,450 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+"""
+from math import ceil
+from typing import Callable, Iterable, Iterator, SupportsIndex, Union
+
+import numpy as np
+
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList, MAX_MIDI_PITCH, \
+    MIN_MIDI_PITCH, MAX_MIDI_VALUE
+from compositions.midi_boilerplate.src.data_structures.type_aliases import TimeType
+
+PITCH_DTYPE = np.uint8
+TIME_DTYPE = np.float64
+DURATION_DTYPE = np.float64
+VELOCITY_DTYPE = np.uint8
+CHANNEL_DTYPE = np.uint8
+
+
+class NoteArray:
+    """
+    A struct-of-arrays container of notes.
+    The notes are stored in 5 parallel numpy arrays (pitches, times, durations, velocities and channels), so that
+    the bulk operations of NoteList (transpose, shift_time, transform, compress_velocity, ...) run as vectorized
+    operations instead of a Python loop over Note objects.
+    The methods follow the NoteList API and semantics (same clamping rules as the Note setters).
+    Times are stored as float64, Fraction times are converted to floats.
+    Custom data is kept in a sparse side table {index: custom dict}.
+
+    NoteArray is a companion of NoteList, not a backend of it: it is not a list of Note objects and NoteList does not
+    switch to it. Convert with from_note_list / to_note_list (the binary note files and the fast MIDI file parser
+    produce NoteArray directly). It covers the construction, bulk, query and json methods of NoteList, with these
+    limits:
+    - indexing returns detached copies: modifying a Note read from a NoteArray does not modify the array (map
+      writes its result back);
+    - there is no positional mutation (insert, remove, pop, __setitem__, __delitem__) and no interval index,
+      snapshot or lazy view;
+    - append and extend copy the columns: building an array note by note is quadratic, build a list of notes and
+      use from_notes instead.
+    """
+
+    def __init__(self, pitch=None, time=None, duration=None, velocity=None, channel=None,
+                 custom: dict[int, dict] = None):
+        """
+        Initializes a NoteArray from parallel columns. Columns that are already numpy arrays of the right dtype are
+        used without copy (for example, views on a memory-mapped file).
+        :param pitch: the pitches of the notes
+        :param time: the onsets of the notes
+        :param duration: the durations of the notes
+        :param velocity: the velocities of the notes
+        :param channel: the channels of the notes (default is 0 for all the notes)
+        :param custom: a sparse dictionary {index: custom data} of the notes having custom data
+        """
+        self.pitches = np.asarray(pitch if pitch is not None else [], dtype=PITCH_DTYPE)
+        self.times = np.asarray(time if time is not None else [], dtype=TIME_DTYPE)
+        self.durations = np.asarray(duration if duration is not None else [], dtype=DURATION_DTYPE)
+        self.velocities = np.asarray(velocity if velocity is not None else [], dtype=VELOCITY_DTYPE)
+        if channel is None:
+            channel = np.zeros(len(self.pitches), dtype=CHANNEL_DTYPE)
+        self.channels = np.asarray(channel, dtype=CHANNEL_DTYPE)
+        if not (len(self.pitches) == len(self.times) == len(self.durations) == len(self.velocities)
+                == len(self.channels)):
+            raise ValueError("All the columns of a NoteArray must have the same length.")
+        self.custom = custom if custom is not None else {}
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[Note]) -> 'NoteArray':
+        """
+        Creates a NoteArray from Note objects.
+        :param notes: An iterable of Note objects (a NoteList for example).
+        :return: A new NoteArray.
+        """
+        notes = list(notes)
+        custom = {i: n.custom for i, n in enumerate(notes) if n.has_custom()}
+        return cls([n.pitch for n in notes], [n.time for n in notes], [n.duration for n in notes],
+                   [n.velocity for n in notes], [n.channel for n in notes], custom)
+
+    @classmethod
+    def from_note_list(cls, note_list: NoteList) -> 'NoteArray':
+        """
+        Creates a NoteArray from a NoteList.
+        :param note_list: The note list to convert.
+        :return: A new NoteArray.
+        """
+        return cls.from_notes(note_list)
+
+    def to_notes(self) -> list[Note]:
+        """
+        Converts the NoteArray to a list of Note objects.
+        :return: A list of Note objects.
+        """
+        return [Note(p, t, d, v, c, custom=self.custom.get(i)) for i, (p, t, d, v, c) in
+                enumerate(zip(self.pitches.tolist(), self.times.tolist(), self.durations.tolist(),
+                              self.velocities.tolist(), self.channels.tolist()))]
+
+    def to_note_list(self) -> NoteList:
+        """
+        Converts the NoteArray to a NoteList.
+        :return: A new NoteList.
+        """
+        return NoteList(self.to_notes())
+
+    def __len__(self) -> int:
+        return len(self.pitches)
+
+    def __iter__(self) -> Iterator[Note]:
+        return iter(self.to_notes())
+
+    def __getitem__(self, key: SupportsIndex | slice | np.ndarray) -> Union[Note, 'NoteArray']:
+        """
+        Returns a (detached) Note for an integer index, a NoteArray otherwise.
+        Modifying the returned Note does not modify the NoteArray.
+        """
+        if isinstance(key, (int, np.integer)):
+            i = range(len(self))[key]
+            return Note(int(self.pitches[i]), float(self.times[i]), float(self.durations[i]),
+                        int(self.velocities[i]), int(self.channels[i]), custom=self.custom.get(i))
+        return self._take(np.arange(len(self))[key])
+
+    def __str__(self) -> str:
+        return str(self.to_note_list())
+
+    def __repr__(self) -> str:
+        return f'NoteArray({len(self)} notes)'
+
+    def _take(self, indices: np.ndarray) -> 'NoteArray':
+        """
+        Returns a new NoteArray containing the notes at the given indices.
+        :param indices: An integer array of indices.
+        :return: A new NoteArray.
+        """
+        custom = {}
+        if self.custom:
+            custom = {new: self.custom[old] for new, old in enumerate(indices.tolist()) if old in self.custom}
+        return NoteArray(self.pitches[indices], self.times[indices], self.durations[indices],
+                         self.velocities[indices], self.channels[indices], custom)
+
+    def copy(self) -> 'NoteArray':
+        """
+        Returns a copy of the note array.
+        """
+        return NoteArray(self.pitches.copy(), self.times.copy(), self.durations.copy(), self.velocities.copy(),
+                         self.channels.copy(), {i: dict(c) for i, c in self.custom.items()})
+
+    def _set_columns(self, other: 'NoteArray') -> None:
+        """
+        Replaces the columns and the custom data by those of another NoteArray.
+        """
+        self.pitches, self.times, self.durations = other.pitches, other.times, other.durations
+        self.velocities, self.channels = other.velocities, other.channels
+        self.custom = other.custom
+
+    def append(self, new_note: Note) -> None:
+        """
+        Appends a note (copies the columns, see extend).
+        :param new_note: The note to append.
+        :return: None
+        """
+        self.extend(NoteArray.from_notes((new_note,)))
+
+    def extend(self, new_notes: Union['NoteArray', NoteList, list[Note]]) -> None:
+        """
+        Appends notes at the end of the note array. The columns are copied once per call.
+        :param new_notes: A NoteArray, a NoteList or a list of Note objects.
+        :return: None
+        :raises TypeError: If the notes are not Note objects.
+        """
+        if not isinstance(new_notes, NoteArray):
+            if not all(isinstance(n, Note) for n in new_notes):
+                raise TypeError("Can only extend by a NoteArray, a NoteList or a list of Note objects.")
+            new_notes = NoteArray.from_notes(new_notes)
+        offset = len(self)
+        custom = dict(self.custom)
+        custom.update({offset + i: c for i, c in new_notes.custom.items()})
+        self._set_columns(NoteArray(np.concatenate((self.pitches, new_notes.pitches)),
+                                    np.concatenate((self.times, new_notes.times)),
+                                    np.concatenate((self.durations, new_notes.durations)),
+                                    np.concatenate((self.velocities, new_notes.velocities)),
+                                    np.concatenate((self.channels, new_notes.channels)), custom))
+
+    def is_empty(self) -> bool:
+        """
+        Returns whether the note array is empty or not.
+        """
+        return len(self) == 0
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """
+        Returns the offsets (time + duration) of the notes.
+        """
+        return self.times + self.durations
+
+    def sort(self) -> 'NoteArray':
+        """
+        Sorts the notes by onset (stable sort). In place operation.
+        :return: The sorted note array.
+        """
+        self._set_columns(self._take(np.argsort(self.times, kind='stable')))
+        return self
+
+    def get_pitches(self) -> list[int]:
+        """
+        Returns the pitches of the note array.
+        """
+        return self.pitches.tolist()
+
+    def get_pitch_class_set(self) -> set[int]:
+        """
+        Returns the pitch classes of the note array.
+        """
+        return set(np.unique(self.pitches % 12).tolist())
+
+    def get_ambitus_values(self) -> tuple:
+        """
+        Returns the ambitus of the note array.
+        :return: A tuple containing the lowest and highest pitches.
+        """
+        if len(self) == 0:
+            return 0, 0
+        return int(self.pitches.min()), int(self.pitches.max())
+
+    def get_start_time(self) -> float:
+        """
+        Get the minimum time of the note array.
+        return 0 if the note array is empty
+        """
+        if len(self) == 0:
+            return 0
+        return float(self.times.min())
+
+    def get_end_time(self) -> float:
+        """
+        Get the last timestamp (time+duration) of the note array.
+        return 0 if the note array is empty
+        """
+        if len(self) == 0:
+            return 0
+        return float(self.offsets.max())
+
+    def duration(self) -> float:
+        """
+        Returns the duration of the note array (end time - start time).
+        """
+        if len(self) == 0:
+            return 0
+        return self.get_end_time() - self.get_start_time()
+
+    def density(self) -> float:
+        """
+        Returns the density of the note array (number of notes / duration).
+        if the duration is 0, the density is 0
+        """
+        duration = self.duration()
+        if duration == 0:
+            return 0
+        return len(self) / duration
+
+    def before_time(self, timestamp: TimeType) -> 'NoteArray':
+        """
+        Returns the notes that are before the given timestamp in a new NoteArray.
+        """
+        return self._take(np.flatnonzero(self.times < timestamp))
+
+    def after_time(self, timestamp: TimeType) -> 'NoteArray':
+        """
+        Returns the notes that are after the given timestamp in a new NoteArray.
+        """
+        return self._take(np.flatnonzero(self.times > timestamp))
+
+    def get_simultaneous_notes(self, time: TimeType) -> 'NoteArray':
+        """
+        Get the notes that are playing at a given time.
+        """
+        return self._take(np.flatnonzero((self.times <= time) & (time < self.offsets)))
+
+    def create_slice(self, start: TimeType, end: TimeType) -> 'NoteArray':
+        """
+        Create a slice of the note array, with the same boundaries as NoteList.create_slice.
+        """
+        mask = ((start <= self.times) & (self.times <= end)) | ((self.times <= start) & (start <= self.offsets))
+        return self._take(np.flatnonzero(mask))
+
+    def get_salami(self, slice_size: int | float) -> list['NoteArray']:
+        """
+        Get a list of slices of the note array, as NoteList.get_salami.
+        The slice i is create_slice(i * slice_size, (i + 1) * slice_size).
+        :param slice_size: The size of the slices.
+        :return: A list of NoteArray.
+        """
+        return [self.create_slice(i * slice_size, (i + 1) * slice_size)
+                for i in range(ceil(self.duration() / slice_size))]
+
+    def filter(self, f: Callable[[Note], bool] | np.ndarray) -> 'NoteArray':
+        """
+        Filter the notes in the note array.
+        :param f: The function to filter by, or a boolean mask over the notes (e.g. array.velocities > 60), which
+            is not evaluated note by note.
+        :return: A new NoteArray containing the filtered notes.
+        :raises TypeError: If f is neither callable nor a boolean mask.
+        """
+        if isinstance(f, np.ndarray):
+            if f.dtype != bool or f.shape != (len(self),):
+                raise TypeError("The mask must be a boolean array with one value per note.")
+            return self._take(np.flatnonzero(f))
+        if not callable(f):
+            raise TypeError("The function must be callable.")
+        return self._take(np.array([i for i, n in enumerate(self.to_notes()) if f(n)], dtype=np.intp))
+
+    def map(self, f: Callable) -> 'NoteArray':
+        """
+        Apply a function to all notes in the note array, as NoteList.map: if f returns a Note, it replaces the note,
+        otherwise the note modified by f (if any) is kept. The notes are then written back to the columns.
+        :param f: The function to apply.
+        :return: The note array with the function applied.
+        :raises TypeError: If the function is not callable.
+        """
+        if len(self) == 0:
+            return self
+        if not callable(f):
+            raise TypeError("The function must be callable.")
+        notes = self.to_notes()
+        for i, note in enumerate(notes):
+            result = f(note)
+            if isinstance(result, Note):
+                notes[i] = result
+        self._set_columns(NoteArray.from_notes(notes))
+        return self
+
+    def transpose(self, interval: int) -> None:
+        """
+        Transpose all the notes by a given interval.
+        As with Note.pitch, notes that would go out of the MIDI range keep their pitch.
+        :param interval: The interval to transpose by.
+        :return: None
+        """
+        if interval == 0:
+            return
+        new_pitch = self.pitches.astype(np.int16) + int(interval)
+        in_range = (new_pitch >= MIN_MIDI_PITCH) & (new_pitch <= MAX_MIDI_PITCH)
+        self.pitches[in_range] = new_pitch[in_range]
+
+    def shift_time(self, shift: float) -> None:
+        """
+        Shift the time of all notes. Negative times are set to 0 (as in Note.shift_time).
+        :param shift: The time to shift by.
+        :return: None
+        """
+        new_time = self.times + shift
+        new_time[new_time < 0] = 0.
+        self.times[:] = new_time
+
+    def set_beginning(self, time: float) -> None:
+        """
+        Set the time of the start of the note array to a given time.
+        """
+        if len(self) == 0:
+            return
+        self.shift_time(time - self.get_start_time())
+
+    def set_beginning_to_zero(self) -> None:
+        """
+        Set the time of the start of the note array to zero.
+        """
+        self.set_beginning(0)
+
+    def _set_velocity(self, new_velocity: np.ndarray) -> None:
+        """
+        Sets the velocities, with the same validation as Note.velocity (checked before modifying anything).
+        :param new_velocity: The new velocities as floats or integers.
+        :raises ValueError: If a velocity is out of the MIDI range.
+        """
+        new_velocity = np.trunc(new_velocity)
+        if np.any((new_velocity < 0) | (new_velocity > MAX_MIDI_VALUE)):
+            raise ValueError("Note velocity must be an integer between 0 and 127.")
+        self.velocities[:] = new_velocity
+
+    def transform(self, interval: int = 0, speed_factor: float = 1, velocity_factor: float = 1) -> None:
+        """
+        Transforms the note array, as NoteList.transform.
+        :param interval: The interval to transpose by.
+        :param speed_factor: The speed factor.
+        :param velocity_factor: The velocity factor.
+        :return: None
+        :raises ValueError: If a resulting velocity is out of the MIDI range (nothing is modified in this case).
+        """
+        if len(self) == 0:
+            return
+        if speed_factor == 1 and velocity_factor == 1:
+            self.transpose(interval)
+            return
+        new_velocity = self.velocities * velocity_factor
+        if np.any((np.trunc(new_velocity) < 0) | (np.trunc(new_velocity) > MAX_MIDI_VALUE)):
+            raise ValueError("Note velocity must be an integer between 0 and 127.")
+        start = self.get_start_time()
+        self.set_beginning_to_zero()
+        self.transpose(interval)
+        new_time = self.times * speed_factor
+        new_time[new_time < 0] = 0.
+        self.times[:] = new_time
+        new_duration = self.durations * speed_factor
+        new_duration[new_duration <= 0] = 0.1  # Same fallback as the Note.duration setter.
+        self.durations[:] = new_duration
+        self._set_velocity(new_velocity)
+        self.set_beginning(start)
+
+    def compress_velocity(self, maximum: int, minimum: int = 0) -> None:
+        """
+        Compress the velocity of the notes inside a given range.
+        In place operation.
+        :param maximum: The maximum velocity.
+        :param minimum: The minimum velocity (default is 0).
+        :return: None
+        """
+        velocity_constant = (maximum - minimum) / MAX_MIDI_VALUE
+        self._set_velocity(np.trunc(self.velocities * velocity_constant) + minimum)
+
+    def to_json(self) -> str:
+        """
+        Convert the note array to a json string, in the format of NoteList.to_json.
+        :return: A json string.
+        """
+        return self.to_note_list().to_json()
+
+    def save_as_json(self, path: str) -> None:
+        """
+        Save the note array to a file as json
+        :param path: The path to save the note array to.
+        :return: None
+        """
+        with open(path, 'w') as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def from_json(cls, json_data: str) -> 'NoteArray':
+        """
+        Create a note array from a json string (see NoteList.from_json).
+        :param json_data: The json string
+        :return a NoteArray object
+        """
+        return cls.from_note_list(NoteList.from_json(json_data))
@@ -9,11 +9,13 @@
 
 import copy
 import json
+import weakref
 from math import ceil
-from typing import Union, SupportsIndex, Callable, Tuple
+from typing import Union, SupportsIndex, Callable, Tuple, Iterator, Iterable
 
 from tabulate import tabulate
 
+from compositions.midi_boilerplate.src.data_structures.interval_index import IntervalIndex
 from compositions.midi_boilerplate.src.data_structures.note import Note
 from compositions.midi_boilerplate.src.data_structures.type_aliases import TimeType
 
@@ -37,10 +39,221 @@ colors_map = {  # Use ANSI escape codes for colors
 }
 
 
+class NoteListAggregates:
+    """
+    Aggregates of the notes of a NoteList, maintained incrementally.
+    self.start_time: The minimum onset (None if there is no note).
+    self.end_time: The maximum offset (None if there is no note).
+    self.min_pitch: The lowest pitch (None if there is no note).
+    self.max_pitch: The highest pitch (None if there is no note).
+    self.pitch_class_counts: The number of notes of each pitch class.
+    self.generation: The version of the note list for which the aggregates are valid.
+    """
+    __slots__ = ('start_time', 'end_time', 'min_pitch', 'max_pitch', 'pitch_class_counts', 'generation')
+
+    def __init__(self, notes: Iterable[Note], generation: int = 0):
+        """
+        Computes the aggregates of notes in a single pass.
+        :param notes: The notes.
+        :param generation: The version of the note list of the notes.
+        """
+        self.start_time = self.end_time = self.min_pitch = self.max_pitch = None
+        self.pitch_class_counts = [0] * 12
+        self.generation = generation
+        for note in notes:
+            self.add(note)
+
+    def add(self, note: Note) -> None:
+        """
+        Updates the aggregates with an added note. O(1)
+        :param note: The added note.
+        :return: None
+        """
+        time, offset, pitch = note.time, note.offset, note.pitch
+        if self.start_time is None:
+            self.start_time, self.end_time, self.min_pitch, self.max_pitch = time, offset, pitch, pitch
+        else:
+            if time < self.start_time:
+                self.start_time = time
+            if offset > self.end_time:
+                self.end_time = offset
+            if pitch < self.min_pitch:
+                self.min_pitch = pitch
+            elif pitch > self.max_pitch:
+                self.max_pitch = pitch
+        self.pitch_class_counts[pitch % 12] += 1
+
+    def remove(self, note: Note) -> bool:
+        """
+        Updates the aggregates with a removed note. O(1)
+        :param note: The removed note.
+        :return: False if the aggregates can't be updated (the note was an extremum) and must be recomputed.
+        """
+        if note.time == self.start_time or note.offset == self.end_time or note.pitch == self.min_pitch or \
+                note.pitch == self.max_pitch:
+            return False
+        self.pitch_class_counts[note.pitch % 12] -= 1
+        return True
+
+    def transpose(self, interval: int) -> None:
+        """
+        Updates the aggregates after all the notes were transposed by interval (none of them out of the MIDI range).
+        :param interval: The interval.
+        :return: None
+        """
+        if self.start_time is None:
+            return
+        self.min_pitch += interval
+        self.max_pitch += interval
+        shift = interval % 12
+        self.pitch_class_counts = self.pitch_class_counts[-shift:] + self.pitch_class_counts[:-shift]
+
+
 class NoteList(list[Note]):
+    # Cached data, invalidated by _changed(). Defined at class level as pickle appends the notes before setting the
+    # attributes of the instance.
+    _interval_index = None
+    _unindexed_queries = 0
+    _aggregates = None
+    # The note lists sharing their Note objects with this one (see snapshot), by id, or None.
+    _sharers = None
+    # Weak reference given to the notes once the list follows their changes (see _follow_notes), or None.
+    _ref = None
+    # Incremented by the notes of the list each time their pitch or timing changes, once the list follows them.
+    _version = 0
+
     def __init__(self, args=None):
         super().__init__(args if args is not None else [])
 
+    def __getstate__(self) -> dict:
+        # The sharers are not pickled (nor deep copied): the notes of the copy are not shared. The copied notes do not
+        # report to the copy (see Note.__getstate__), so the cached data depending on the version is not copied either.
+        state = self.__dict__.copy()
+        for name in ('_sharers', '_ref', '_version', '_interval_index', '_aggregates', '_sorted_generation'):
+            state.pop(name, None)
+        return state
+
+    def snapshot(self) -> 'NoteList':
+        """
+        Returns a copy-on-write copy of the note list, of the same type.
+        Both note lists share the same Note objects until one of them gives access to its notes (iteration, indexing,
+        pop, ...) or modifies them in place: it then copies its notes first, unless the other lists were deleted.
+        Adding, removing or reordering notes does not copy them, as the lists themselves are not shared.
+        The notes obtained from the list before the snapshot are shared with the snapshot.
+        Complexity: O(n) reference copies, the notes are copied later only if needed.
+        :return: The snapshot.
+        """
+        return self._snapshot_as(type(self))
+
+    def _snapshot_as(self, cls: type) -> 'NoteList':
+        """
+        Returns a snapshot (see snapshot) of type cls, a subclass of NoteList.
+        """
+        if self._sharers is None:
+            self._sharers = weakref.WeakValueDictionary({id(self): self})
+        snapshot = NoteList.__new__(cls)
+        list.extend(snapshot, super().__iter__())
+        snapshot._sharers = self._sharers
+        self._sharers[id(snapshot)] = snapshot
+        return snapshot
+
+    def _own(self) -> None:
+        """
+        Copies the notes shared with snapshots, before giving access to them or modifying them.
+        O(1) if the notes are not shared anymore. The copies are equal to the notes, so the cached data stays valid.
+        :return: None
+        """
+        sharers = self._sharers
+        if sharers is not None:
+            self._sharers = None
+            sharers.pop(id(self), None)
+            if len(sharers) > 0:
+                super().__setitem__(slice(None), [copy.copy(n) for n in super().__iter__()])
+                self._follow(super().__iter__())
+
+    def _follow_notes(self) -> int:
+        """
+        Makes the notes of the list report their changes to it, so that the cached data computed on the notes can be
+        checked with the version of the list. Only the lists having cached data follow their notes: the notes of the
+        other lists do not report to them. The notes keep a weak reference to the list, the notes added later report
+        to it too.
+        Complexity: O(n) the first time, O(1) afterwards.
+        :return: The current version of the list.
+        """
+        if self._ref is None:
+            self._ref = weakref.ref(self)
+            self._follow(super().__iter__())
+        return self._version
+
+    def _follow(self, notes: Iterable[Note]) -> None:
+        """
+        Makes notes added to the list report their changes to it, if the list follows its notes.
+        :param notes: The added notes.
+        :return: None
+        """
+        ref = self._ref
+        if ref is not None:
+            for note in notes:
+                note._add_owner(ref)
+
+    def _changed(self) -> None:
+        """
+        Invalidates the cached data of the note list. Called by the methods modifying the list when the cached data
+        can't be updated incrementally.
+        The changes of the notes themselves are detected with the version of the list (see _follow_notes).
+        :return: None
+        """
+        self._reordered()
+        self._aggregates = None
+
+    def _reordered(self) -> None:
+        """
+        Invalidates the cached data depending on the positions of the notes. Called by the methods moving notes.
+        :return: None
+        """
+        self._interval_index = None
+        self._unindexed_queries = 0
+
+    def _added(self, notes: Iterable[Note]) -> None:
+        """
+        Updates the cached data after notes were added.
+        :param notes: The added notes.
+        :return: None
+        """
+        self._reordered()
+        if self._ref is not None:
+            notes = list(notes)
+            self._follow(notes)
+        if self._aggregates is not None:
+            if self._aggregates.generation == self._version:
+                for note in notes:
+                    self._aggregates.add(note)
+            else:
+                self._aggregates = None
+
+    def _removed(self, note: Note) -> None:
+        """
+        Updates the cached data after a note was removed.
+        :param note: The removed note.
+        :return: None
+        """
+        self._reordered()
+        if self._aggregates is not None and (self._aggregates.generation != self._version or
+                                             not self._aggregates.remove(note)):
+            self._aggregates = None
+
+    def get_aggregates(self) -> NoteListAggregates:
+        """
+        Returns the aggregates of the note list (start and end times, ambitus, pitch classes).
+        They are computed at the first call, then maintained by the methods of the note list: they are only recomputed
+        after a note is modified outside of the note list methods, or after an extremum is removed.
+        :return: The aggregates of the note list.
+        """
+        version = self._follow_notes()
+        if self._aggregates is None or self._aggregates.generation != version:
+            self._aggregates = NoteListAggregates(super().__iter__(), version)
+        return self._aggregates
+
     def add(self, note: Note) -> None:
         """
         Adds a note to the note list.
@@ -48,10 +261,12 @@ class NoteList(list[Note]):
         """
         if isinstance(note, Note):
             super().append(note)
+            self._added((note,))
         else:
             raise TypeError("Can only add Note objects to a NoteList.")
 
     def get(self, index: SupportsIndex) -> Note:
+        self._own()
         return super().__getitem__(index)
 
     def duration(self) -> float:
@@ -60,12 +275,14 @@ class NoteList(list[Note]):
         """
         if len(self) == 0:
             return 0
-        return self.get_end_time() - self.get_start_time()
+        aggregates = self.get_aggregates()
+        return aggregates.end_time - aggregates.start_time
 
     def __len__(self) -> int:
         return super().__len__()
 
     def __iter__(self) -> iter:
+        self._own()
         return super().__iter__()
 
     def __str__(self) -> str:
@@ -75,15 +292,29 @@ class NoteList(list[Note]):
         return str(super())
 
     def __getitem__(self, key: SupportsIndex) -> Union[Note, 'NoteList']:
+        self._own()
         if isinstance(key, slice):
             return NoteList(super().__getitem__(key))
         return super().__getitem__(key)
 
     def __setitem__(self, key: SupportsIndex, value: Note) -> None:
-        super().__setitem__(key, value)
+        if isinstance(key, slice):
+            value = list(value)
+            super().__setitem__(key, value)
+            self._follow(value)
+        else:
+            super().__setitem__(key, value)
+            self._follow((value,))
+        self._changed()
 
     def __delitem__(self, key: SupportsIndex) -> None:
-        super().__delitem__(key)
+        if isinstance(key, slice):
+            super().__delitem__(key)
+            self._changed()
+        else:
+            note = super().__getitem__(key)
+            super().__delitem__(key)
+            self._removed(note)
 
     def __contains__(self, item) -> bool:
         return super().__contains__(item)
@@ -139,8 +370,8 @@ class NoteList(list[Note]):
                 return False
         if len(self) != len(other):
             return False
-        self.sort(key=lambda n: n.time, reverse=False)
-        other.sort(key=lambda n: n.time, reverse=False)
+        self.sort()
+        other.sort()
         for i in range(len(self)):
             if self[i] != other[i]:
                 return False
@@ -150,12 +381,14 @@ class NoteList(list[Note]):
         return not self.__eq__(other)
 
     def __copy__(self) -> 'NoteList':
-        return self.deep_copy()
+        return self.snapshot()
 
     def append(self, new_note: Note) -> None:
         super().append(new_note)
+        self._added((new_note,))
 
     def extend(self, new_note_list: Union['NoteList', list[Note]]) -> None:
+        first_position = len(self)
         if isinstance(new_note_list, NoteList):
             super().extend(new_note_list)
         elif isinstance(new_note_list, list):
@@ -165,21 +398,30 @@ class NoteList(list[Note]):
                 raise TypeError("Can only extend by a list of Note objects.")
         else:
             raise TypeError("Can only extend by a NoteList or a list of Note objects.")
+        self._added(super().__getitem__(slice(first_position, None)))
 
     def concatenate(self, new_note_list: 'NoteList') -> None:
+        first_position = len(self)
         super().extend(new_note_list)
+        self._added(super().__getitem__(slice(first_position, None)))
 
     def insert(self, index: SupportsIndex, new_note: Note) -> None:
         super().insert(index, new_note)
+        self._added((new_note,))
 
     def remove(self, note: Note) -> None:
-        super().remove(note)
+        # Same as list.remove, knowing which note is removed.
+        self.pop(super().index(note))
 
     def pop(self, index: SupportsIndex = -1) -> Note:
-        return super().pop(index)
+        self._own()
+        note = super().pop(index)
+        self._removed(note)
+        return note
 
     def clear(self) -> None:
         super().clear()
+        self._changed()
 
     def is_empty(self) -> bool:
         """
@@ -188,14 +430,16 @@ class NoteList(list[Note]):
         return len(self) == 0
 
     def copy(self) -> 'NoteList':
-        return NoteList(super().copy())
+        return self.snapshot()
 
     def sort(self, key=lambda n: n.time, reverse=False) -> 'NoteList':
         super().sort(key=key, reverse=reverse)
+        self._reordered()
         return self
 
     def reverse(self) -> None:
         super().reverse()
+        self._reordered()
 
     def index(self, note: Note = None, start: SupportsIndex = None, end: SupportsIndex = None) -> int:
         return super().index(note)
@@ -242,10 +486,10 @@ class NoteList(list[Note]):
         Returns the ambitus of the note list.
         :return: A tuple containing the lowest and highest pitches.
         """
-        pitches = self.get_pitches()
-        if not pitches:
+        if len(self) == 0:
             return 0, 0
-        return min(pitches), max(pitches)
+        aggregates = self.get_aggregates()
+        return aggregates.min_pitch, aggregates.max_pitch
 
     def get_ambitus_difference(self) -> int:
         """
@@ -265,7 +509,7 @@ class NoteList(list[Note]):
         """
         Returns the pitch classes of the note list.
         """
-        return set([n.get_pitch_class() for n in self])
+        return {pc for pc, count in enumerate(self.get_aggregates().pitch_class_counts) if count > 0}
 
     def density(self) -> float:
         """
@@ -273,9 +517,10 @@ class NoteList(list[Note]):
         with the formula : number of notes / duration
         if the duration is 0, the density is 0
         """
-        if self.duration() == 0:
+        duration = self.duration()
+        if duration == 0:
             return 0
-        return len(self) / self.duration()
+        return len(self) / duration
 
     def filter_erroneous_notes(self) -> None:
         """
@@ -315,7 +560,47 @@ class NoteList(list[Note]):
         Returns a deep copy of the note list.
         :return: A deep copy of the note list.
         """
-        return NoteList(copy.deepcopy(n) for n in self)
+        notes = super().__iter__()  # Deep copied anyway, a shared note list does not have to copy its notes first.
+        return NoteList(copy.deepcopy(n) for n in notes)
+
+    def has_interval_index(self) -> bool:
+        """
+        Returns whether the note list has an up-to-date interval index.
+        """
+        return self._interval_index is not None and self._interval_index.generation == self._version
+
+    def get_interval_index(self) -> IntervalIndex:
+        """
+        Returns the interval index of the note list. It is built lazily and rebuilt after the list or its notes changed.
+        :return: The interval index of the note list.
+        """
+        if not self.has_interval_index():
+            self._interval_index = IntervalIndex(super().__getitem__(slice(None)), self._follow_notes())
+        return self._interval_index
+
+    def _query_index(self) -> IntervalIndex | None:
+        """
+        Returns the interval index to answer a time query, or None if the query should scan the list.
+        Building the index costs about log(n) scans, so it is only built once log(n) queries have scanned the list since
+        the last change: a few queries stay O(n) and repeated queries become O(log n + k).
+        :return: The interval index or None.
+        """
+        if self.has_interval_index():
+            return self._interval_index
+        self._unindexed_queries += 1
+        if self._unindexed_queries > len(self).bit_length():
+            return self.get_interval_index()
+        return None
+
+    def _select(self, positions: list[int]) -> 'NoteList':
+        """
+        Returns a new NoteList containing the notes at the given positions.
+        :param positions: The positions of the notes.
+        :return: A new NoteList.
+        """
+        self._own()
+        get = super().__getitem__
+        return NoteList([get(i) for i in positions])
 
     def before_time(self, timestamp) -> 'NoteList':
         """
@@ -323,6 +608,9 @@ class NoteList(list[Note]):
         :param timestamp: The timestamp to compare with.
         :return: The events that are before the given timestamp in a new EventList.
         """
+        index = self._query_index()
+        if index is not None:
+            return self._select(index.before(timestamp))
         return NoteList(event for event in self if event.time < timestamp)
 
     def after_time(self, timestamp) -> 'NoteList':
@@ -331,6 +619,9 @@ class NoteList(list[Note]):
         :param timestamp: The timestamp to compare with.
         :return: The events that are after the given timestamp in a new EventList.
         """
+        index = self._query_index()
+        if index is not None:
+            return self._select(index.after(timestamp))
         return NoteList(event for event in self if event.time > timestamp)
 
     def transpose(self, interval: int) -> None:
@@ -341,7 +632,17 @@ class NoteList(list[Note]):
         """
         if interval == 0:
             return
-        self.map(lambda n: n.transpose(interval))
+        self._own()
+        aggregates = self._aggregates
+        if aggregates is not None and aggregates.generation == self._version and \
+                aggregates.min_pitch is not None and \
+                MIN_MIDI_PITCH <= aggregates.min_pitch + interval and aggregates.max_pitch + interval <= MAX_MIDI_PITCH:
+            # No note will keep its pitch for being out of range: the aggregates can be transposed too.
+            self.map(lambda n: n.transpose(interval))
+            aggregates.transpose(interval)
+            aggregates.generation = self._version
+        else:
+            self.map(lambda n: n.transpose(interval))
 
     def map(self, f: Callable) -> 'NoteList':
         """
@@ -353,9 +654,11 @@ class NoteList(list[Note]):
             return self
         if not callable(f):
             raise TypeError("The function must be callable.")
-        # Check if f return Note
-        if isinstance(f(self[0]), Note):
-            for i in range(len(self)):
+        # Check if f return Note (the result for the first note is kept, f is applied once per note)
+        first = f(self[0])
+        if isinstance(first, Note):
+            self[0] = first
+            for i in range(1, len(self)):
                 self[i] = f(self[i])
         else:
             for i in range(1, len(self)):
@@ -373,6 +676,16 @@ class NoteList(list[Note]):
             raise TypeError("The function must be callable.")
         return NoteList([n for n in self if f(n)])
 
+    def lazy(self) -> 'LazyNoteList':
+        """
+        Returns a lazy view of the note list, to chain operations that run in a single pass when collected.
+        Example: nl.lazy().filter(lambda n: n.velocity > 60).transpose(3).shift(1.0).collect()
+        :return: A LazyNoteList reading from this note list.
+        """
+        # Imported here as lazy_note_list depends on this module.
+        from compositions.midi_boilerplate.src.data_structures.lazy_note_list import LazyNoteList
+        return LazyNoteList(self)
+
     def shift_time(self, shift: float) -> None:
         """
         Shift the time of all notes in the note list.
@@ -380,7 +693,22 @@ class NoteList(list[Note]):
         :return: None
         """
         self.filter_erroneous_notes()
-        self.map(lambda n: n.shift_time(shift))
+        self._own()
+        aggregates = self._aggregates
+        if aggregates is not None and aggregates.generation == self._version and \
+                aggregates.start_time is not None and aggregates.start_time + shift >= 0:
+            # No note will be clamped to 0: the aggregates are updated in the same pass. The end time is recomputed as
+            # the rounding of the shifted offsets differs from the shifted end time.
+            end_time = aggregates.start_time + shift
+            for note in super().__iter__():
+                note.shift_time(shift)
+                if note.offset > end_time:
+                    end_time = note.offset
+            aggregates.start_time += shift
+            aggregates.end_time = end_time
+            aggregates.generation = self._version
+        else:
+            self.map(lambda n: n.shift_time(shift))
 
     def set_beginning(self, time: float) -> None:
         """
@@ -416,7 +744,7 @@ class NoteList(list[Note]):
         """
         if len(self) == 0:
             return 0
-        return min([n.time for n in self])
+        return self.get_aggregates().start_time
 
     def get_end_time(self) -> float:
         """
@@ -426,11 +754,11 @@ class NoteList(list[Note]):
         """
         if len(self) == 0:
             return 0
-        return max([n.offset for n in self])
+        return self.get_aggregates().end_time
 
     def transform(self, interval: int = 0, speed_factor: float = 1, velocity_factor: float = 1) -> None:
         """
-        Transforms the note list.
+        Transforms the note list, note by note (NoteArray.transform is the vectorized version, for large lists).
         :param interval: The interval to transpose by.
         :param speed_factor: The speed factor.
         :param velocity_factor: The velocity factor.
@@ -456,6 +784,9 @@ class NoteList(list[Note]):
         :param time: The time to check.
         :return: The notes that are playing at the given time.
         """
+        index = self._query_index()
+        if index is not None:
+            return self._select(index.stab(time))
         return NoteList([n for n in self if n.time <= time < n.offset])
 
     def create_slice(self, start: TimeType, end: TimeType) -> 'NoteList':
@@ -465,16 +796,47 @@ class NoteList(list[Note]):
         :param end: The end time of the slice.
         :return: A new NoteList containing the slice.
         """
+        index = self._query_index()
+        if index is not None:
+            return self._select(index.slice(start, end))
         return NoteList([n for n in self if start <= n.time <= end or n.time <= start <= n.offset])
 
     def get_salami(self, slice_size: int | float) -> list['NoteList']:
         """
         Get a list of slices of the note list.
+        The slice i is create_slice(i * slice_size, (i + 1) * slice_size).
         :param slice_size: The size of the slices.
         :return: A list of NoteList.
         """
-        return [self.create_slice(i * slice_size, (i + 1) * slice_size) for i in
-                range(ceil(self.duration() / slice_size))]
+        return list(self.iter_salami(slice_size))
+
+    def iter_salami(self, slice_size: int | float) -> Iterator['NoteList']:
+        """
+        Lazily yields the slices of get_salami.
+        The notes are sorted once by onset, then a sweep line goes through the slices keeping the notes that are still
+        held: each slice only looks at its own notes instead of scanning the whole list.
+        Complexity: O(n log n + s) where s is the total size of the slices.
+        :param slice_size: The size of the slices.
+        :return: An iterator of NoteList, in the order and with the content of get_salami.
+        """
+        number_of_slices = ceil(self.duration() / slice_size)
+        notes = list(self)
+        order = sorted(range(len(notes)), key=lambda p: notes[p].time)
+        next_note = 0
+        active = []  # Positions of the notes starting before the end of the slice, in list order.
+        for i in range(number_of_slices):
+            start, end = i * slice_size, (i + 1) * slice_size
+            added = False
+            while next_note < len(order) and notes[order[next_note]].time <= end:
+                active.append(order[next_note])
+                next_note += 1
+                added = True
+            if added:
+                active.sort()
+            # Same boundaries as create_slice, knowing that n.time <= end. The removed notes end before the start of
+            # the slice, so they are not part of the next slices either.
+            active = [p for p in active if start <= notes[p].time or notes[p].time <= start <= notes[p].offset]
+            yield NoteList([notes[p] for p in active])
 
     def get_max_silence_and_groups(self) -> Tuple[float, tuple['NoteList', 'NoteList']]:
         """
@@ -535,13 +897,63 @@ class NoteList(list[Note]):
         """
         return NoteList([Note.from_json(json.loads(n)) for n in json.loads(json_data)])
 
+    def save_as_binary(self, path: str) -> None:
+        """
+        Save the note list to a file in the binary note file format (see binary_note_file.py).
+        Times are saved as floats.
+        :param path: The path to save the note list to.
+        :return: None
+        """
+        # Imported here as binary_note_file depends on this module.
+        from compositions.midi_boilerplate.src.data_structures.binary_note_file import save_note_array
+        from compositions.midi_boilerplate.src.data_structures.note_array import NoteArray
+        save_note_array(NoteArray.from_note_list(self), path)
+
+    @classmethod
+    def from_binary_file(cls, path: str) -> 'NoteList':
+        """
+        Parse a Note List from a binary note file.
+        To work on the notes without creating Note objects, use binary_note_file.load_note_array instead.
+        :param path: The path to the file
+        :return: A NoteList object
+        """
+        from compositions.midi_boilerplate.src.data_structures.binary_note_file import load_note_array
+        return load_note_array(path, mmap=False).to_note_list()
+
+    def save_as_ndjson(self, path: str, sort: bool = False) -> None:
+        """
+        Save the note list to a file as line-delimited json (one note per line, see ndjson_note_file.py).
+        :param path: The path to save the note list to.
+        :param sort: If True, the notes are written sorted by onset, so that time-windowed reads can stop early.
+        :return: None
+        """
+        # Imported here as ndjson_note_file depends on this module.
+        from compositions.midi_boilerplate.src.data_structures.ndjson_note_file import save_as_ndjson
+        save_as_ndjson(self, path, sort)
+
+    @classmethod
+    def from_ndjson(cls, path: str, start: TimeType = None, end: TimeType = None) -> 'NoteList':
+        """
+        Parse a Note List from a line-delimited json file.
+        To read the notes one by one or by chunks in constant memory, use ndjson_note_file.iter_ndjson(_chunks).
+        :param path: The path to the file
+        :param start: If given, only the notes starting at or after start are read.
+        :param end: If given, only the notes starting before end are read.
+        :return: A NoteList object
+        """
+        from compositions.midi_boilerplate.src.data_structures.ndjson_note_file import iter_ndjson
+        return NoteList(iter_ndjson(path, start, end))
+
     @classmethod
     def from_file(cls, path: str) -> 'NoteList':
         """
-        Parse a Note List from a file
+        Parse a Note List from a file, either saved as json or in the binary note file format.
         :param path: The path to the file
         :return: A NoteList object
         """
+        from compositions.midi_boilerplate.src.data_structures.binary_note_file import is_binary_note_file
+        if is_binary_note_file(path):
+            return cls.from_binary_file(path)
         with open(path, 'r') as f:
             return cls.from_json(f.read())
 
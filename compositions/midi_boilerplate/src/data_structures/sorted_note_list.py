@@ -0,0 +1,247 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+"""
+import copy
+from bisect import bisect_left, bisect_right
+from itertools import pairwise
+from operator import attrgetter
+from typing import Iterable, SupportsIndex, Callable, Union
+
+from compositions.midi_boilerplate.src.data_structures.interval_index import IntervalIndex
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+
+_onset = attrgetter('time')
+
+
+class SortedNoteList(NoteList):
+    """
+    A NoteList whose notes are always sorted by onset (notes with the same onset stay in insertion order).
+    The notes are inserted at their place with a binary search, appending a note that is not earlier than the last one
+    (the usual case of a live capture) costs O(1). extend merges the new notes with the sorted ones.
+    As sort() is a no-op, the methods sorting the list before working on it skip the sorting, and before_time and
+    after_time are answered with a binary search.
+    Changing the time of a note directly (e.g. note.time = 0) is reported by the note to the list (see
+    NoteList._follow_notes): the order is checked, and restored if needed, at the next operation relying on it.
+    """
+    # Version of the list for which it is known to be sorted. Defined at class level as pickle extends the list before
+    # setting the attributes of the instance.
+    _sorted_generation = -1
+
+    def __init__(self, args: Iterable[Note] = None):
+        super().__init__(sorted(args, key=_onset) if args is not None else None)
+        self._sorted_generation = self._follow_notes()
+
+    @classmethod
+    def _from_sorted(cls, notes: Iterable[Note]) -> 'SortedNoteList':
+        """
+        Returns a SortedNoteList of notes that are already sorted by onset, without sorting them again.
+        """
+        sorted_note_list = cls()
+        notes = list(notes)
+        list.extend(sorted_note_list, notes)
+        sorted_note_list._follow(notes)
+        return sorted_note_list
+
+    def _restore_order(self) -> None:
+        """
+        Sorts the notes if they are not sorted by onset anymore. O(n) if they are (nearly) sorted.
+        :return: None
+        """
+        if not all(a.time <= b.time for a, b in pairwise(list.__iter__(self))):
+            list.sort(self, key=_onset)
+            self._reordered()
+        self._sorted_generation = self._follow_notes()
+
+    def _ensure_sorted(self) -> None:
+        """
+        Restores the order of the notes if a note was modified since the order was last checked.
+        :return: None
+        """
+        if self._sorted_generation != self._version:
+            self._restore_order()
+
+    def add(self, note: Note) -> None:
+        if isinstance(note, Note):
+            self.append(note)
+        else:
+            raise TypeError("Can only add Note objects to a NoteList.")
+
+    def append(self, new_note: Note) -> None:
+        """
+        Inserts a note at its place in the onset order.
+        Complexity: O(1) if the note does not start before the last note, O(n) otherwise (O(log n) comparisons).
+        :param new_note: The note to insert.
+        :return: None
+        """
+        if len(self) == 0 or new_note.time >= list.__getitem__(self, -1).time:
+            super().append(new_note)
+        else:
+            self._ensure_sorted()
+            super().insert(bisect_right(self, new_note.time, key=_onset), new_note)
+
+    def insert(self, index: SupportsIndex, new_note: Note) -> None:
+        """
+        Inserts a note at its place in the onset order. The index is ignored.
+        """
+        self.append(new_note)
+
+    def extend(self, new_note_list: Union['NoteList', list[Note]]) -> None:
+        """
+        Adds notes, merging them with the sorted notes of the list.
+        Complexity: O(n + k log k) where k is the number of added notes, O(n + k) if they are sorted.
+        """
+        first_position = len(self)
+        super().extend(new_note_list)
+        self._merge(first_position)
+
+    def concatenate(self, new_note_list: 'NoteList') -> None:
+        first_position = len(self)
+        super().concatenate(new_note_list)
+        self._merge(first_position)
+
+    def _merge(self, first_position: int) -> None:
+        """
+        Restores the order after notes were added at the end of the list, from first_position.
+        Timsort finds the sorted runs of the list, so sorting merges them in linear time.
+        :param first_position: The position of the first added note.
+        :return: None
+        """
+        if self._sorted_generation == self._version:
+            tail = list.__getitem__(self, slice(max(first_position - 1, 0), None))
+            if all(a.time <= b.time for a, b in pairwise(tail)):
+                return
+        list.sort(self, key=_onset)
+        self._reordered()
+        self._sorted_generation = self._follow_notes()
+
+    def __setitem__(self, key: SupportsIndex, value: Note) -> None:
+        # The assigned notes are moved to their place, so the positions change: use map to replace all the notes.
+        super().__setitem__(key, value)
+        self._restore_order()
+
+    def __getitem__(self, key: SupportsIndex) -> Union[Note, 'SortedNoteList']:
+        self._own()
+        self._ensure_sorted()
+        if isinstance(key, slice):
+            if key.step is None or key.step > 0:
+                return SortedNoteList._from_sorted(list.__getitem__(self, key))
+            return NoteList(list.__getitem__(self, key))
+        return list.__getitem__(self, key)
+
+    def get(self, index: SupportsIndex) -> Note:
+        return self[index]
+
+    def pop(self, index: SupportsIndex = -1) -> Note:
+        self._ensure_sorted()
+        return super().pop(index)
+
+    def map(self, f: Callable) -> 'SortedNoteList':
+        """
+        Apply a function to all notes in the note list. If it returns notes, they replace the notes of the list, which
+        are sorted again once all of them are replaced.
+        :param f: The function to apply.
+        :return: The note list with the function applied.
+        """
+        if len(self) == 0:
+            return self
+        if not callable(f):
+            raise TypeError("The function must be callable.")
+        self._own()
+        notes = list.__getitem__(self, slice(None))
+        first = f(notes[0])
+        if isinstance(first, Note):
+            notes = [first] + [f(n) for n in notes[1:]]
+            list.__setitem__(self, slice(None), notes)
+            self._follow(notes)
+            self._changed()
+            self._restore_order()
+        else:
+            for n in notes[1:]:
+                f(n)
+        return self
+
+    def sort(self, key=None, reverse=False) -> 'SortedNoteList':
+        """
+        Sorts the notes by onset, which is a no-op unless a note was modified directly.
+        :param key: Must be None or the onset (n.time).
+        :param reverse: Must be False.
+        :return: The note list itself.
+        :raises ValueError: If another order is requested.
+        """
+        if reverse or (key is not None and not all(key(note) == note.time for note in list.__iter__(self))):
+            raise ValueError("A SortedNoteList is always sorted by onset, convert it to a NoteList to sort it "
+                             "otherwise.")
+        self._ensure_sorted()
+        return self
+
+    def reverse(self) -> None:
+        raise ValueError("A SortedNoteList is always sorted by onset, convert it to a NoteList to reverse it.")
+
+    def snapshot(self) -> 'SortedNoteList':
+        snapshot = super().snapshot()
+        if self._sorted_generation == self._version:
+            # The snapshot follows the shared notes, so that their changes are reported to it too.
+            snapshot._sorted_generation = snapshot._follow_notes()
+        return snapshot
+
+    def to_note_list(self) -> NoteList:
+        """
+        Returns a copy-on-write copy (see snapshot) of the notes as a plain NoteList, in onset order, which can be
+        reordered freely (reverse, sort by pitch, insert, ...).
+        :return: The NoteList.
+        """
+        self._ensure_sorted()
+        return self._snapshot_as(NoteList)
+
+    def deep_copy(self) -> 'SortedNoteList':
+        self._ensure_sorted()
+        return SortedNoteList._from_sorted(copy.deepcopy(n) for n in list.__iter__(self))
+
+    def _query_index(self) -> IntervalIndex | None:
+        # Restoring the order moves the notes, so it has to be done before the index is built or used.
+        self._ensure_sorted()
+        return super()._query_index()
+
+    def _select(self, positions: list[int]) -> 'SortedNoteList':
+        self._own()
+        get = list.__getitem__
+        return SortedNoteList._from_sorted([get(self, i) for i in positions])
+
+    def filter(self, f: Callable) -> 'SortedNoteList':
+        if not callable(f):
+            raise TypeError("The function must be callable.")
+        self._own()
+        self._ensure_sorted()
+        return SortedNoteList._from_sorted([n for n in list.__iter__(self) if f(n)])
+
+    def before_time(self, timestamp) -> 'SortedNoteList':
+        """
+        Returns the notes starting before the given timestamp. O(log n + k)
+        """
+        self._own()
+        self._ensure_sorted()
+        return SortedNoteList._from_sorted(list.__getitem__(self, slice(bisect_left(self, timestamp, key=_onset))))
+
+    def after_time(self, timestamp) -> 'SortedNoteList':
+        """
+        Returns the notes starting after the given timestamp. O(log n + k)
+        """
+        self._own()
+        self._ensure_sorted()
+        return SortedNoteList._from_sorted(list.__getitem__(self, slice(bisect_right(self, timestamp, key=_onset),
+                                                                        None)))
+
+    def shift_time(self, shift: float) -> None:
+        # Shifting all the notes (times clamped at 0) keeps their order.
+        self._ensure_sorted()
+        super().shift_time(shift)
+        self._sorted_generation = self._version
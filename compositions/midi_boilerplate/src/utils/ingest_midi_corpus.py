@@ -0,0 +1,152 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+    Converts a directory tree of MIDI files into note files with a pool of processes.
+    Usage: python -m compositions.midi_boilerplate.src.utils.ingest_midi_corpus corpus/ notes/ --workers 8
+"""
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from compositions.midi_boilerplate.src.data_structures.binary_note_file import save_note_array
+from compositions.midi_boilerplate.src.utils.midi_file_parser import midi_file_to_note_array, PARSER_VERSION
+
+MIDI_EXTENSIONS = ('.mid', '.midi', '.smf')
+OUTPUT_EXTENSIONS = {'binary': '.nlb', 'json': '.json'}
+MANIFEST_FILE_NAME = 'manifest.json'
+FAILURE_LOG_FILE_NAME = 'failures.log'
+
+
+def find_midi_files(root: str) -> list[str]:
+    """
+    Finds the MIDI files of a directory tree.
+    :param root: The root directory.
+    :return: The sorted paths of the MIDI files.
+    """
+    midi_files = []
+    for directory, _, file_names in os.walk(root):
+        midi_files.extend(os.path.join(directory, name) for name in file_names
+                          if name.lower().endswith(MIDI_EXTENSIONS))
+    return sorted(midi_files)
+
+
+def output_stems(midi_files: list[str], root: str) -> list[str]:
+    """
+    Returns the path of the note file of each MIDI file relative to the output directory, without extension: the
+    relative path of the MIDI file without its extension, or with it if another MIDI file of the same directory has the
+    same name without extension (e.g. song.mid and song.midi give song.mid.nlb and song.midi.nlb).
+    :param midi_files: The paths of the MIDI files.
+    :param root: The root directory of the corpus.
+    :return: The stems, in the order of the MIDI files.
+    """
+    relative_paths = [os.path.relpath(path, root) for path in midi_files]
+    stems = [os.path.splitext(path)[0] for path in relative_paths]
+    counts = Counter(stems)
+    return [path if counts[stem] > 1 else stem for path, stem in zip(relative_paths, stems)]
+
+
+def convert_midi_file(midi_file_path: str, root: str, output_dir: str, output_format: str,
+                      output_stem: str = None) -> dict:
+    """
+    Converts a MIDI file into a note file, keeping its relative path. Runs in a worker process.
+    :param midi_file_path: The path of the MIDI file.
+    :param root: The root directory of the corpus.
+    :param output_dir: The output directory.
+    :param output_format: 'binary' (binary note file) or 'json' (NoteList.save_as_json).
+    :param output_stem: The path of the note file relative to the output directory, without extension (see
+        output_stems). Default is the relative path of the MIDI file without extension.
+    :return: The manifest entry of the file.
+    """
+    note_array = midi_file_to_note_array(midi_file_path)
+    relative_path = os.path.relpath(midi_file_path, root)
+    if output_stem is None:
+        output_stem = os.path.splitext(relative_path)[0]
+    output_file = output_stem + OUTPUT_EXTENSIONS[output_format]
+    output_path = os.path.join(output_dir, output_file)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if output_format == 'binary':
+        save_note_array(note_array, output_path)
+    else:
+        note_array.to_note_list().save_as_json(output_path)
+    return {'midi_file': relative_path, 'output_file': output_file, 'notes': len(note_array),
+            'duration': note_array.duration()}
+
+
+def print_progress(done: int, total: int, failed: int, start_time: float) -> None:
+    """
+    Prints the progress of the ingestion on a single line of stderr.
+    """
+    elapsed = time.perf_counter() - start_time
+    rate = done / elapsed if elapsed > 0 else 0
+    remaining = (total - done) / rate if rate > 0 else 0
+    print(f'\r{done}/{total} files, {failed} failed, {rate:.1f} files/s, {remaining:.0f} s remaining',
+          end='' if done < total else '\n', file=sys.stderr, flush=True)
+
+
+def ingest_corpus(root: str, output_dir: str, output_format: str = 'binary', workers: int = None,
+                  progress: bool = True) -> tuple[list[dict], list[dict]]:
+    """
+    Converts all the MIDI files of a directory tree with a pool of processes.
+    Writes one note file per MIDI file (same relative path, see output_stems), a manifest of the converted files and a
+    log of the failures in the output directory.
+    :param root: The root directory of the corpus.
+    :param output_dir: The output directory.
+    :param output_format: 'binary' or 'json'.
+    :param workers: The number of worker processes (default is the number of CPUs).
+    :param progress: If True, prints the progress on stderr (at most twice per second).
+    :return: The manifest entries and the failures.
+    :raises ValueError: If the output format is unknown.
+    """
+    if output_format not in OUTPUT_EXTENSIONS:
+        raise ValueError(f"Unknown output format {output_format}, expected one of {list(OUTPUT_EXTENSIONS)}.")
+    midi_files = find_midi_files(root)
+    os.makedirs(output_dir, exist_ok=True)
+    entries, failures = [], []
+    start_time = last_progress_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(convert_midi_file, path, root, output_dir, output_format, stem): path
+                   for path, stem in zip(midi_files, output_stems(midi_files, root))}
+        for future in as_completed(futures):
+            try:
+                entries.append(future.result())
+            except Exception as e:
+                failures.append({'midi_file': os.path.relpath(futures[future], root), 'error': repr(e)})
+            done = len(entries) + len(failures)
+            if progress and (done == len(midi_files) or time.perf_counter() - last_progress_time > 0.5):
+                print_progress(done, len(midi_files), len(failures), start_time)
+                last_progress_time = time.perf_counter()
+
+    entries.sort(key=lambda entry: entry['midi_file'])
+    failures.sort(key=lambda failure: failure['midi_file'])
+    with open(os.path.join(output_dir, MANIFEST_FILE_NAME), 'w') as f:
+        json.dump({'root': os.path.abspath(root), 'format': output_format, 'parser_version': PARSER_VERSION,
+                   'files': entries, 'failures': len(failures)}, f, indent=1)
+    with open(os.path.join(output_dir, FAILURE_LOG_FILE_NAME), 'w') as f:
+        for failure in failures:
+            f.write(f"{failure['midi_file']}\t{failure['error']}\n")
+    return entries, failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Converts a directory tree of MIDI files into note files.')
+    parser.add_argument('root', type=str, help='The root directory of the MIDI corpus.')
+    parser.add_argument('output_dir', type=str, help='The directory of the note files, manifest and failure log.')
+    parser.add_argument('--format', type=str, choices=list(OUTPUT_EXTENSIONS), default='binary',
+                        help='The format of the note files (default: binary).')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='The number of worker processes (default: number of CPUs).')
+    parser.add_argument('--quiet', action='store_true', help='Do not print the progress.')
+    args = parser.parse_args()
+
+    converted, failed = ingest_corpus(args.root, args.output_dir, args.format, args.workers, not args.quiet)
+    print(f'{len(converted)} files converted, {len(failed)} failed. Manifest written to '
+          f'{os.path.join(args.output_dir, MANIFEST_FILE_NAME)}')
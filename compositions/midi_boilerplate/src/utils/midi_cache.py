@@ -0,0 +1,145 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import hashlib
+import os
+import tempfile
+
+from compositions.midi_boilerplate.src.data_structures.binary_note_file import load_note_array, save_note_array
+from compositions.midi_boilerplate.src.data_structures.note_array import NoteArray
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.utils.midi_file_parser import parse_midi_bytes, PARSER_VERSION
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'midit', 'parsed_midi')
+DEFAULT_MAX_BYTES = 1024 ** 3  # 1 GiB
+CACHE_EXTENSION = '.nlb'
+
+
+class MidiCache:
+    """
+    A persistent cache of parsed MIDI files.
+    The entries are binary note files named after the hash of the MIDI file content and the parser version, so a
+    modified or moved file is handled without bookkeeping, and a new parser version never reads old entries.
+    The total size of the entries is bounded, the least recently used entries are evicted first.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param directory: The directory of the cache entries (created if needed).
+        :param max_bytes: The maximum total size of the entries.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(data: bytes) -> str:
+        """
+        Returns the cache key of a MIDI file content.
+        :param data: The content of the MIDI file.
+        :return: The hexadecimal key.
+        """
+        return hashlib.sha256(data + f'parser-v{PARSER_VERSION}'.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def load_note_array(self, midi_file_path: str, mmap: bool = True) -> NoteArray:
+        """
+        Returns the notes of a MIDI file, parsing it only if it is not in the cache yet.
+        :param midi_file_path: The path of the MIDI file.
+        :param mmap: If True, the cached entry is memory-mapped (see binary_note_file.load_note_array).
+        :return: The notes of the file as a NoteArray sorted by onset.
+        """
+        with open(midi_file_path, 'rb') as f:
+            data = f.read()
+        entry_path = self._entry_path(self.key(data))
+        if os.path.exists(entry_path):
+            os.utime(entry_path)  # The modification time is the last use time of the entry.
+            return load_note_array(entry_path, mmap)
+        note_array = parse_midi_bytes(data)
+        # Write to a temporary file first, so that concurrent readers never see a partial entry.
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(file_descriptor)
+        save_note_array(note_array, temporary_path)
+        os.replace(temporary_path, entry_path)
+        self.evict()
+        return note_array
+
+    def load_note_list(self, midi_file_path: str) -> NoteList:
+        """
+        Returns the notes of a MIDI file as a NoteList, parsing it only if it is not in the cache yet.
+        :param midi_file_path: The path of the MIDI file.
+        :return: The notes of the file sorted by onset.
+        """
+        return self.load_note_array(midi_file_path, mmap=False).to_note_list()
+
+    def invalidate(self, midi_file_path: str) -> bool:
+        """
+        Removes the entry of a MIDI file (for its current content).
+        :param midi_file_path: The path of the MIDI file.
+        :return: True if an entry was removed.
+        """
+        with open(midi_file_path, 'rb') as f:
+            entry_path = self._entry_path(self.key(f.read()))
+        if os.path.exists(entry_path):
+            os.remove(entry_path)
+            return True
+        return False
+
+    def clear(self) -> None:
+        """
+        Removes all the entries of the cache.
+        :return: None
+        """
+        for path, _, _ in self._entries():
+            os.remove(path)
+
+    def size(self) -> int:
+        """
+        Returns the total size of the entries in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        """
+        Returns the (path, size, last use time) of the entries.
+        """
+        entries = []
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.name.endswith(CACHE_EXTENSION):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the total size is at most max_bytes.
+        :return: None
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # Already evicted by another process.
+                pass
+            total -= size
+
+
+def cached_midi_file_to_note_list(midi_file_path: str, cache: MidiCache = None) -> NoteList:
+    """
+    Converts a MIDI file into a list of notes with the fast parser, through a cache of the parsed files.
+    :param midi_file_path: The MIDI file path to convert.
+    :param cache: The cache to use (default is a MidiCache in the default directory).
+    :return: A list of notes sorted by onset.
+    """
+    return (cache if cache is not None else MidiCache()).load_note_list(midi_file_path)
@@ -0,0 +1,180 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+
+    A fast Standard MIDI File parser producing columnar note data (NoteArray).
+    Unlike midi_file_to_note_list, no mido message is created: the track chunks are decoded straight from the bytes,
+    the note state is kept per (channel, pitch) and the tempo changes are taken into account.
+"""
+import logging
+import struct
+
+import numpy as np
+
+from compositions.midi_boilerplate.src.data_structures.note_array import NoteArray
+
+log = logging.getLogger(__name__)
+
+# Increment when the output of the parser changes (used to invalidate the parsed files caches).
+PARSER_VERSION = 1
+DEFAULT_TEMPO = 500000  # Microseconds per beat (120 bpm).
+# Number of data bytes of the channel messages, by status high nibble.
+DATA_LENGTHS = {0x80: 2, 0x90: 2, 0xA0: 2, 0xB0: 2, 0xC0: 1, 0xD0: 1, 0xE0: 2}
+
+
+def _read_variable_length(data: bytes, position: int) -> tuple[int, int]:
+    """
+    Reads a variable-length quantity.
+    :param data: The bytes to read from.
+    :param position: The position of the quantity.
+    :return: The value and the position after the quantity.
+    """
+    value = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, position
+
+
+def _parse_track(data: bytes, position: int, end: int, notes: list[tuple[int, int, int, int]],
+                 tempo_changes: list[tuple[int, int]]) -> None:
+    """
+    Parses a track chunk, appending the notes (in ticks) and the tempo changes found.
+    A note_on on a note already on is ignored, as in midi_file_to_note_list. The notes still on at the end of the
+    track are dropped.
+    :param data: The bytes of the file.
+    :param position: The position of the first event of the track.
+    :param end: The position of the end of the track.
+    :param notes: The list of (onset tick, offset tick, channel * 128 + pitch, velocity) to append to.
+    :param tempo_changes: The list of (tick, tempo) to append to.
+    :return: None
+    """
+    # Onset tick and velocity of the notes currently on, by channel * 128 + pitch.
+    on_ticks = [-1] * 2048
+    on_velocities = [0] * 2048
+    tick = 0
+    status = 0
+    while position < end:
+        byte = data[position]
+        if byte < 0x80:  # Inlined single byte delta time, the most common case.
+            tick += byte
+            position += 1
+        else:
+            delta, position = _read_variable_length(data, position)
+            tick += delta
+        byte = data[position]
+        if byte >= 0x80:
+            position += 1
+            if byte < 0xF0:
+                status = byte  # Running status only applies to channel messages.
+            elif byte == 0xFF:
+                meta_type = data[position]
+                length, position = _read_variable_length(data, position + 1)
+                if meta_type == 0x51 and length == 3:
+                    tempo_changes.append((tick, (data[position] << 16) | (data[position + 1] << 8) |
+                                          data[position + 2]))
+                elif meta_type == 0x2F:
+                    return
+                position += length
+                continue
+            elif byte == 0xF0 or byte == 0xF7:
+                length, position = _read_variable_length(data, position)
+                position += length
+                continue
+            else:
+                raise ValueError(f"Unexpected status byte {byte:#x} at position {position - 1}.")
+        elif status == 0:
+            raise ValueError(f"Running status without previous status at position {position}.")
+        kind = status & 0xF0
+        if kind == 0x90 or kind == 0x80:
+            key = ((status & 0x0F) << 7) | data[position]
+            velocity = data[position + 1]
+            position += 2
+            if kind == 0x90 and velocity > 0:
+                if on_ticks[key] < 0:
+                    on_ticks[key] = tick
+                    on_velocities[key] = velocity
+            elif on_ticks[key] < 0:
+                log.warning(f"Note is already off! channel={key >> 7} note={key & 0x7F} tick={tick}")
+            else:
+                notes.append((on_ticks[key], tick, key, on_velocities[key]))
+                on_ticks[key] = -1
+        else:
+            position += DATA_LENGTHS[kind]
+
+
+def _ticks_to_seconds(ticks: np.ndarray, tempo_changes: list[tuple[int, int]], ticks_per_beat: int) -> np.ndarray:
+    """
+    Converts absolute ticks to seconds with a tempo map.
+    :param ticks: The absolute ticks.
+    :param tempo_changes: The (tick, tempo in microseconds per beat) of the tempo changes.
+    :param ticks_per_beat: The number of ticks per beat.
+    :return: The times in seconds.
+    """
+    tempo_changes = sorted(tempo_changes, key=lambda change: change[0])
+    if not tempo_changes or tempo_changes[0][0] > 0:
+        tempo_changes.insert(0, (0, DEFAULT_TEMPO))
+    change_ticks = np.array([change[0] for change in tempo_changes], dtype=np.int64)
+    seconds_per_tick = np.array([change[1] for change in tempo_changes], dtype=np.float64) / (1e6 * ticks_per_beat)
+    # Time in seconds at each tempo change.
+    change_seconds = np.concatenate(([0.], np.cumsum(np.diff(change_ticks) * seconds_per_tick[:-1])))
+    segment = np.searchsorted(change_ticks, ticks, side='right') - 1
+    return change_seconds[segment] + (ticks - change_ticks[segment]) * seconds_per_tick[segment]
+
+
+def parse_midi_bytes(data: bytes) -> NoteArray:
+    """
+    Parses the bytes of a Standard MIDI File into a NoteArray sorted by onset.
+    :param data: The content of the MIDI file.
+    :return: The notes of the file, with times in seconds.
+    :raises ValueError: If the data is not a valid MIDI file.
+    """
+    if data[:4] != b'MThd':
+        raise ValueError("Not a MIDI file (missing MThd header).")
+    header_length, _, number_of_tracks, division = struct.unpack_from('>IHHH', data, 4)
+    notes = []
+    tempo_changes = []
+    position = 8 + header_length
+    tracks = 0
+    while position + 8 <= len(data) and tracks < number_of_tracks:
+        chunk_type = data[position:position + 4]
+        chunk_length = struct.unpack_from('>I', data, position + 4)[0]
+        position += 8
+        if chunk_type == b'MTrk':
+            _parse_track(data, position, min(position + chunk_length, len(data)), notes, tempo_changes)
+            tracks += 1
+        position += chunk_length
+
+    notes = np.array(notes, dtype=np.int64).reshape(-1, 4)
+    onsets, offsets, keys, velocities = notes[:, 0], notes[:, 1], notes[:, 2], notes[:, 3]
+    if division & 0x8000:
+        # SMPTE division: negative frames per second and ticks per frame, the tempo does not apply.
+        frames_per_second = 256 - (division >> 8)
+        seconds_per_tick = 1. / (frames_per_second * (division & 0xFF))
+        times, end_times = onsets * seconds_per_tick, offsets * seconds_per_tick
+    else:
+        times = _ticks_to_seconds(onsets, tempo_changes, division)
+        end_times = _ticks_to_seconds(offsets, tempo_changes, division)
+    order = np.argsort(times, kind='stable')
+    return NoteArray((keys & 0x7F)[order], times[order], (end_times - times)[order], velocities[order],
+                     (keys >> 7)[order])
+
+
+def midi_file_to_note_array(midi_file_path: str) -> NoteArray:
+    """
+    Converts a MIDI file into a NoteArray, with the fast parser.
+
+    :param midi_file_path: The MIDI file path to convert.
+    :return: The notes of the file sorted by onset, with times in seconds.
+    """
+    with open(midi_file_path, 'rb') as f:
+        return parse_midi_bytes(f.read())
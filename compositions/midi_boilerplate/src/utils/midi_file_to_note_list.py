@@ -22,7 +22,7 @@ def midi_file_to_note_list(midi_file_path: str) -> NoteList:
     Converts a MIDI file into a list of notes.
 
     :param midi_file_path: The MIDI file path to convert.
-    :return: A list of notes.
+    :return: A list of notes, sorted by onset.
     """
     note_list = NoteList()
     mido_file = mido.MidiFile(midi_file_path)
@@ -52,6 +52,13 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='Converts a MIDI file into a list of notes.')
     parser.add_argument('midi_file_path', type=str, help='The path of the MIDI file.')
+    parser.add_argument('--fast', action='store_true',
+                        help='Use the fast parser (midi_file_parser.py), which also honours tempo changes.')
     args = parser.parse_args()
 
-    print(midi_file_to_note_list(args.midi_file_path))
+    if args.fast:
+        from compositions.midi_boilerplate.src.utils.midi_file_parser import midi_file_to_note_array
+
+        print(midi_file_to_note_array(args.midi_file_path).to_note_list())
+    else:
+        print(midi_file_to_note_list(args.midi_file_path))
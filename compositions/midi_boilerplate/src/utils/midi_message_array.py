@@ -0,0 +1,105 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+
+    IMPORTANT: This file contains internal midit functions and should be modified by midit developers only.
+    Users of the midit library and authors of midit algorithms may poke in these internals at their own risk.
+
+    Packed MIDI message arrays for output: one (time, status, data1, data2) record per message.
+    Same messages and order as create_message_list_for_output (utilities.py), without one dict and one mido.Message per
+    message: the times are sorted and delta-encoded as numpy operations, and the records are sent as raw bytes.
+"""
+from typing import Iterator
+
+import mido
+import numpy as np
+
+from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList, MAX_MIDI_PITCH, MIN_MIDI_PITCH, \
+    MAX_MIDI_VALUE
+from compositions.midi_boilerplate.src.data_structures.pedal_event import SustainPedalEvent
+
+MESSAGE_DTYPE = np.dtype([('time', '<f8'), ('status', 'u1'), ('data1', 'u1'), ('data2', 'u1')])
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+CONTROL_CHANGE = 0xB0
+
+
+def create_message_array(note_list: NoteList, event_list: EventList) -> np.ndarray:
+    """
+    Creates the messages of the notes and sustain pedal events, sorted by absolute time.
+    The notes are skipped (with a message) as in create_message_list_with_absolute_times, the velocities are cast to
+    int and clipped to the MIDI range.
+    :param note_list: A list of Note objects.
+    :param event_list: A list of MidiEvent objects.
+    :return: An array of MESSAGE_DTYPE records with absolute times.
+    """
+    times, statuses, data1, data2 = [], [], [], []
+    # The notes are only read, so a shared note list (see NoteList.snapshot) is not copied.
+    for note in list.__iter__(note_list):
+        if note.pitch > MAX_MIDI_PITCH or note.pitch < MIN_MIDI_PITCH:
+            print(f'Note pitch {note.pitch} is out of range. Skipping note.')
+            continue
+        if note.time < 0:
+            print(f'Note onset time {note.time} is negative. Skipping note.')
+            continue
+        if note.duration <= 0:
+            print(f'Note duration {note.duration} is negative. Skipping note.')
+            continue
+        # Onset then offset, as in the message list: the sort is stable.
+        times += (note.time, note.offset)
+        statuses += (NOTE_ON | note.channel, NOTE_OFF | note.channel)
+        data1 += (note.pitch, note.pitch)
+        data2 += (int(note.velocity), 0)
+    for event in event_list:
+        if isinstance(event, SustainPedalEvent):
+            times += (event.time, event.offset)
+            statuses += (CONTROL_CHANGE | event.channel, CONTROL_CHANGE | event.channel)
+            data1 += (event.control, event.control)
+            data2 += (event.value, 0)
+
+    times = np.array(times, dtype=np.float64)
+    order = np.argsort(times, kind='stable')
+    messages = np.empty(len(times), dtype=MESSAGE_DTYPE)
+    messages['time'] = times[order]
+    messages['status'] = np.array(statuses, dtype=np.int64)[order]
+    messages['data1'] = np.array(data1, dtype=np.int64)[order]
+    messages['data2'] = np.clip(np.array(data2, dtype=np.int64), 0, MAX_MIDI_VALUE)[order]
+    return messages
+
+
+def delta_encode(messages: np.ndarray) -> np.ndarray:
+    """
+    Returns a copy of sorted messages with the time of each message relative to the previous one.
+    As in prepare_message_list_for_output, the first message keeps its absolute time.
+    :param messages: An array of MESSAGE_DTYPE records with absolute times.
+    :return: An array of MESSAGE_DTYPE records with relative times.
+    """
+    encoded = messages.copy()
+    encoded['time'] = np.diff(messages['time'], prepend=0.)
+    return encoded
+
+
+def create_message_array_for_output(note_list: NoteList, event_list: EventList) -> np.ndarray:
+    """
+    Creates the messages of the notes and sustain pedal events, sorted, with times relative to the previous message.
+    Array counterpart of create_message_list_for_output.
+    :param note_list: A list of Note objects.
+    :param event_list: A list of MidiEvent objects.
+    :return: An array of MESSAGE_DTYPE records with relative times.
+    """
+    return delta_encode(create_message_array(note_list, event_list))
+
+
+def iter_mido_messages(messages: np.ndarray) -> Iterator[mido.Message]:
+    """
+    Converts message records into mido messages, built from their bytes.
+    :param messages: An array of MESSAGE_DTYPE records.
+    :return: An iterator of mido messages, with the times of the records.
+    """
+    for time, status, data1, data2 in messages.tolist():
+        yield mido.Message.from_bytes((status, data1, data2), time=time)
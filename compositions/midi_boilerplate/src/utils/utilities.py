@@ -47,11 +47,10 @@ def create_message_list_with_absolute_times(note_list: NoteList, event_list: Eve
     :param event_list: A list of MidiEvent objects.
     :return: A list of mido.Message objects.
     """
-    note_list = note_list.deep_copy()
-    # Note-to-dict-to-mido conversion.
-    note_list = note_list.deep_copy()
+    # Note-to-dict-to-mido conversion. The notes are only read, so a shared note list (see NoteList.snapshot) is not
+    # copied.
     message_list = []
-    for note in note_list:
+    for note in list.__iter__(note_list):
         if note.pitch > MAX_MIDI_PITCH or note.pitch < MIN_MIDI_PITCH:
             print(f'Note pitch {note.pitch} is out of range. Skipping note.')
             continue
@@ -61,10 +60,11 @@ def create_message_list_with_absolute_times(note_list: NoteList, event_list: Eve
         if note.duration <= 0:
             print(f'Note duration {note.duration} is negative. Skipping note.')
             continue
-        if not isinstance(note.velocity, int):
-            note.velocity = int(note.velocity)
+        onset_message = note.onset_message
+        if not isinstance(onset_message['velocity'], int):
+            onset_message['velocity'] = int(onset_message['velocity'])
         # Conversion of offset times from durations to absolute values.
-        message_list.append(note.onset_message)
+        message_list.append(onset_message)
         message_list.append(note.offset_message)
     pedal_list = []
     for event in event_list:
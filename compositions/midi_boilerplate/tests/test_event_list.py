@@ -0,0 +1,30 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import mido
+
+from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+
+
+def test_add_midi_message_accepts_dicts_and_mido_messages():
+    for as_mido in (False, True):
+        event_list = EventList()
+        messages = [mido.Message('control_change', control=64, value=127, channel=2, time=1.),
+                    mido.Message('control_change', control=64, value=0, channel=2, time=2.5)]
+        events = [event_list.add_midi_message(m if as_mido else m.dict()) for m in messages]
+        assert events[0] is None
+        pedal = events[1]
+        assert (pedal.time, pedal.duration, pedal.channel) == (1., 1.5, 2)
+        assert list(event_list) == [pedal]
+
+
+def test_add_midi_message_does_not_add_other_control_changes():
+    event_list = EventList()
+    event = event_list.add_midi_message(mido.Message('control_change', control=7, value=100, channel=3, time=4.))
+    assert (event.time, event.channel) == (4., 3)
+    assert event_list.is_empty()
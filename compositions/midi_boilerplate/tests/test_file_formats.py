@@ -0,0 +1,143 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import random
+from collections import defaultdict, deque
+
+import mido
+import pytest
+
+from compositions.midi_boilerplate.src.data_structures.binary_note_file import load_note_array, save_note_array
+from compositions.midi_boilerplate.src.data_structures.ndjson_note_file import iter_ndjson, iter_ndjson_chunks
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_array import NoteArray
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.utils.midi_file_parser import midi_file_to_note_array
+from compositions.midi_boilerplate.src.utils.midi_file_to_note_list import midi_file_to_note_list
+
+
+def write_random_midi_file(path: str, seed: int, number_of_tracks: int = 3) -> None:
+    """
+    Writes a type 1 MIDI file with tempo changes, running notes on several channels and zero-velocity note_on offsets.
+    """
+    rng = random.Random(seed)
+    mid = mido.MidiFile(type=1, ticks_per_beat=rng.choice([96, 480]))
+    tempo_track = mido.MidiTrack()
+    for _ in range(4):
+        tempo_track.append(mido.MetaMessage('set_tempo', tempo=rng.randint(300000, 900000), time=rng.randint(0, 2000)))
+    mid.tracks.append(tempo_track)
+    for _ in range(number_of_tracks):
+        track = mido.MidiTrack()
+        for _ in range(rng.randint(20, 60)):
+            note, channel = rng.randint(30, 90), rng.randint(0, 15)
+            track.append(mido.Message('note_on', note=note, velocity=rng.randint(1, 127), channel=channel,
+                                      time=rng.randint(0, 200)))
+            if rng.random() < 0.5:
+                track.append(mido.Message('note_off', note=note, channel=channel, time=rng.randint(1, 300)))
+            else:
+                track.append(mido.Message('note_on', note=note, velocity=0, channel=channel, time=rng.randint(1, 300)))
+        mid.tracks.append(track)
+    mid.save(path)
+
+
+def mido_notes(path: str) -> list[tuple]:
+    """
+    Returns the (time, duration, pitch, velocity, channel) of the notes of a MIDI file, with the times in seconds
+    computed by mido.
+    """
+    notes, sounding, now = [], defaultdict(deque), 0.
+    for message in mido.MidiFile(path):
+        now += message.time
+        if message.type == 'note_on' and message.velocity > 0:
+            sounding[(message.channel, message.note)].append((now, message.velocity))
+        elif message.type in ('note_on', 'note_off') and sounding[(message.channel, message.note)]:
+            onset, velocity = sounding[(message.channel, message.note)].popleft()
+            notes.append((onset, now - onset, message.note, velocity, message.channel))
+    return sorted(notes)
+
+
+def note_tuples(notes) -> list[tuple]:
+    return sorted((n.time, n.duration, n.pitch, n.velocity, n.channel) for n in notes)
+
+
+def assert_same_notes(actual: list[tuple], expected: list[tuple]) -> None:
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        assert a[2:] == e[2:]
+        assert a[0] == pytest.approx(e[0], abs=1e-6)
+        assert a[1] == pytest.approx(e[1], abs=1e-6)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_midi_file_parser_matches_mido(tmp_path, seed):
+    path = str(tmp_path / 'random.mid')
+    write_random_midi_file(path, seed)
+    note_array = midi_file_to_note_array(path)
+    assert_same_notes(note_tuples(note_array.to_notes()), mido_notes(path))
+    assert all(a <= b for a, b in zip(note_array.times, note_array.times[1:]))
+
+
+def test_midi_file_to_note_list_returns_a_plain_sorted_note_list(tmp_path):
+    path = str(tmp_path / 'random.mid')
+    write_random_midi_file(path, 0)
+    note_list = midi_file_to_note_list(path)
+    assert type(note_list) is NoteList
+    assert [n.time for n in note_list] == sorted(n.time for n in note_list)
+
+
+def test_midi_file_parser_rejects_other_files(tmp_path):
+    path = tmp_path / 'not_midi.mid'
+    path.write_bytes(b'RIFF0000')
+    with pytest.raises(ValueError):
+        midi_file_to_note_array(str(path))
+
+
+@pytest.mark.parametrize('mmap', (True, False))
+def test_binary_note_file_round_trip(tmp_path, mmap):
+    midi_path, binary_path = str(tmp_path / 'random.mid'), str(tmp_path / 'notes.bin')
+    write_random_midi_file(midi_path, seed=7)
+    note_array = midi_file_to_note_array(midi_path)
+    note_array.custom = {0: {'voice': 1}, 3: {'label': 'a'}}
+    save_note_array(note_array, binary_path)
+    loaded = load_note_array(binary_path, mmap=mmap)
+    assert_same_notes(note_tuples(loaded.to_notes()), mido_notes(midi_path))
+    assert loaded.custom == note_array.custom
+
+
+def test_note_list_binary_file_round_trip(tmp_path):
+    path = str(tmp_path / 'notes.bin')
+    note_list = NoteList([Note(60 + i % 12, i * 0.25, 0.5, 64 + i % 32, i % 16) for i in range(100)])
+    note_list.save_as_binary(path)
+    assert note_tuples(NoteList.from_file(path)) == note_tuples(note_list)
+
+
+def test_ndjson_round_trip(tmp_path):
+    midi_path, ndjson_path = str(tmp_path / 'random.mid'), str(tmp_path / 'notes.ndjson')
+    write_random_midi_file(midi_path, seed=11)
+    note_list = midi_file_to_note_array(midi_path).to_note_list()
+    note_list.save_as_ndjson(ndjson_path)
+    assert_same_notes(note_tuples(NoteList.from_ndjson(ndjson_path)), mido_notes(midi_path))
+    chunks = list(iter_ndjson_chunks(ndjson_path, 16))
+    assert all(len(chunk) == 16 for chunk in chunks[:-1])
+    assert note_tuples(n for chunk in chunks for n in chunk) == note_tuples(note_list)
+
+
+def test_ndjson_time_window(tmp_path):
+    notes = [Note(60, float(t), 1, 80) for t in (5, 1, 3, 2, 4)]
+    for sort in (False, True):
+        path = str(tmp_path / f'notes_{sort}.ndjson')
+        NoteList(notes).save_as_ndjson(path, sort=sort)
+        assert sorted(n.time for n in iter_ndjson(path, start=2, end=4)) == [2., 3.]
+
+
+def test_note_array_json_round_trip():
+    note_array = NoteArray.from_notes([Note(60 + i, i * 0.5, 1, 80, custom={'i': i} if i % 3 == 0 else None)
+                                       for i in range(10)])
+    loaded = NoteArray.from_json(note_array.to_json())
+    assert note_tuples(loaded.to_notes()) == note_tuples(note_array.to_notes())
+    assert loaded.custom == note_array.custom
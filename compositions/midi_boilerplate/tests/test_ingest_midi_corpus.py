@@ -0,0 +1,66 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import json
+import os
+
+from compositions.midi_boilerplate.src.data_structures.binary_note_file import load_note_array
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.utils.ingest_midi_corpus import ingest_corpus, MANIFEST_FILE_NAME, \
+    FAILURE_LOG_FILE_NAME
+from compositions.midi_boilerplate.tests.test_file_formats import assert_same_notes, mido_notes, note_tuples, \
+    write_random_midi_file
+
+
+def write_corpus(root) -> dict[str, int]:
+    """
+    Writes a corpus with two files differing only by their extension, a file with the same name in another directory
+    and a file that is not a MIDI file. Returns the seed of each MIDI file by relative path.
+    """
+    seeds = {os.path.join('a', 'song.mid'): 1, os.path.join('a', 'song.midi'): 2, os.path.join('b', 'song.mid'): 3,
+             'other.smf': 4}
+    for relative_path, seed in seeds.items():
+        os.makedirs(os.path.dirname(root / relative_path), exist_ok=True)
+        write_random_midi_file(str(root / relative_path), seed)
+    (root / 'broken.mid').write_bytes(b'RIFF0000')
+    return seeds
+
+
+def test_ingest_keeps_files_differing_by_their_extension_apart(tmp_path):
+    root, output_dir = tmp_path / 'corpus', tmp_path / 'notes'
+    seeds = write_corpus(root)
+    entries, failures = ingest_corpus(str(root), str(output_dir), workers=2, progress=False)
+    assert {entry['midi_file']: entry['output_file'] for entry in entries} == {
+        os.path.join('a', 'song.mid'): os.path.join('a', 'song.mid.nlb'),
+        os.path.join('a', 'song.midi'): os.path.join('a', 'song.midi.nlb'),
+        os.path.join('b', 'song.mid'): os.path.join('b', 'song.nlb'),
+        'other.smf': 'other.nlb'}
+    for entry in entries:
+        midi_path = str(root / entry['midi_file'])
+        loaded = load_note_array(str(output_dir / entry['output_file']))
+        assert_same_notes(note_tuples(loaded.to_notes()), mido_notes(midi_path))
+        assert entry['notes'] == len(loaded)
+    assert [failure['midi_file'] for failure in failures] == ['broken.mid']
+
+    with open(output_dir / MANIFEST_FILE_NAME) as f:
+        manifest = json.load(f)
+    assert manifest['files'] == entries and manifest['failures'] == 1
+    assert len({entry['output_file'] for entry in manifest['files']}) == len(seeds)
+    with open(output_dir / FAILURE_LOG_FILE_NAME) as f:
+        assert f.read().startswith('broken.mid\t')
+
+
+def test_ingest_to_json(tmp_path):
+    root, output_dir = tmp_path / 'corpus', tmp_path / 'notes'
+    write_corpus(root)
+    entries, _ = ingest_corpus(str(root), str(output_dir), 'json', workers=1, progress=False)
+    for entry in entries:
+        assert entry['output_file'].endswith('.json')
+        with open(output_dir / entry['output_file']) as f:
+            note_list = NoteList.from_json(f.read())
+        assert_same_notes(note_tuples(note_list), mido_notes(str(root / entry['midi_file'])))
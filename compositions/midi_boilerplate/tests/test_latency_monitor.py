@@ -0,0 +1,83 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import asyncio
+import json
+
+import pytest
+
+from compositions.midi_boilerplate.src.complex_example.latency_monitor import LatencyMonitor, FIRST_INPUT, \
+    LAST_INPUT, PLAYED, STAGES
+from compositions.midi_boilerplate.src.complex_example.live_runtime import LiveRuntime
+from compositions.midi_boilerplate.src.complex_example.midi_input_controller import MidiInputController
+from compositions.midi_boilerplate.src.complex_example.midi_output_controller import MidiOutputController
+from compositions.midi_boilerplate.src.complex_example.virtual_ports import VirtualMidiBackend, note_stream
+
+
+def test_trace_latencies_and_summary(tmp_path):
+    finished = []
+    monitor = LatencyMonitor(str(tmp_path / 'traces.jsonl'), finished.append)
+    for phrase in range(3):
+        trace = monitor.start_phrase()
+        for i, stage in enumerate(STAGES[:-2]):
+            trace.mark(stage, 10. + i * 0.001 * (phrase + 1))
+        trace.mark(FIRST_INPUT, 0.)  # Already recorded: not overwritten.
+        trace.record_send(10.1, 10.102)
+        trace.record_send(10.2, 10.199)
+        trace.finish()
+    assert [trace.phrase_id for trace in finished] == [0, 1, 2]
+    latencies = finished[1].stage_latencies()
+    assert latencies[f'{FIRST_INPUT}->{LAST_INPUT}'] == pytest.approx(0.002)
+    assert latencies['response'] == pytest.approx(0.102 - 0.002)
+    assert PLAYED in finished[1].marks
+
+    monitor.record_input(0., 0.0003)
+    summary = monitor.summary()
+    assert summary['phrases'] == 3
+    assert summary['stages'][f'{FIRST_INPUT}->{LAST_INPUT}']['max'] == pytest.approx(3.)
+    assert summary['send_error']['count'] == 6 and summary['send_error']['max'] == pytest.approx(2.)
+    # The message sent early is counted in the first bin.
+    assert summary['send_error']['histogram']['<0.1'] == 3
+    assert summary['input_callback']['histogram']['<0.5'] == 1
+
+    with open(tmp_path / 'traces.jsonl') as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['phrase'] for line in lines] == [0, 1, 2]
+    assert lines[0]['messages'] == 2 and lines[0]['max_send_error'] == pytest.approx(0.002)
+    monitor.dump(str(tmp_path / 'summary.json'))
+    with open(tmp_path / 'summary.json') as f:
+        assert json.load(f)['phrases'] == 3
+
+
+def test_live_pipeline_records_every_stage():
+    finished = []
+    monitor = LatencyMonitor(callback=finished.append)
+    backend = VirtualMidiBackend(['in'], ['out'])
+    input_controller = MidiInputController(monitor=monitor, backend=backend)
+    output_controller = MidiOutputController(monitor=monitor, backend=backend)
+    input_controller.set_ports(['in'])
+    output_controller.set_port('out')
+    runtime = LiveRuntime(input_controller, output_controller, lambda nl, el: (nl, el), silence_gap=0.05)
+
+    async def play() -> None:
+        run = asyncio.create_task(runtime.run())
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(backend.inject('in', note_stream(4, 40)).join)
+        await asyncio.sleep(0.5)
+        runtime.stop()
+        await run
+
+    asyncio.run(play())
+    output_controller.scheduler.stop()
+    summary = monitor.summary()
+    assert summary['phrases'] == 1
+    assert summary['send_error']['count'] == 8 and summary['input_callback']['count'] == 8
+    trace, = finished
+    assert set(trace.marks) == set(STAGES)
+    marks = [trace.marks[stage] for stage in STAGES]
+    assert marks == sorted(marks)
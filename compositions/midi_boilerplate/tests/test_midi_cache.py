@@ -0,0 +1,102 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import os
+import time
+
+import mido
+
+from compositions.midi_boilerplate.src.utils import midi_cache
+from compositions.midi_boilerplate.src.utils.midi_cache import MidiCache
+from compositions.midi_boilerplate.tests.test_file_formats import assert_same_notes, mido_notes, note_tuples, \
+    write_random_midi_file
+
+
+def counting_parser(monkeypatch) -> list:
+    """
+    Counts the calls of the parser used by the cache.
+    """
+    calls, parse = [], midi_cache.parse_midi_bytes
+
+    def parse_midi_bytes(data: bytes):
+        calls.append(len(data))
+        return parse(data)
+
+    monkeypatch.setattr(midi_cache, 'parse_midi_bytes', parse_midi_bytes)
+    return calls
+
+
+def write_scale(path: str, first_pitch: int) -> None:
+    """
+    Writes a MIDI file of 12 notes: the files written by this function have entries of the same size.
+    """
+    track = mido.MidiTrack()
+    for pitch in range(first_pitch, first_pitch + 12):
+        track.append(mido.Message('note_on', note=pitch, velocity=80, time=0))
+        track.append(mido.Message('note_off', note=pitch, time=240))
+    mid = mido.MidiFile()
+    mid.tracks.append(track)
+    mid.save(path)
+
+
+def test_cached_files_are_parsed_once(tmp_path, monkeypatch):
+    calls = counting_parser(monkeypatch)
+    midi_path = str(tmp_path / 'song.mid')
+    write_random_midi_file(midi_path, 0)
+    cache = MidiCache(str(tmp_path / 'cache'))
+    for mmap in (True, False):
+        assert_same_notes(note_tuples(cache.load_note_array(midi_path, mmap).to_notes()), mido_notes(midi_path))
+    assert_same_notes(note_tuples(cache.load_note_list(midi_path)), mido_notes(midi_path))
+    assert len(calls) == 1 and cache.size() > 0
+
+    # A modified file gets a new entry, a moved one keeps its entry.
+    write_random_midi_file(midi_path, 1)
+    assert_same_notes(note_tuples(cache.load_note_list(midi_path)), mido_notes(midi_path))
+    os.replace(midi_path, tmp_path / 'moved.mid')
+    cache.load_note_list(str(tmp_path / 'moved.mid'))
+    assert len(calls) == 2
+
+    assert cache.invalidate(str(tmp_path / 'moved.mid'))
+    assert not cache.invalidate(str(tmp_path / 'moved.mid'))
+    cache.load_note_list(str(tmp_path / 'moved.mid'))
+    assert len(calls) == 3
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_a_new_parser_version_does_not_read_old_entries(tmp_path, monkeypatch):
+    calls = counting_parser(monkeypatch)
+    midi_path = str(tmp_path / 'song.mid')
+    write_random_midi_file(midi_path, 0)
+    cache = MidiCache(str(tmp_path / 'cache'))
+    cache.load_note_array(midi_path)
+    monkeypatch.setattr(midi_cache, 'PARSER_VERSION', midi_cache.PARSER_VERSION + 1)
+    cache.load_note_array(midi_path)
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    calls = counting_parser(monkeypatch)
+    paths = [str(tmp_path / f'{i}.mid') for i in range(3)]
+    for i, path in enumerate(paths):
+        write_scale(path, 48 + 12 * i)
+    cache = MidiCache(str(tmp_path / 'cache'))
+    for path in paths[:2]:
+        cache.load_note_array(path)
+        time.sleep(0.01)
+    # The first file becomes the most recently used one: the second one is evicted to make room for the third one.
+    cache.max_bytes = cache.size()
+    cache.load_note_array(paths[0])
+    time.sleep(0.01)
+    cache.load_note_array(paths[2])
+    assert cache.size() <= cache.max_bytes
+    calls.clear()
+    cache.load_note_array(paths[0])
+    assert calls == []
+    cache.load_note_array(paths[1])
+    assert len(calls) == 1
@@ -0,0 +1,157 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import copy
+import pickle
+import random
+
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.data_structures.sorted_note_list import SortedNoteList
+
+
+def random_notes(size: int, seed: int = 0) -> list[Note]:
+    rng = random.Random(seed)
+    return [Note(rng.randint(30, 90), rng.randint(0, 4 * size) / 4, rng.randint(1, 8) / 4, rng.randint(1, 127),
+                 rng.randint(0, 15)) for _ in range(size)]
+
+
+def is_sorted(notes) -> bool:
+    notes = list(notes)
+    return all(a.time <= b.time for a, b in zip(notes, notes[1:]))
+
+
+def test_interval_index_queries_match_scans():
+    note_list = NoteList(random_notes(300))
+    expected = {t: ([n for n in note_list if n.time < t], [n for n in note_list if n.time > t],
+                    [n for n in note_list if n.time <= t < n.offset]) for t in (0, 10.5, 37, 75.25, 500)}
+    note_list.get_interval_index()
+    assert note_list.has_interval_index()
+    for t, (before, after, simultaneous) in expected.items():
+        assert list(note_list.before_time(t)) == before
+        assert list(note_list.after_time(t)) == after
+        assert list(note_list.get_simultaneous_notes(t)) == simultaneous
+
+
+def test_interval_index_is_rebuilt_after_a_note_changes():
+    note_list = NoteList(random_notes(100))
+    note_list.get_interval_index()
+    note = list.__getitem__(note_list, 0)
+    note.time = 1000
+    assert not note_list.has_interval_index()
+    assert note in note_list.after_time(999)
+
+
+def test_changing_a_note_of_another_list_keeps_the_cached_data():
+    first, second = NoteList(random_notes(50, seed=1)), NoteList(random_notes(50, seed=2))
+    aggregates = first.get_aggregates()
+    first.get_interval_index()
+    for note in second:
+        note.time += 1
+        note.pitch = 60
+    assert first.get_aggregates() is aggregates
+    assert first.has_interval_index()
+
+
+def test_aggregates_follow_the_changes_of_the_notes():
+    note_list = NoteList(random_notes(50))
+    note_list.get_aggregates()
+    list.__getitem__(note_list, 5).pitch = 127
+    list.__getitem__(note_list, 6).time = 500
+    assert note_list.get_ambitus_values()[1] == 127
+    assert note_list.get_end_time() == max(n.offset for n in note_list)
+    note_list.transpose(-2)
+    assert note_list.get_ambitus_values() == (min(n.pitch for n in note_list), max(n.pitch for n in note_list))
+    note_list.shift_time(3)
+    assert note_list.get_start_time() == min(n.time for n in note_list)
+
+
+def test_sorted_note_list_map_keeps_all_the_results():
+    notes = SortedNoteList([Note(60 + i, float(i), 1, 80) for i in range(4)])
+    notes.map(lambda n: Note(n.pitch, 10 - n.time, n.duration, n.velocity))
+    assert [(n.pitch, n.time) for n in notes] == [(63, 7.), (62, 8.), (61, 9.), (60, 10.)]
+
+
+def test_sorted_note_list_restores_the_order_after_a_direct_change():
+    notes = SortedNoteList(random_notes(50))
+    first = notes[0]
+    first.time = 1000
+    assert notes[-1] is first
+    assert is_sorted(notes)
+
+
+def test_note_shared_by_two_sorted_note_lists():
+    note = Note(60, 1, 1, 80)
+    first = SortedNoteList([Note(62, 2, 1, 80), note])
+    second = SortedNoteList([note, Note(64, 3, 1, 80)])
+    note.time = 10
+    assert first[-1] is note and second[-1] is note
+
+
+def test_copies_of_notes_do_not_report_to_the_lists():
+    notes = SortedNoteList(random_notes(20))
+    version = notes._version
+    for note in list(notes):
+        copy.copy(note).time = 1000
+        copy.deepcopy(note).time = 1000
+    assert notes._version == version
+
+
+def test_pickled_sorted_note_list_follows_its_notes():
+    notes = pickle.loads(pickle.dumps(SortedNoteList(random_notes(20))))
+    note = list.__getitem__(notes, 0)
+    note.time = 1000
+    assert notes[-1] is note
+
+
+def test_snapshot_is_copy_on_write():
+    note_list = NoteList(random_notes(20))
+    snapshot = note_list.snapshot()
+    original = [n.description for n in note_list]
+    snapshot.transpose(1)
+    snapshot[0].time = 999
+    assert [n.description for n in note_list] == original
+    assert [n.pitch for n in snapshot] != [n.pitch for n in note_list]
+
+
+def test_sorted_snapshot_restores_its_own_order():
+    notes = SortedNoteList(random_notes(20))
+    snapshot = notes.snapshot()
+    snapshot[0].time = 1000
+    assert snapshot[-1].time == 1000 and is_sorted(snapshot)
+    assert notes[-1].time < 1000 and is_sorted(notes)
+
+
+def test_sorted_note_list_hands_over_a_plain_note_list():
+    notes = SortedNoteList(random_notes(20))
+    note_list = notes.to_note_list()
+    assert type(note_list) is NoteList and is_sorted(note_list)
+    note_list.reverse()
+    note_list.sort(key=lambda n: n.pitch)
+    note_list.insert(0, Note(60, 1000, 1, 80, 0))
+    note_list[1].time = 2000
+    assert [n.pitch for n in note_list[1:]] == sorted(n.pitch for n in notes)
+    assert is_sorted(notes) and max(n.time for n in notes) < 1000
+
+
+def test_lazy_time_predicate_is_not_moved_before_a_transposition():
+    for indexed in (False, True):
+        note_list = NoteList([Note(60, float(i), 0.5, 80) for i in range(10)])
+        if indexed:
+            note_list.get_interval_index()
+        result = note_list.lazy().transpose(3).before_time(5).collect()
+        assert len(result) == 5
+        assert [n.pitch for n in note_list] == [63] * 10
+
+
+def test_lazy_time_predicate_after_filters_uses_the_index():
+    note_list = NoteList([Note(60, float(i), 0.5, 80) for i in range(10)])
+    note_list.get_interval_index()
+    result = note_list.lazy().filter(lambda n: n.time > 1).before_time(5).transpose(1).collect()
+    assert [n.time for n in result] == [2., 3., 4.]
+    assert [n.pitch for n in note_list] == [60] * 2 + [61] * 3 + [60] * 5
@@ -0,0 +1,251 @@
+"""
+    Summer Academy 2025
+    (c) 2025, EPFL DCML
+
+
+    joris.monnet@epfl.ch
+
+"""
+import asyncio
+import threading
+import time
+
+import mido
+import numpy as np
+
+from compositions.midi_boilerplate.src.complex_example.live_runtime import LiveRuntime
+from compositions.midi_boilerplate.src.complex_example.midi_input_controller import MidiInputController
+from compositions.midi_boilerplate.src.complex_example.midi_output_controller import MidiOutputController
+from compositions.midi_boilerplate.src.complex_example.multi_port_output_controller import MultiPortOutputController
+from compositions.midi_boilerplate.src.complex_example.playback_scheduler import PlaybackScheduler
+from compositions.midi_boilerplate.src.complex_example.streaming import StreamingRuntime, lookahead_stage, note_stage
+from compositions.midi_boilerplate.src.complex_example.virtual_ports import VirtualMidiBackend, note_stream
+from compositions.midi_boilerplate.src.data_structures.event_list import EventList
+from compositions.midi_boilerplate.src.data_structures.note import Note
+from compositions.midi_boilerplate.src.data_structures.note_list import NoteList
+from compositions.midi_boilerplate.src.utils.midi_message_array import MESSAGE_DTYPE
+
+
+def phrase(length: float, note: int = 60) -> np.ndarray:
+    """
+    Returns the message array of a single note lasting length seconds.
+    """
+    messages = np.zeros(2, dtype=MESSAGE_DTYPE)
+    messages['time'] = [0, length]
+    messages['status'] = [0x90, 0x80]
+    messages['data1'] = note
+    messages['data2'] = [80, 0]
+    return messages
+
+
+def test_scheduler_plays_the_phrases_one_after_another():
+    sent = []
+    scheduler = PlaybackScheduler(sent.append)
+    first, second = scheduler.schedule(phrase(0.05, 60)), scheduler.schedule(phrase(0.05, 62))
+    assert second.start >= first.end
+    assert second.wait(2) is True
+    assert [(m.type, m.note) for m in sent] == [('note_on', 60), ('note_off', 60), ('note_on', 62), ('note_off', 62)]
+    scheduler.stop()
+
+
+def test_scheduler_cancel_stops_the_notes_and_lowers_the_tail():
+    sent = []
+    scheduler = PlaybackScheduler(sent.append)
+    long_phrase = scheduler.schedule(phrase(10))
+    short_phrase = scheduler.schedule(phrase(1, 62))
+    time.sleep(0.05)
+    long_phrase.cancel()
+    assert long_phrase.wait(1) is False
+    assert ('note_off', 60) in [(m.type, m.note) for m in sent]
+    # The next phrase starts after the phrase still scheduled, not after the cancelled one.
+    rescheduled = scheduler.schedule(phrase(0.05, 64))
+    assert rescheduled.start == short_phrase.end
+    short_phrase.cancel()
+    assert scheduler.tail == rescheduled.end
+    rescheduled.cancel()
+    assert scheduler.schedule(phrase(0.05)).start - time.perf_counter() < 0.5
+    scheduler.stop()
+
+
+def test_scheduler_reschedules_right_away_after_cancel_all_and_stop():
+    scheduler = PlaybackScheduler(lambda message: None)
+    scheduler.schedule(phrase(10))
+    scheduler.cancel_all()
+    assert scheduler.schedule(phrase(0.05)).start - time.perf_counter() < 0.5
+    scheduler.schedule(phrase(10))
+    scheduler.stop()
+    handle = scheduler.schedule(phrase(0.05))
+    assert handle.start - time.perf_counter() < 0.5
+    assert handle.wait(2) is True
+    scheduler.stop()
+
+
+def test_multi_port_output_routes_and_aligns_the_ports():
+    backend = VirtualMidiBackend(output_names=['low', 'high'])
+    controller = MultiPortOutputController(backend=backend)
+    assert controller.add_port('low', predicate=lambda n: n.pitch < 60)
+    assert controller.add_port('high', channels={1})
+    notes = NoteList([Note(48, 0, 0.05, 80, 0), Note(72, 0, 0.05, 80, 1), Note(50, 0.02, 0.05, 80, 1)])
+    handles = controller.send(notes, EventList())
+    assert set(handles) == {'low', 'high'}
+    assert handles['low'].start == handles['high'].start
+    assert all(handle.wait(2) for handle in handles.values())
+    played = {name: sorted(m.note for _, m in backend.output(name).take() if m.type == 'note_on')
+              for name in ('low', 'high')}
+    assert played == {'low': [48, 50], 'high': [50, 72]}
+    controller.close()
+
+
+def test_streaming_runtime_transforms_each_note():
+    for buffered in (False, True):
+        backend = VirtualMidiBackend(['in'], ['out'])
+        input_controller = MidiInputController(buffered=buffered, backend=backend)
+        output_controller = MidiOutputController(backend=backend)
+        input_controller.set_ports(['in'])
+        output_controller.set_port('out')
+
+        def octave_up(note: Note) -> Note:
+            note.transpose(12)
+            return note
+
+        runtime = StreamingRuntime(input_controller, output_controller,
+                                   [note_stage(octave_up), lookahead_stage(lambda note, next_notes: note, 2)],
+                                   flush_timeout=0.1)
+        runtime.start()
+        backend.inject('in', note_stream(6, 20)).join()
+        time.sleep(0.4)
+        runtime.stop()
+        output_controller.scheduler.stop()
+        played = [m.note for _, m in backend.output('out').take() if m.type == 'note_on']
+        assert sorted(played) == list(range(72, 78))
+        # The notes were streamed, the input controller was reset after the silence.
+        assert len(input_controller.note_list) == 0
+
+
+def test_input_controller_outputs_a_plain_note_list():
+    backend = VirtualMidiBackend(['in'])
+    input_controller = MidiInputController(backend=backend)
+    input_controller.set_ports(['in'])
+    for note in (64, 60):
+        backend.receive('in', mido.Message('note_on', note=note, velocity=80))
+        backend.receive('in', mido.Message('note_off', note=note))
+    note_list, _ = input_controller.prepare_to_output()
+    assert type(note_list) is NoteList
+    note_list.sort(key=lambda n: n.pitch)
+    note_list.reverse()
+    assert [n.pitch for n in note_list] == [64, 60]
+
+
+def test_streaming_runtime_plays_the_pedal_when_it_is_pressed():
+    backend = VirtualMidiBackend(['in'], ['out'])
+    input_controller = MidiInputController(backend=backend)
+    output_controller = MidiOutputController(backend=backend)
+    input_controller.set_ports(['in'])
+    output_controller.set_port('out')
+    runtime = StreamingRuntime(input_controller, output_controller, [], delay=0.15, flush_timeout=0.1)
+    runtime.start()
+    backend.inject('in', [mido.Message('note_on', note=60, velocity=80),
+                          mido.Message('control_change', control=64, value=127, time=0.05),
+                          mido.Message('note_off', note=60, time=0.05),
+                          mido.Message('control_change', control=64, value=0, time=0.5)]).join()
+    time.sleep(0.4)
+    runtime.stop()
+    output_controller.scheduler.stop()
+    # The pedal-down is played when it is pressed, not with the whole pedal event once it is released.
+    played = [(m.type, m.value if m.type == 'control_change' else m.note) for _, m in backend.output('out').take()]
+    assert played == [('note_on', 60), ('control_change', 127), ('note_off', 60), ('control_change', 0)]
+
+
+def test_buffered_input_counts_the_sysex_messages_as_dropped(capsys):
+    backend = VirtualMidiBackend(['in'])
+    input_controller = MidiInputController(buffered=True, backend=backend)
+    input_controller.set_ports(['in'])
+    backend.receive('in', mido.Message('note_on', note=60, velocity=80))
+    backend.receive('in', mido.Message('sysex', data=[0x7E, 0x7F, 0x09, 0x01]))
+    backend.receive('in', mido.Message('note_off', note=60))
+    assert input_controller.drain() == 2
+    assert input_controller.ring_buffer.dropped == 1 and len(input_controller.note_list) == 1
+    assert '1 messages dropped' in capsys.readouterr().out
+
+
+def test_streaming_runtime_resets_the_input_under_its_lock():
+    backend = VirtualMidiBackend(['in'], ['out'])
+    input_controller = MidiInputController(backend=backend)
+    input_controller.set_ports(['in'])
+    runtime = StreamingRuntime(input_controller, MidiOutputController(backend=backend), [])
+    backend.receive('in', mido.Message('note_on', note=60, velocity=80))
+    backend.receive('in', mido.Message('note_off', note=60))
+    assert len(input_controller.note_list) == 1
+    with input_controller.lock:
+        silence = threading.Thread(target=runtime._on_silence)
+        silence.start()
+        silence.join(0.1)
+        # The reset waits for the message being handled.
+        assert silence.is_alive() and len(input_controller.note_list) == 1
+    silence.join(1)
+    assert len(input_controller.note_list) == 0
+
+
+def test_live_runtime_transforms_each_phrase():
+    for buffered in (False, True):
+        backend = VirtualMidiBackend(['in'], ['out'])
+        input_controller = MidiInputController(buffered=buffered, backend=backend)
+        output_controller = MidiOutputController(backend=backend)
+        input_controller.set_ports(['in'])
+        output_controller.set_port('out')
+
+        def octave_up(note_list: NoteList, event_list: EventList) -> tuple[NoteList, EventList]:
+            note_list.transpose(12)
+            return note_list, event_list
+
+        runtime = LiveRuntime(input_controller, output_controller, octave_up, silence_gap=0.1)
+
+        async def play() -> None:
+            run = asyncio.create_task(runtime.run())
+            await asyncio.sleep(0.05)
+            for pitches in (range(60, 63), range(64, 66)):
+                await asyncio.to_thread(backend.inject('in', note_stream(len(pitches), 20, pitches=pitches)).join)
+                await asyncio.sleep(0.3)
+            runtime.stop()
+            await run
+
+        asyncio.run(play())
+        output_controller.scheduler.stop()
+        played = [m.note for _, m in backend.output('out').take() if m.type == 'note_on']
+        assert played == [72, 73, 74, 76, 77]
+        assert len(input_controller.note_list) == 0
+
+
+def test_live_runtime_takes_the_phrase_under_the_input_lock():
+    backend = VirtualMidiBackend(['in'], ['out'])
+    input_controller = MidiInputController(backend=backend)
+    input_controller.set_ports(['in'])
+    runtime = LiveRuntime(input_controller, MidiOutputController(backend=backend), lambda nl, el: (nl, el),
+                          silence_gap=0.05)
+    prepare_to_output = input_controller.prepare_to_output
+    note_on = threading.Thread(target=backend.receive, args=('in', mido.Message('note_on', note=62, velocity=80)))
+
+    def prepare_while_a_note_arrives():
+        # A note_on arrives while the phrase is taken: it must wait for the reset, not be wiped by it.
+        note_on.start()
+        note_on.join(0.1)
+        return prepare_to_output()
+
+    input_controller.prepare_to_output = prepare_while_a_note_arrives
+
+    async def play() -> None:
+        run = asyncio.create_task(runtime.run())
+        await asyncio.sleep(0)
+        backend.receive('in', mido.Message('note_on', note=60, velocity=80))
+        backend.receive('in', mido.Message('note_off', note=60))
+        await asyncio.sleep(runtime.silence_gap + 0.2)
+        runtime.stop()
+        await run
+
+    asyncio.run(play())
+    note_on.join(1)
+    assert input_controller.note_on_off_balance == 1
+    backend.receive('in', mido.Message('note_off', note=62))
+    assert input_controller.note_on_off_balance == 0
+    assert [note.pitch for note in input_controller.note_list] == [62]
+    runtime.output_controller.scheduler.stop()
@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import mido
+
+from workshop1.temperament_boilerplate.change_temperament import TEMPERAMENTS
+from workshop1.temperament_boilerplate.pitch_bend_utilities import apply_temperaments_absolute, make_corrections
+
+MIDI_EXTENSIONS = ('.mid', '.midi')
+
+
+def render_file(input_path: str, output_dir: str, temperament_names: list[str], stem: str = None) -> list[str]:
+    """Parse a MIDI file once and save one tuned copy per temperament, as <stem>_<temperament>.mid in output_dir
+    (the stem is the file name without extension by default). Return the paths of the files saved.
+    """
+    corrections = [make_corrections(TEMPERAMENTS[name]) for name in temperament_names]
+    tuned_mids = apply_temperaments_absolute(mido.MidiFile(input_path), corrections)
+    if stem is None:
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+    output_paths = []
+    for name, tuned_mid in zip(temperament_names, tuned_mids):
+        output_path = os.path.join(output_dir, f"{stem}_{name}.mid")
+        tuned_mid.save(output_path)
+        output_paths.append(output_path)
+    return output_paths
+
+
+def _render_file_safely(input_path: str, output_dir: str, temperament_names: list[str], stem: str) -> list[str]:
+    try:
+        return render_file(input_path, output_dir, temperament_names, stem)
+    except Exception as e:
+        print(f"Error while rendering {input_path}: {type(e).__name__}: {e}")
+        return []
+
+
+def _output_stems(input_paths: list[str]) -> list[str]:
+    """Return the stem of the output files of each input file: its name without extension, or its full name if
+    another input file has the same name without extension (e.g. song.mid and song.midi).
+    """
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in input_paths]
+    shared = {stem for stem in stems if stems.count(stem) > 1}
+    return [os.path.basename(path) if stem in shared else stem for path, stem in zip(input_paths, stems)]
+
+
+def render_directory(input_dir: str, output_dir: str, temperament_names: list[str],
+                     workers: int = None) -> list[str]:
+    """Render every MIDI file of input_dir in all the temperaments (keys of TEMPERAMENTS) into output_dir, the files
+    being spread across workers processes (the number of CPUs by default, 1 renders in this process).
+    A file that cannot be read is reported and skipped. Files differing only by their extension keep it in the names
+    of their outputs (song.mid_<temperament>.mid and song.midi_<temperament>.mid). Return the paths of the files saved.
+    """
+    unknown = [name for name in temperament_names if name not in TEMPERAMENTS]
+    if unknown:
+        raise ValueError(f"Unknown temperaments: {unknown}. Available: {list(TEMPERAMENTS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    input_paths = sorted(os.path.join(input_dir, file_name) for file_name in os.listdir(input_dir)
+                         if file_name.lower().endswith(MIDI_EXTENSIONS))
+    stems = _output_stems(input_paths)
+    n = len(input_paths)
+    if workers == 1:
+        results = map(_render_file_safely, input_paths, [output_dir] * n, [temperament_names] * n, stems)
+        return [path for paths in results for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_render_file_safely, input_paths, [output_dir] * n, [temperament_names] * n, stems,
+                               chunksize=max(1, n // (4 * (workers or os.cpu_count() or 1))))
+        return [path for paths in results for path in paths]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Renders a directory of MIDI files in several temperaments.')
+    parser.add_argument('input_dir', type=str, help='The directory of the MIDI files.')
+    parser.add_argument('output_dir', type=str, help='The directory of the tuned files.')
+    parser.add_argument('--temperaments', nargs='+', default=list(TEMPERAMENTS), choices=list(TEMPERAMENTS),
+                        help='The temperaments to render (all by default).')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='The number of processes (number of CPUs by default).')
+    args = parser.parse_args()
+
+    saved = render_directory(args.input_dir, args.output_dir, args.temperaments, args.workers)
+    print(f"Saved {len(saved)} tuned MIDI files to {args.output_dir}")
@@ -0,0 +1,131 @@
+from typing import Callable
+
+import mido
+
+from compositions.midi_boilerplate.src.complex_example.midi_output_controller import MidiOutputController
+from workshop1.temperament_boilerplate.change_temperament import TEMPERAMENTS
+from workshop1.temperament_boilerplate.pitch_bend_utilities import PITCH_BEND_RANGE, get_tuning_table, \
+    make_corrections, pitch_bend_range_messages
+
+DRUM_CHANNEL = 9
+DEFAULT_CHANNELS = tuple(channel for channel in range(16) if channel != DRUM_CHANNEL)
+
+
+class LiveTemperamentFilter:
+    """Retunes live MIDI input, message by message, for a MIDI output.
+    A pitch bend applies to a whole channel, so each note is played on an output channel whose bend is its own:
+    a channel already bent that way if there is one, else a free channel (the least recently used), else the least
+    recently used channel (its notes are then bent too). The bends are looked up in a TuningTable.
+    Sustain pedal and other channel messages are sent to all the output channels, the pitchwheel of the player is
+    ignored (the bend is used for the tuning). The messages of the drum channel are not pitched: they are sent
+    unchanged.
+    """
+
+    def __init__(self, send: Callable[[mido.Message], None], correction_factors: list[float],
+                 channels: tuple[int, ...] = DEFAULT_CHANNELS):
+        """
+        :param send: The function sending a message to the output (e.g. MidiOutputController.send_message).
+        :param correction_factors: The correction factors of the temperament (see make_corrections).
+        :param channels: The output channels the notes are spread on.
+        """
+        self.send = send
+        self.table = get_tuning_table(correction_factors)
+        self.channels = tuple(channels)
+        self.bends = {channel: None for channel in self.channels}  # Current bend of each output channel.
+        self.sounding = {channel: 0 for channel in self.channels}  # Number of notes on, per output channel.
+        self.last_used = {channel: 0 for channel in self.channels}
+        self.notes = {}  # (input channel, note) -> output channel.
+        self.clock = 0
+
+    def set_temperament(self, correction_factors: list[float]) -> None:
+        """Change the temperament, for the next notes."""
+        self.table = get_tuning_table(correction_factors)
+
+    def setup(self) -> None:
+        """Set the pitch bend range of the output channels and reset their bend."""
+        for channel in self.channels:
+            for message in pitch_bend_range_messages(PITCH_BEND_RANGE, channel):
+                self.send(message)
+            self.send(mido.Message('pitchwheel', pitch=0, channel=channel))
+            self.bends[channel] = 0
+
+    def process(self, msg: mido.Message) -> None:
+        """Retune a message and send it (the callback of the input port)."""
+        kind = msg.type
+        if getattr(msg, 'channel', None) == DRUM_CHANNEL:
+            self.send(msg)
+        elif kind == 'note_on' and msg.velocity > 0:
+            bend = self.table.bends[msg.note]
+            channel = self.allocate(bend)
+            if self.bends[channel] != bend:
+                self.bends[channel] = bend
+                self.send(mido.Message('pitchwheel', pitch=bend, channel=channel))
+            previous = self.notes.get((msg.channel, msg.note))
+            if previous is not None:  # Retriggered note: the previous one is stopped.
+                self.sounding[previous] -= 1
+                self.send(mido.Message('note_off', note=msg.note, channel=previous))
+            self.notes[(msg.channel, msg.note)] = channel
+            self.sounding[channel] += 1
+            self.send(msg.copy(channel=channel))
+        elif kind == 'note_off' or kind == 'note_on':
+            channel = self.notes.pop((msg.channel, msg.note), None)
+            if channel is not None:
+                self.sounding[channel] -= 1
+                self.send(msg.copy(channel=channel))
+        elif kind == 'pitchwheel':
+            pass
+        elif hasattr(msg, 'channel'):
+            for channel in self.channels:
+                self.send(msg.copy(channel=channel))
+        else:
+            self.send(msg)
+
+    def allocate(self, bend: int) -> int:
+        """Return the output channel for a note with this bend."""
+        self.clock += 1
+        free = None
+        for channel in self.channels:
+            if self.bends[channel] == bend:
+                self.last_used[channel] = self.clock
+                return channel
+            if self.sounding[channel] == 0 and (free is None or self.last_used[channel] < self.last_used[free]):
+                free = channel
+        if free is None:
+            free = min(self.channels, key=self.last_used.__getitem__)
+        self.last_used[free] = self.clock
+        return free
+
+    def reset(self) -> None:
+        """Stop the notes and reset the bends."""
+        for (_, note), channel in self.notes.items():
+            self.send(mido.Message('note_off', note=note, channel=channel))
+        self.notes.clear()
+        for channel in self.channels:
+            self.send(mido.Message('pitchwheel', pitch=0, channel=channel))
+            self.bends[channel] = 0
+            self.sounding[channel] = 0
+
+
+if __name__ == "__main__":
+    temperament_name = "Pythagorean"
+
+    output_controller = MidiOutputController()
+    output_port_names = mido.get_output_names()
+    input_port_names = mido.get_input_names()
+    if not output_port_names or not input_port_names:
+        print("No MIDI input or output ports available.")
+    else:
+        output_controller.set_port(output_port_names[0])
+        live_filter = LiveTemperamentFilter(output_controller.send_message,
+                                            make_corrections(TEMPERAMENTS[temperament_name]))
+        live_filter.setup()
+        input_port = mido.open_input(input_port_names[0], callback=live_filter.process)
+        try:
+            input(f"Playing {input_port_names[0]} in {temperament_name} on {output_port_names[0]}, "
+                  f"press Enter to stop.\n")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            input_port.close()
+            live_filter.reset()
+            output_controller.close()
@@ -1,4 +1,5 @@
 import math
+from functools import lru_cache
 
 import mido
 
@@ -25,39 +26,138 @@ def tuned_frequency_absolute(midi_note: int, correction_factors: list[float]) ->
     return base_freq * correction_factors[pc]
 
 
-def apply_temperament_absolute(mid: mido.MidiFile, correction_factors: list[float]) -> mido.MidiFile:
-    new_mid = mido.MidiFile(ticks_per_beat=mid.ticks_per_beat)
+class TuningTable:
+    """Pitch bends of the 128 MIDI notes for a temperament, computed once.
+    Use get_tuning_table to share the tables of the same correction factors.
+    """
+
+    def __init__(self, correction_factors: list[float]):
+        self.correction_factors = tuple(correction_factors)
+        self.bends = tuple(freq_to_pitch_bend(tuned_frequency_absolute(note, self.correction_factors), note)
+                           for note in range(128))
+
+    def bend(self, midi_note: int) -> int:
+        return self.bends[midi_note]
+
 
-    for track in mid.tracks:
-        new_track = mido.MidiTrack()
-        new_mid.tracks.append(new_track)
-        set_pitch_bend_range(new_track, semitones=PITCH_BEND_RANGE, channel=0)
+@lru_cache(maxsize=None)
+def _cached_tuning_table(correction_factors: tuple[float, ...]) -> TuningTable:
+    return TuningTable(correction_factors)
 
-        for msg in track:
-            if msg.type == 'note_on' and msg.velocity > 0:
-                tuned_freq = tuned_frequency_absolute(msg.note, correction_factors)
-                bend = freq_to_pitch_bend(tuned_freq, msg.note)
-                new_track.append(mido.Message('pitchwheel', pitch=bend, time=msg.time, channel=msg.channel))
-                new_track.append(msg.copy(time=0))
 
-            elif (msg.type == 'note_off') or (msg.type == 'note_on' and msg.velocity == 0):
-                new_track.append(msg.copy())
-                ch = getattr(msg, 'channel', 0)
-                new_track.append(mido.Message('pitchwheel', pitch=0, time=0, channel=ch))
+def get_tuning_table(correction_factors: list[float]) -> TuningTable:
+    """Return the tuning table of the correction factors, cached by their tuple."""
+    return _cached_tuning_table(tuple(correction_factors))
 
-            else:
-                new_track.append(msg.copy())
 
-    return new_mid
+def apply_temperament_absolute(mid: mido.MidiFile, correction_factors: list[float]) -> mido.MidiFile:
+    """Return a copy of the file with a pitchwheel message before each note_on that needs another bend than the
+    current one of its channel. The bends are reset at the end of the file.
+    The messages that are not changed are shared with the input file.
+    """
+    return apply_temperaments_absolute(mid, [correction_factors])[0]
+
+
+def apply_temperaments_absolute(mid: mido.MidiFile, correction_factors_list: list[list[float]]) -> list[mido.MidiFile]:
+    """Return one tuned copy of the file per temperament (see apply_temperament_absolute), in a single pass over the
+    messages. The messages that are not changed are shared between the input file and all the copies.
+    A pitch bend applies to a channel whatever the track, so the bends are followed on the timeline of all the tracks
+    played together (each track on its own in a type 2 file). A bent channel is reset before the end of the track
+    ending last among the ones using it.
+    """
+    tables = [get_tuning_table(correction_factors) for correction_factors in correction_factors_list]
+    # Output messages of each temperament and track, with absolute times.
+    outputs = [[[(0, message) for message in pitch_bend_range_messages(PITCH_BEND_RANGE, channel=0)]
+                for _ in mid.tracks] for _ in tables]
+
+    timelines = [[i] for i in range(len(mid.tracks))] if mid.type == 2 else [list(range(len(mid.tracks)))]
+    for track_indexes in timelines:
+        _tune_timeline(mid, track_indexes, tables, outputs)
+
+    new_mids = []
+    for tracks in outputs:
+        new_mid = mido.MidiFile(type=mid.type, ticks_per_beat=mid.ticks_per_beat)
+        new_mid.tracks.extend(_to_track(messages) for messages in tracks)
+        new_mids.append(new_mid)
+    return new_mids
+
+
+def _tune_timeline(mid: mido.MidiFile, track_indexes: list[int], tables: list[TuningTable],
+                   outputs: list[list[list[tuple[int, mido.Message]]]]) -> None:
+    """Tune tracks played together, appending the messages to outputs[temperament][track] with absolute times."""
+    events = []  # (absolute time, track, position, message), the message being None at the end of the track.
+    reset_tracks = {}  # Channel -> (end time, track) of the track ending last among the ones using the channel.
+    for i in track_indexes:
+        time = 0
+        channels = set()
+        for position, msg in enumerate(mid.tracks[i]):
+            time += msg.time
+            events.append((time, i, position, msg))
+            if msg.type == 'note_on' or msg.type == 'pitchwheel':
+                channels.add(msg.channel)
+        events.append((time, i, len(mid.tracks[i]), None))
+        for channel in channels:
+            reset_tracks[channel] = max(reset_tracks.get(channel, (time, i)), (time, i))
+    events.sort(key=lambda event: event[:3])
+
+    variants = [(table, tracks, [0] * 16) for table, tracks in zip(tables, outputs)]
+    for time, i, _, msg in events:
+        if msg is None:
+            channels = sorted(channel for channel, (_, track) in reset_tracks.items() if track == i)
+            for _, tracks, bends in variants:
+                resets = [(time, mido.Message('pitchwheel', pitch=0, channel=channel))
+                          for channel in channels if bends[channel] != 0]
+                for channel in channels:
+                    bends[channel] = 0
+                messages = tracks[i]
+                if messages[-1][1].type == 'end_of_track':
+                    messages[-1:-1] = resets
+                else:
+                    messages.extend(resets)
+
+        elif msg.type == 'note_on' and msg.velocity > 0:
+            for table, tracks, bends in variants:
+                bend = table.bends[msg.note]
+                if bend != bends[msg.channel]:
+                    bends[msg.channel] = bend
+                    tracks[i].append((time, mido.Message('pitchwheel', pitch=bend, channel=msg.channel)))
+                tracks[i].append((time, msg))
+
+        elif msg.type == 'pitchwheel':
+            for _, tracks, bends in variants:
+                bends[msg.channel] = msg.pitch
+                tracks[i].append((time, msg))
+
+        else:
+            for _, tracks, _ in variants:
+                tracks[i].append((time, msg))
+
+
+def _to_track(messages: list[tuple[int, mido.Message]]) -> mido.MidiTrack:
+    """Return a track of messages with absolute times. A message whose delta time is unchanged is not copied."""
+    track = mido.MidiTrack()
+    previous = 0
+    for time, msg in messages:
+        delta = time - previous
+        track.append(msg if msg.time == delta else msg.copy(time=delta))
+        previous = time
+    return track
 
 
 def set_pitch_bend_range(track: mido.MidiTrack, semitones: int = 2, channel: int = 0):
-    track.append(mido.Message('control_change', control=101, value=0, channel=channel, time=0))
-    track.append(mido.Message('control_change', control=100, value=0, channel=channel, time=0))
-    track.append(mido.Message('control_change', control=6, value=semitones, channel=channel, time=0))
-    track.append(mido.Message('control_change', control=38, value=0, channel=channel, time=0))
-    track.append(mido.Message('control_change', control=101, value=127, channel=channel, time=0))
-    track.append(mido.Message('control_change', control=100, value=127, channel=channel, time=0))
+    track.extend(pitch_bend_range_messages(semitones, channel))
+
+
+def pitch_bend_range_messages(semitones: int = 2, channel: int = 0) -> list[mido.Message]:
+    """Return the RPN messages setting the pitch bend range of a channel."""
+    return [
+        mido.Message('control_change', control=101, value=0, channel=channel, time=0),
+        mido.Message('control_change', control=100, value=0, channel=channel, time=0),
+        mido.Message('control_change', control=6, value=semitones, channel=channel, time=0),
+        mido.Message('control_change', control=38, value=0, channel=channel, time=0),
+        mido.Message('control_change', control=101, value=127, channel=channel, time=0),
+        mido.Message('control_change', control=100, value=127, channel=channel, time=0),
+    ]
 
 
 ET = [2 ** (i / 12) for i in range(12)]
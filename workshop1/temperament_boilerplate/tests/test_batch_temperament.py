@@ -0,0 +1,40 @@
+import os
+import re
+
+import mido
+
+from workshop1.temperament_boilerplate.batch_temperament import render_directory
+
+
+def write_midi_file(path: str, note: int) -> None:
+    mid = mido.MidiFile()
+    mid.tracks.append(mido.MidiTrack([mido.Message('note_on', note=note, velocity=80, time=0),
+                                      mido.Message('note_off', note=note, time=480)]))
+    mid.save(path)
+
+
+def test_files_with_the_same_stem_do_not_overwrite_each_other(tmp_path):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    write_midi_file(str(input_dir / 'song.mid'), 60)
+    write_midi_file(str(input_dir / 'song.midi'), 62)
+    write_midi_file(str(input_dir / 'other.mid'), 64)
+    saved = render_directory(str(input_dir), str(output_dir), ['JI', 'Pythagorean'], workers=1)
+    assert sorted(os.path.basename(path) for path in saved) == [
+        'other_JI.mid', 'other_Pythagorean.mid', 'song.mid_JI.mid', 'song.mid_Pythagorean.mid', 'song.midi_JI.mid',
+        'song.midi_Pythagorean.mid']
+    notes = {os.path.basename(path): [m.note for m in mido.MidiFile(path) if m.type == 'note_on']
+             for path in saved}
+    assert notes['song.mid_JI.mid'] == [60] and notes['song.midi_JI.mid'] == [62]
+
+
+def test_unreadable_files_are_reported_and_skipped(tmp_path, capsys):
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    write_midi_file(str(input_dir / 'good.mid'), 60)
+    with open(input_dir / 'good.mid', 'rb') as f:
+        (input_dir / 'truncated.mid').write_bytes(f.read()[:10])
+    saved = render_directory(str(input_dir), str(output_dir), ['JI'], workers=1)
+    assert [os.path.basename(path) for path in saved] == ['good_JI.mid']
+    # The message names the exception type, as some exceptions (e.g. EOFError) have no message.
+    assert re.search(r'truncated\.mid: \w+: ', capsys.readouterr().out)
@@ -0,0 +1,124 @@
+import random
+
+import mido
+import pytest
+
+from workshop1.temperament_boilerplate.change_temperament import TEMPERAMENTS
+from workshop1.temperament_boilerplate.live_temperament import DRUM_CHANNEL, LiveTemperamentFilter
+from workshop1.temperament_boilerplate.pitch_bend_utilities import apply_temperament_absolute, \
+    apply_temperaments_absolute, get_tuning_table, make_corrections
+
+
+def sounding_bends(tracks: list[mido.MidiTrack]) -> tuple[list[tuple], list[int]]:
+    """Return the (tick, note, bend of its channel) of each note_on on the merged timeline of the tracks, and the bend
+    of each channel at the end.
+    """
+    bends, note_ons, tick = [0] * 16, [], 0
+    for msg in mido.merge_tracks(tracks):
+        tick += msg.time
+        if msg.type == 'pitchwheel':
+            bends[msg.channel] = msg.pitch
+        elif msg.type == 'note_on' and msg.velocity > 0:
+            note_ons.append((tick, msg.note, bends[msg.channel]))
+    return note_ons, bends
+
+
+def random_midi_file(seed: int, file_type: int = 1) -> mido.MidiFile:
+    rng = random.Random(seed)
+    mid = mido.MidiFile(type=file_type)
+    for _ in range(rng.randint(1, 4)):
+        track = mido.MidiTrack()
+        for _ in range(rng.randint(0, 100)):
+            note, channel = rng.randint(50, 80), rng.randint(0, 2)
+            track.append(mido.Message('note_on', note=note, velocity=80, channel=channel, time=rng.randint(0, 50)))
+            track.append(mido.Message('note_off', note=note, channel=channel, time=rng.randint(1, 50)))
+        if rng.random() < 0.8:
+            track.append(mido.MetaMessage('end_of_track', time=rng.randint(0, 30)))
+        mid.tracks.append(track)
+    return mid
+
+
+def test_bends_follow_the_merged_timeline_of_the_tracks():
+    # Both tracks play on channel 0: the note of the second track sounds between two notes of the first one, and the
+    # end of the second track must not reset the bend of the last note of the first one.
+    mid = mido.MidiFile(type=1)
+    mid.tracks.append(mido.MidiTrack([mido.Message('note_on', note=64, velocity=80, time=0),
+                                      mido.Message('note_off', note=64, time=100),
+                                      mido.Message('note_on', note=64, velocity=80, time=200),
+                                      mido.Message('note_off', note=64, time=100)]))
+    mid.tracks.append(mido.MidiTrack([mido.Message('note_on', note=61, velocity=80, time=150),
+                                      mido.Message('note_off', note=61, time=50)]))
+    table = get_tuning_table(make_corrections(TEMPERAMENTS['JI']))
+    note_ons, end_bends = sounding_bends(apply_temperament_absolute(mid, table.correction_factors).tracks)
+    assert note_ons == [(0, 64, table.bend(64)), (150, 61, table.bend(61)), (300, 64, table.bend(64))]
+    assert not any(end_bends)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_each_note_sounds_with_its_bend(seed):
+    mid = random_midi_file(seed)
+    for name, ratios in TEMPERAMENTS.items():
+        table = get_tuning_table(make_corrections(ratios))
+        tuned = apply_temperament_absolute(mid, table.correction_factors)
+        note_ons, end_bends = sounding_bends(tuned.tracks)
+        assert [(tick, note) for tick, note, _ in note_ons] == \
+            [(tick, note) for tick, note, _ in sounding_bends(mid.tracks)[0]]
+        assert all(bend == table.bend(note) for _, note, bend in note_ons), name
+        assert not any(end_bends), name
+
+
+def test_type_2_tracks_are_tuned_separately():
+    mid = random_midi_file(3, file_type=2)
+    table = get_tuning_table(make_corrections(TEMPERAMENTS['Pythagorean']))
+    for track in apply_temperament_absolute(mid, table.correction_factors).tracks:
+        note_ons, end_bends = sounding_bends([track])
+        assert all(bend == table.bend(note) for _, note, bend in note_ons)
+        assert not any(end_bends)
+
+
+def test_several_temperaments_in_one_pass():
+    mid = random_midi_file(5)
+    corrections = [make_corrections(ratios) for ratios in TEMPERAMENTS.values()]
+    for tuned, correction_factors in zip(apply_temperaments_absolute(mid, corrections), corrections):
+        assert [list(track) for track in tuned.tracks] == \
+            [list(track) for track in apply_temperament_absolute(mid, correction_factors).tracks]
+
+
+def test_live_filter_plays_each_note_with_its_bend():
+    rng = random.Random(0)
+    table = get_tuning_table(make_corrections(TEMPERAMENTS['JI']))
+    sent = []
+    live_filter = LiveTemperamentFilter(sent.append, table.correction_factors)
+    live_filter.setup()
+    sounding = []
+    for _ in range(2000):
+        if sounding and (len(sounding) > 6 or rng.random() < 0.5):
+            live_filter.process(mido.Message('note_off', note=sounding.pop(rng.randrange(len(sounding)))))
+        else:
+            note = rng.randint(48, 84)
+            if note not in sounding:
+                sounding.append(note)
+                live_filter.process(mido.Message('note_on', note=note, velocity=80))
+    bends, playing = {}, {}
+    for msg in sent:
+        if msg.type == 'pitchwheel':
+            bends[msg.channel] = msg.pitch
+        elif msg.type == 'note_on' and msg.velocity > 0:
+            playing[(msg.channel, msg.note)] = True
+        elif msg.type == 'note_off':
+            playing.pop((msg.channel, msg.note), None)
+        # At most 7 notes sound on 15 channels: every sounding note keeps the bend of its own note.
+        assert all(bends[channel] == table.bend(note) for channel, note in playing)
+
+
+def test_live_filter_passes_the_drums_through():
+    table = get_tuning_table(make_corrections(TEMPERAMENTS['JI']))
+    sent = []
+    live_filter = LiveTemperamentFilter(sent.append, table.correction_factors)
+    drums = [mido.Message('note_on', note=36, velocity=100, channel=DRUM_CHANNEL),
+             mido.Message('control_change', control=7, value=90, channel=DRUM_CHANNEL),
+             mido.Message('note_off', note=36, channel=DRUM_CHANNEL)]
+    for msg in drums:
+        live_filter.process(msg)
+    assert sent == drums
+    assert not live_filter.notes